@@ -94,6 +94,43 @@ class Settings(BaseSettings):
     # the normal case. max_output_tokens must cover thinking as well as the
     # response — see services/deep_analysis.py.
     DEEP_ANALYSIS_THINKING_BUDGET: int = Field(default=4096)
+    # The ~45s call runs on a background thread, never a request thread, so a
+    # gunicorn 30s timeout cannot kill it mid-spend. Two per worker process is
+    # plenty for a paid, button-press-only feature. A pending run older than
+    # STALE_AFTER lost its instance and is reported as failed; quota is charged
+    # only on success, so pressing the button again costs nothing.
+    DEEP_ANALYSIS_WORKERS: int = Field(default=2)
+    DEEP_ANALYSIS_STALE_AFTER_SECONDS: int = Field(default=300)
+
+    # Rendered share pages kept per worker (routes/share.py), by ETag.
+    SHARE_PAGE_CACHE_SIZE: int = Field(default=256)
+
+    # Where session data lives; see src/session_store.py. "cookie" keeps it all
+    # in Flask's signed cookie, "sqlite" in a file per instance
+    # (SESSION_SQLITE_PATH, default instance/sessions.sqlite3), "postgres" in
+    # the shared server_sessions table.
+    SESSION_BACKEND: str = Field(default="cookie")
+    SESSION_SQLITE_PATH: str | None = Field(default=None)
+
+    # Identical inputs get identical evaluations at temperature 0, so a repeat --
+    # a "Try an example" prefill, a retried submission, a pasted answer -- is
+    # served from the evaluation_cache table instead of paying for another model
+    # call. Rows are a few KB each; 5000 of them is ~20 MB against the 500 MB
+    # Supabase cap, and the least recently used are trimmed beyond that.
+    EVALUATION_CACHE_ENABLED: bool = Field(default=True)
+    EVALUATION_CACHE_MAX_ENTRIES: int = Field(default=5000)
+
+    # Async submission mode (a `Prefer: respond-async` header on /submit_answer or
+    # /submit_challenge_response). The request thread only validates, checks
+    # quota and queues; the model call runs on this many threads per worker
+    # process. Beyond MAX_PENDING queued jobs a submission is simply evaluated
+    # inline, as before, rather than queued behind a backlog it cannot see.
+    ASYNC_EVALUATION_WORKERS: int = Field(default=3)
+    ASYNC_EVALUATION_MAX_PENDING: int = Field(default=24)
+    # A job still pending or running after this long belonged to an instance that
+    # was recycled mid-call. Quota is only charged on completion, so reporting it
+    # as failed and letting the user resubmit costs them nothing.
+    ASYNC_EVALUATION_STALE_AFTER_SECONDS: int = Field(default=180)
 
     # Maximum characters allowed for each field
     MAX_CLAIM: int = Field(default=200)
@@ -187,8 +224,28 @@ class Settings(BaseSettings):
 
     # Memory management thresholds for individual workers (in MB)
     # Basic dyno on Heroku has 512MB and we currently use two workers (baseline memory usage per worker around 190mb)
-    MEMORY_WARN_THRESHOLD: int = Field(default=220)  # Log warning and trigger GC
+    # These compare against live usage, PSS where available (see src/memory.py).
+    MEMORY_WARN_THRESHOLD: int = Field(default=220)  # Log a warning
     MEMORY_RESTART_THRESHOLD: int = Field(default=250)  # Trigger worker restart
+    # Minute-apart samples over MEMORY_RESTART_THRESHOLD before a restart; the
+    # count resets only once usage falls below MEMORY_WARN_THRESHOLD.
+    MEMORY_RESTART_SAMPLES: int = Field(default=3)
+
+    # Allocation profiling (src/alloc_profiler.py), off unless set. When on,
+    # each worker traces allocations and snapshots the heap around this
+    # fraction of requests; the report is at /profiling/allocations behind the
+    # maintenance key. ALLOC_PROFILER_FRAMES is the traceback depth kept per
+    # allocation, and every extra frame costs memory for each traced block.
+    ALLOC_PROFILER_ENABLED: bool = Field(default=False)
+    ALLOC_PROFILER_SAMPLE_RATE: float = Field(default=0.01)
+    ALLOC_PROFILER_FRAMES: int = Field(default=1)
+
+    # Garbage collector generation thresholds (see src/gc_policy.py). A young
+    # collection runs after GC_GEN0_THRESHOLD net container allocations, against
+    # Python's 700; the older generations after that many younger collections.
+    GC_GEN0_THRESHOLD: int = Field(default=2000)
+    GC_GEN1_THRESHOLD: int = Field(default=10)
+    GC_GEN2_THRESHOLD: int = Field(default=10)
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,51 @@
+"""Gunicorn settings for the Docker image and the Procfile.
+
+The app is preloaded in the master and forked into workers. The hooks below
+give each worker its own database pool, SDK clients and background threads
+(see src/lifecycle.py), and keep the preloaded app out of the workers' garbage
+collections (see src/gc_policy.py).
+"""
+
+import os
+
+import gc_policy
+
+# Nothing is collected while the master imports the app; see gc_policy.py.
+gc_policy.disable_for_preload()
+
+# Read by create_app(), which then leaves starting threads to post_worker_init.
+os.environ["ARGUMENTOR_WORKER_HOOKS"] = "1"
+
+# Cloud Run injects $PORT.
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = 2
+threads = 3
+timeout = 30
+graceful_timeout = 15
+max_requests = 300
+max_requests_jitter = 100
+preload_app = True
+# The heartbeat file lives in memory rather than on Cloud Run's disk, which is
+# also memory but slower; not every dev machine has /dev/shm.
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def pre_fork(server, worker):
+    # The app is loaded by now; freezing it keeps its pages shared.
+    gc_policy.freeze()
+
+
+def post_fork(server, worker):
+    from lifecycle import reinitialize_after_fork
+
+    # Under preload the app was loaded in the master and wsgi() returns it;
+    # otherwise each worker loads its own after this hook, with nothing to drop.
+    app = worker.app.wsgi() if server.cfg.preload_app else None
+    reinitialize_after_fork(app)
+    gc_policy.enable_in_worker()
+
+
+def post_worker_init(worker):
+    from lifecycle import start_background_threads
+
+    start_background_threads()
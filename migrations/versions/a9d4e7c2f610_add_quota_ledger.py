@@ -0,0 +1,90 @@
+"""Add the quota ledger
+
+Hand-written, like a1c7f2e93b04. A new table, so it gets RLS and the deny-all
+policy at creation, as in b3f9d2c61a47.
+
+The current period's usage is copied over from the users counters, so nobody's
+allowance starts over on deploy. A counter whose reset stamp predates this
+month (or, for daily voice, today) is already spent history and is not copied.
+The users columns are left in place; see the comment on them in models.py.
+
+Revision ID: a9d4e7c2f610
+Revises: f2b6d8a41c93
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a9d4e7c2f610"
+down_revision = "f2b6d8a41c93"
+branch_labels = None
+depends_on = None
+
+# (resource, count column, stamp column, period format, period start)
+_BACKFILL = [
+    (
+        "eval",
+        "monthly_eval_count",
+        "last_monthly_eval_reset",
+        "YYYY-MM",
+        "date_trunc('month', now() AT TIME ZONE 'UTC')",
+    ),
+    (
+        "voice",
+        "monthly_voice_count",
+        "last_monthly_voice_reset",
+        "YYYY-MM",
+        "date_trunc('month', now() AT TIME ZONE 'UTC')",
+    ),
+    (
+        "deep_analysis",
+        "monthly_deep_analysis_count",
+        "last_monthly_deep_analysis_reset",
+        "YYYY-MM",
+        "date_trunc('month', now() AT TIME ZONE 'UTC')",
+    ),
+    (
+        "voice_daily",
+        "daily_voice_count",
+        "last_voice_transcription",
+        "YYYY-MM-DD",
+        "date_trunc('day', now() AT TIME ZONE 'UTC')",
+    ),
+]
+
+
+def upgrade():
+    op.create_table(
+        "quota_ledger",
+        sa.Column("user_uuid", sa.String(length=36), nullable=False),
+        sa.Column("resource", sa.String(length=20), nullable=False),
+        sa.Column("period", sa.String(length=10), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_uuid", "resource", "period"),
+    )
+
+    op.execute('ALTER TABLE public."quota_ledger" ENABLE ROW LEVEL SECURITY')
+    op.execute('REVOKE ALL ON public."quota_ledger" FROM anon, authenticated')
+    op.execute(
+        'CREATE POLICY deny_all ON public."quota_ledger" '
+        "FOR ALL USING (false) WITH CHECK (false)"
+    )
+
+    for resource, count_column, stamp_column, period_format, start in _BACKFILL:
+        op.execute(
+            f"""
+            INSERT INTO quota_ledger (user_uuid, resource, period, count)
+            SELECT uuid, '{resource}', to_char({start}, '{period_format}'),
+                   {count_column}
+            FROM users
+            WHERE {count_column} > 0 AND {stamp_column} >= {start}
+            """
+        )
+
+
+def downgrade():
+    op.execute('DROP POLICY deny_all ON public."quota_ledger"')
+    op.drop_table("quota_ledger")
@@ -0,0 +1,57 @@
+"""Add the evaluation cache table
+
+Hand-written, for the same reason as a1c7f2e93b04: `flask db migrate` needs
+Google credentials at import time.
+
+A new table, so nothing existing is rewritten. It gets RLS and the deny-all
+policy at creation, matching c4e8a1d5f207 and d7b3e05a9c14 — otherwise
+Supabase's default privileges would hand it to the anon role on the Data API.
+
+Revision ID: b3f9d2c61a47
+Revises: d7b3e05a9c14
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b3f9d2c61a47"
+down_revision = "d7b3e05a9c14"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "evaluation_cache",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("evaluation", sa.JSON(), nullable=False),
+        sa.Column("model", sa.String(length=64), nullable=True),
+        sa.Column("hits", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("last_used_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    with op.batch_alter_table("evaluation_cache", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_evaluation_cache_last_used_at"),
+            ["last_used_at"],
+            unique=False,
+        )
+
+    op.execute('ALTER TABLE public."evaluation_cache" ENABLE ROW LEVEL SECURITY')
+    op.execute('REVOKE ALL ON public."evaluation_cache" FROM anon, authenticated')
+    op.execute(
+        'CREATE POLICY deny_all ON public."evaluation_cache" '
+        "FOR ALL USING (false) WITH CHECK (false)"
+    )
+
+
+def downgrade():
+    op.execute('DROP POLICY deny_all ON public."evaluation_cache"')
+    with op.batch_alter_table("evaluation_cache", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_evaluation_cache_last_used_at"))
+
+    op.drop_table("evaluation_cache")
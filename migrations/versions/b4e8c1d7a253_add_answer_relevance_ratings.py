@@ -0,0 +1,48 @@
+"""Materialise the Relevance ratings on answers
+
+Hand-written, like a1c7f2e93b04. Two nullable columns with no default, so adding
+them is catalog-only on Postgres 11+. The backfill then copies the ratings out
+of the JSON scores, so `flask reconcile_xp` sums the same thing the old Python
+recalculation did. An answer without a Relevance score stays NULL, which the
+sum treats as below the threshold, as `.get("Relevance", 0)` did.
+
+Revision ID: b4e8c1d7a253
+Revises: a9d4e7c2f610
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b4e8c1d7a253"
+down_revision = "a9d4e7c2f610"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("answer", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("relevance_rating", sa.SmallInteger(), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column("challenge_relevance_rating", sa.SmallInteger(), nullable=True)
+        )
+
+    op.execute(
+        """
+        UPDATE answer SET
+            relevance_rating = round((evaluation_scores->>'Relevance')::numeric),
+            challenge_relevance_rating = round(
+                (challenge_evaluation_scores->>'Relevance')::numeric
+            )
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("answer", schema=None) as batch_op:
+        batch_op.drop_column("challenge_relevance_rating")
+        batch_op.drop_column("relevance_rating")
@@ -0,0 +1,62 @@
+"""Add the evaluation jobs table
+
+Hand-written, like b3f9d2c61a47. RLS and the deny-all policy are applied at
+creation for the same reason as there.
+
+Revision ID: c8e2a7f4d915
+Revises: b3f9d2c61a47
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c8e2a7f4d915"
+down_revision = "b3f9d2c61a47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "evaluation_jobs",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("user_uuid", sa.String(length=36), nullable=False),
+        sa.Column("kind", sa.String(length=20), nullable=False),
+        sa.Column("status", sa.String(length=10), nullable=False),
+        sa.Column("request_json", sa.JSON(), nullable=False),
+        sa.Column("session_snapshot", sa.JSON(), nullable=False),
+        sa.Column("remote_addr", sa.String(length=45), nullable=True),
+        sa.Column("user_agent", sa.String(length=500), nullable=True),
+        sa.Column("response_json", sa.JSON(), nullable=True),
+        sa.Column("response_status", sa.Integer(), nullable=True),
+        sa.Column("session_updates", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("evaluation_jobs", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_evaluation_jobs_user_uuid"), ["user_uuid"], unique=False
+        )
+        batch_op.create_index(
+            batch_op.f("ix_evaluation_jobs_created_at"), ["created_at"], unique=False
+        )
+
+    op.execute('ALTER TABLE public."evaluation_jobs" ENABLE ROW LEVEL SECURITY')
+    op.execute('REVOKE ALL ON public."evaluation_jobs" FROM anon, authenticated')
+    op.execute(
+        'CREATE POLICY deny_all ON public."evaluation_jobs" '
+        "FOR ALL USING (false) WITH CHECK (false)"
+    )
+
+
+def downgrade():
+    op.execute('DROP POLICY deny_all ON public."evaluation_jobs"')
+    with op.batch_alter_table("evaluation_jobs", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_evaluation_jobs_created_at"))
+        batch_op.drop_index(batch_op.f("ix_evaluation_jobs_user_uuid"))
+
+    op.drop_table("evaluation_jobs")
@@ -0,0 +1,43 @@
+"""Add the per-user achievement stats table
+
+Hand-written, like b3f9d2c61a47, with RLS and the deny-all policy applied at
+creation for the same reason. Not backfilled: a user's row is built from their
+answer history the first time an achievement check needs it.
+
+Revision ID: d3f7a9b2c164
+Revises: b4e8c1d7a253
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d3f7a9b2c164"
+down_revision = "b4e8c1d7a253"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user_stats",
+        sa.Column("user_uuid", sa.String(length=36), nullable=False),
+        sa.Column("voice_answer_count", sa.Integer(), nullable=False),
+        sa.Column("categories", sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(["user_uuid"], ["users.uuid"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_uuid"),
+    )
+
+    op.execute('ALTER TABLE public."user_stats" ENABLE ROW LEVEL SECURITY')
+    op.execute('REVOKE ALL ON public."user_stats" FROM anon, authenticated')
+    op.execute(
+        'CREATE POLICY deny_all ON public."user_stats" '
+        "FOR ALL USING (false) WITH CHECK (false)"
+    )
+
+
+def downgrade():
+    op.execute('DROP POLICY deny_all ON public."user_stats"')
+    op.drop_table("user_stats")
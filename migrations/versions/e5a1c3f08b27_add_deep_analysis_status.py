@@ -0,0 +1,35 @@
+"""Add the deep analysis run status to answers
+
+Hand-written, like a1c7f2e93b04. Two nullable columns with no default, so on
+Postgres 11+ this is a catalog-only change and existing rows are not rewritten.
+
+Revision ID: e5a1c3f08b27
+Revises: c8e2a7f4d915
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5a1c3f08b27"
+down_revision = "c8e2a7f4d915"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("answer", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("deep_analysis_status", sa.String(length=10), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column("deep_analysis_requested_at", sa.DateTime(), nullable=True)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("answer", schema=None) as batch_op:
+        batch_op.drop_column("deep_analysis_requested_at")
+        batch_op.drop_column("deep_analysis_status")
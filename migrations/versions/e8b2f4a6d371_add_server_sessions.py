@@ -0,0 +1,49 @@
+"""Add the server-side sessions table
+
+Hand-written, like b3f9d2c61a47, with RLS and the deny-all policy applied at
+creation: the rows are live session data, and the app reaches them as the
+service role only.
+
+Revision ID: e8b2f4a6d371
+Revises: d3f7a9b2c164
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e8b2f4a6d371"
+down_revision = "d3f7a9b2c164"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "server_sessions",
+        sa.Column("sid", sa.String(length=64), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("sid"),
+    )
+    with op.batch_alter_table("server_sessions", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_server_sessions_expires_at"), ["expires_at"], unique=False
+        )
+
+    op.execute('ALTER TABLE public."server_sessions" ENABLE ROW LEVEL SECURITY')
+    op.execute('REVOKE ALL ON public."server_sessions" FROM anon, authenticated')
+    op.execute(
+        'CREATE POLICY deny_all ON public."server_sessions" '
+        "FOR ALL USING (false) WITH CHECK (false)"
+    )
+
+
+def downgrade():
+    op.execute('DROP POLICY deny_all ON public."server_sessions"')
+    with op.batch_alter_table("server_sessions", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_server_sessions_expires_at"))
+
+    op.drop_table("server_sessions")
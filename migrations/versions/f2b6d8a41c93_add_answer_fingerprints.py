@@ -0,0 +1,56 @@
+"""Add the answer fingerprints table
+
+Hand-written, like a1c7f2e93b04. A new table, so it gets RLS and the deny-all
+policy at creation, as in b3f9d2c61a47.
+
+Existing answers are not fingerprinted here: a data migration would have to
+import the app to compute MinHash. Run `flask backfill_fingerprints` once after
+deploying; until then, only answers stored since are checked for duplicates.
+
+Revision ID: f2b6d8a41c93
+Revises: e5a1c3f08b27
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f2b6d8a41c93"
+down_revision = "e5a1c3f08b27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "answer_fingerprints",
+        sa.Column("answer_id", sa.String(length=36), nullable=False),
+        sa.Column("band", sa.SmallInteger(), nullable=False),
+        sa.Column("user_uuid", sa.String(length=36), nullable=False),
+        sa.Column("bucket", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["answer_id"], ["answer.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("answer_id", "band"),
+    )
+    with op.batch_alter_table("answer_fingerprints", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_answer_fingerprints_user_uuid_bucket",
+            ["user_uuid", "bucket"],
+            unique=False,
+        )
+
+    op.execute('ALTER TABLE public."answer_fingerprints" ENABLE ROW LEVEL SECURITY')
+    op.execute('REVOKE ALL ON public."answer_fingerprints" FROM anon, authenticated')
+    op.execute(
+        'CREATE POLICY deny_all ON public."answer_fingerprints" '
+        "FOR ALL USING (false) WITH CHECK (false)"
+    )
+
+
+def downgrade():
+    op.execute('DROP POLICY deny_all ON public."answer_fingerprints"')
+    with op.batch_alter_table("answer_fingerprints", schema=None) as batch_op:
+        batch_op.drop_index("ix_answer_fingerprints_user_uuid_bucket")
+
+    op.drop_table("answer_fingerprints")
@@ -0,0 +1,34 @@
+"""Index answers for the keyset-paginated history
+
+Hand-written, like b4e8c1d7a253. (user_uuid, created_at, id) is the order
+services/history_service.py pages in, so a page is one index range scan
+however deep it is. It replaces the OFFSET scan and the COUNT(*) that the
+profile used to run.
+
+Revision ID: f9c3b6e1a428
+Revises: e8b2f4a6d371
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f9c3b6e1a428"
+down_revision = "e8b2f4a6d371"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("answer", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_answer_user_created_id",
+            ["user_uuid", "created_at", "id"],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("answer", schema=None) as batch_op:
+        batch_op.drop_index("ix_answer_user_created_id")
@@ -0,0 +1,212 @@
+"""Where a worker's memory goes: net allocations per endpoint and source line.
+
+Workers are recycled after --max-requests and when memory stays high
+(memory.py), on the suspicion that something leaks, but nothing said what.
+With ALLOC_PROFILER_ENABLED, a worker traces allocations with tracemalloc from
+its first request on, and for a sampled fraction of requests
+(ALLOC_PROFILER_SAMPLE_RATE) snapshots the heap before and after. The
+difference is what the request left behind. It is added up by endpoint and by
+the source line that allocated it, so a handler that keeps growing the heap
+stands out after a few dozen samples.
+
+A second view compares the heap now with a baseline taken when tracing
+started (or when last asked to rebaseline). That catches growth that no single
+request owns, such as a cache filling up on a background thread.
+
+The cost is why this is opt-in. Tracing slows every allocation in the process,
+and a snapshot copies every traced block, which takes tens of milliseconds
+on a warm worker. Only one sampled request is in flight at a time. Requests
+on the worker's other threads still allocate meanwhile, so figures for one
+endpoint carry some noise from the others. That noise averages out over many
+samples, while a real leak keeps adding up.
+
+/profiling/allocations (routes/profiling.py) returns `report()` for the
+worker that answers it; each gunicorn worker keeps its own figures.
+"""
+
+import random
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+from flask import g, request
+
+# Allocations by the import system and by tracemalloc itself are not the app's.
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def _kb(size):
+    return round(size / 1024, 1)
+
+
+class AllocationProfiler:
+    def __init__(self, sample_rate, frames=1):
+        self.sample_rate = sample_rate
+        self.frames = frames
+        self._lock = threading.Lock()
+        # Held for the whole of a sampled request, so samples never overlap.
+        self._sampling = threading.Lock()
+        self._baseline = None
+        self._baseline_at = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.samples = 0
+            # endpoint -> [requests, net bytes]
+            self.endpoints = defaultdict(lambda: [0, 0])
+            # "file:line" -> [requests it grew in, net bytes, net blocks]
+            self.lines = defaultdict(lambda: [0, 0, 0])
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    def ensure_tracing(self):
+        """Start tracing in this process, on its first request."""
+        if tracemalloc.is_tracing():
+            return
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self._baseline = self._snapshot()
+                self._baseline_at = time.time()
+
+    def rebaseline(self):
+        with self._lock:
+            self._baseline = self._snapshot()
+            self._baseline_at = time.time()
+
+    def begin(self):
+        """Start sampling this request, if it is picked and none is running."""
+        if random.random() >= self.sample_rate:
+            return
+        if not self._sampling.acquire(blocking=False):
+            return
+        g.alloc_snapshot = self._snapshot()
+
+    def end(self, endpoint):
+        """Record what the sampled request left allocated; call after it ends."""
+        before = g.pop("alloc_snapshot", None)
+        if before is None:
+            return
+        try:
+            stats = self._snapshot().compare_to(before, "lineno")
+        finally:
+            self._sampling.release()
+        with self._lock:
+            self.samples += 1
+            totals = self.endpoints[endpoint]
+            totals[0] += 1
+            for stat in stats:
+                if not stat.size_diff:
+                    continue
+                totals[1] += stat.size_diff
+                frame = stat.traceback[0]
+                line = self.lines[f"{frame.filename}:{frame.lineno}"]
+                line[0] += stat.size_diff > 0
+                line[1] += stat.size_diff
+                line[2] += stat.count_diff
+
+    def report(self, limit=20):
+        """The top growers as a JSON-ready dict."""
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            endpoints = sorted(
+                (
+                    {
+                        "endpoint": endpoint,
+                        "requests": requests,
+                        "net_kb": _kb(size),
+                        "net_kb_per_request": _kb(size / requests),
+                    }
+                    for endpoint, (requests, size) in self.endpoints.items()
+                ),
+                key=lambda entry: entry["net_kb"],
+                reverse=True,
+            )
+            lines = sorted(
+                (
+                    {
+                        "line": line,
+                        "requests": requests,
+                        "net_kb": _kb(size),
+                        "net_blocks": blocks,
+                    }
+                    for line, (requests, size, blocks) in self.lines.items()
+                    if size > 0
+                ),
+                key=lambda entry: entry["net_kb"],
+                reverse=True,
+            )
+            baseline, baseline_at = self._baseline, self._baseline_at
+            samples = self.samples
+
+        since_baseline = None
+        if baseline is not None:
+            growers = [
+                stat
+                for stat in self._snapshot().compare_to(baseline, "lineno")
+                if stat.size_diff > 0
+            ]
+            since_baseline = {
+                "seconds": round(time.time() - baseline_at, 1),
+                "top": [
+                    {
+                        "line": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        "net_kb": _kb(stat.size_diff),
+                        "net_blocks": stat.count_diff,
+                    }
+                    for stat in growers[:limit]
+                ],
+            }
+
+        return {
+            "sample_rate": self.sample_rate,
+            "sampled_requests": samples,
+            "traced_mb": {
+                "current": round(current / (1024 * 1024), 2),
+                "peak": round(peak / (1024 * 1024), 2),
+            },
+            "endpoints": endpoints[:limit],
+            "lines": lines[:limit],
+            "since_baseline": since_baseline,
+        }
+
+
+_profiler = None
+
+
+def get_profiler():
+    """This process's profiler, or None when profiling is off."""
+    return _profiler
+
+
+def init_alloc_profiler(app, settings):
+    """Sample requests on `app` when ALLOC_PROFILER_ENABLED is set."""
+    global _profiler
+    if not settings.ALLOC_PROFILER_ENABLED:
+        return None
+    _profiler = AllocationProfiler(
+        settings.ALLOC_PROFILER_SAMPLE_RATE, settings.ALLOC_PROFILER_FRAMES
+    )
+
+    @app.before_request
+    def _begin_sample():
+        # The report itself would show up as its own biggest allocator.
+        if request.blueprint == "profiling":
+            return
+        _profiler.ensure_tracing()
+        _profiler.begin()
+
+    @app.teardown_request
+    def _end_sample(exc):
+        _profiler.end(request.endpoint or "<unmatched>")
+
+    return _profiler
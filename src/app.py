@@ -1,16 +1,8 @@
-import gc
-import json
 import logging
 import os
-import platform
-import resource
-import signal
-import threading
 import time
 import traceback
 from datetime import timedelta
-from functools import lru_cache
-from pathlib import Path
 
 from flask import Flask, jsonify, request, send_from_directory, session
 from flask_limiter.errors import RateLimitExceeded
@@ -20,9 +12,14 @@ from flask_talisman import Talisman
 from werkzeug.exceptions import NotFound
 from werkzeug.middleware.proxy_fix import ProxyFix
 
+import gc_policy
+import memory
+from alloc_profiler import init_alloc_profiler
+from assets import init_assets
 from commands import register_commands
 from config import get_settings
 from extensions import db, limiter, login_manager
+from lifecycle import background_thread, hooks_installed, start_background_threads
 from middleware import (
     block_wp_scanners,
     ensure_user_id,
@@ -32,13 +29,22 @@ from middleware import (
 from routes.answers import answers_bp
 from routes.auth import auth_bp
 from routes.deep_analysis import deep_analysis_bp
+from routes.evaluation_jobs import evaluation_jobs_bp
+from routes.export import export_bp
+from routes.history import history_bp
 from routes.pages import pages_bp
 from routes.password_reset import mail, password_reset_bp
 from routes.preferences import preferences_bp
+from routes.profiling import profiling_bp
 from routes.questions import questions_bp
-from routes.export import export_bp
 from routes.share import share_bp
 from routes.transcribe import transcribe_bp
+from routes.translations import translations_bp
+from services.evaluation_cache import cache_stats
+from services.question_service import preload_catalogs
+from services.static_pages import prerender_pages
+from services.translation_service import get_translations
+from session_store import init_session_store
 
 SETTINGS = get_settings()
 
@@ -68,27 +74,31 @@ def add_cors_headers(response):
 
 def add_cache_headers(response):
     """Add cache headers to static files to improve performance."""
-    if request.path.startswith("/static/"):
-        # Cache static files for 1 week (604800 seconds)
-        response.headers["Cache-Control"] = "public, max-age=604800, immutable"
-        response.headers["Expires"] = time.strftime(
-            "%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 604800)
-        )
+    if request.path.startswith("/static/dist/"):
+        # Built by `flask build_assets`: the name changes with the content.
+        max_age, cache_control = 31536000, "public, max-age=31536000, immutable"
+    elif request.path.startswith("/static/"):
+        # A plain name can change content with any deploy, so keep it short.
+        max_age, cache_control = 3600, "public, max-age=3600"
+    else:
+        return response
+    response.headers["Cache-Control"] = cache_control
+    response.headers["Expires"] = time.strftime(
+        "%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + max_age)
+    )
     return response
 
 
-@lru_cache(maxsize=4)
 def _load_meta(language):
-    """Localized <title>/<meta description>, cached per language.
+    """Localized <title>/<meta description>.
 
     Read straight from the translation files so there is a single source of
-    truth with the client-side data-i18n strings.
+    truth with the client-side data-i18n strings, parsed once and shared with
+    the question catalog (services/translation_service.py).
     """
-    path = Path(__file__).parent / "static" / "translations" / f"{language}.json"
     try:
-        with open(path, encoding="utf-8") as f:
-            return json.load(f).get("meta", {})
-    except (OSError, ValueError):
+        return get_translations(language).get("meta", {})
+    except OSError:
         return {}
 
 
@@ -98,6 +108,8 @@ def create_app():
     )
     os.makedirs(instance_path, exist_ok=True)
 
+    gc_policy.configure(SETTINGS)
+
     app = Flask(__name__, instance_path=instance_path, static_folder="static")
 
     # Requests arrive via Cloudflare and then Cloud Run, so X-Forwarded-For holds
@@ -126,6 +138,7 @@ def create_app():
 
     # Initialize extensions
     db.init_app(app)
+    init_session_store(app, SETTINGS)
     Migrate(app, db)
     login_manager.init_app(app)
     limiter.init_app(app)
@@ -133,47 +146,13 @@ def create_app():
 
     # Start memory monitor thread in production
     if not SETTINGS.DEV:
-
-        def memory_monitor_thread():
-            """Background thread that monitors memory usage and restarts worker if needed"""
-            logger.info("Starting memory monitor thread")
-            while True:
-                try:
-                    # Check every 60 seconds
-                    time.sleep(60)
-
-                    # Force garbage collection
-                    gc.collect()
-
-                    # Get memory usage
-                    memory_divisor = (
-                        1024 if platform.system() != "Darwin" else 1024 * 1024
-                    )
-                    mem_usage = (
-                        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
-                        / memory_divisor
-                    )
-
-                    # Log memory usage periodically
-                    logger.info(f"Current memory usage: {mem_usage:.2f}MB")
-
-                    # If memory exceeds threshold, trigger restart
-                    if mem_usage > SETTINGS.MEMORY_RESTART_THRESHOLD:
-                        logger.warning(
-                            f"Memory monitor detected high usage: {mem_usage:.2f}MB, restarting worker"
-                        )
-                        # Give a moment for any in-progress requests
-                        time.sleep(2)
-                        # Send SIGTERM to self - Gunicorn will handle worker replacement
-                        os.kill(os.getpid(), signal.SIGTERM)
-                        break
-                except Exception as e:
-                    logger.error(f"Error in memory monitor thread: {e}")
-                    # Continue running even if there's an error
-
-        # Start the thread
-        monitor_thread = threading.Thread(target=memory_monitor_thread, daemon=True)
-        monitor_thread.start()
+        # Each worker runs its own monitor, started by gunicorn.conf.py's
+        # post_worker_init. Started here it would run in the preloading master,
+        # watching the master's memory and, over the threshold, sending the
+        # master itself SIGTERM.
+        background_thread("memory-monitor", lambda: memory.monitor(SETTINGS))
+        if not hooks_installed():
+            start_background_threads()
 
     # Register WordPress scanner blocking middleware
     app.before_request(block_wp_scanners)
@@ -193,12 +172,24 @@ def create_app():
     app.register_blueprint(password_reset_bp)
     app.register_blueprint(transcribe_bp)
     app.register_blueprint(share_bp)
+    app.register_blueprint(translations_bp)
     app.register_blueprint(export_bp)
+    app.register_blueprint(history_bp)
     app.register_blueprint(deep_analysis_bp)
+    app.register_blueprint(evaluation_jobs_bp)
+    app.register_blueprint(profiling_bp)
 
     # Register CLI commands
     register_commands(app)
 
+    # Parse the question files now rather than on the first request that
+    # needs them; see services/question_service.py.
+    preload_catalogs(app)
+
+    # Opt-in allocation sampling (alloc_profiler.py), registered ahead of the
+    # other request handlers so a sample covers their allocations too.
+    init_alloc_profiler(app, SETTINGS)
+
     # Add request handlers
     app.before_request(ensure_user_id)
     app.before_request(log_visit)
@@ -207,6 +198,8 @@ def create_app():
     app.before_request(monitor_memory_usage())
     app.after_request(add_cors_headers)
     app.after_request(add_cache_headers)
+    # Hashed URLs, precompressed serving and preload headers for static files.
+    init_assets(app)
 
     @app.context_processor
     def inject_client_id():
@@ -308,7 +301,10 @@ def create_app():
     @app.before_request
     def handle_language_parameter():
         lang = request.args.get("lang")
-        if lang:
+        # A share page reads ?lang= for itself and is cached publicly, so it
+        # must not save the language into the viewer's session: the cookie
+        # that would carry it back could end up in a shared cache.
+        if lang and request.blueprint != "share":
             # If language is not supported, use default
             lang = (
                 lang
@@ -340,23 +336,26 @@ def create_app():
 
     @app.route("/health")
     def health_check():
-        # Force garbage collection before reporting memory
-        gc.collect()
-
-        # Get memory usage
-        memory_divisor = 1024 if platform.system() != "Darwin" else 1024 * 1024
-        mem_usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / memory_divisor
+        # Probes come often, so no collection is forced here, and PSS is the
+        # one figure that costs the kernel any work (see memory.py).
+        current = memory.usage()
 
         # Return health status with memory info
         return jsonify(
             {
                 "status": "ok",
-                "memory_mb": round(mem_usage, 2),
+                # Live usage, as restart decisions see it; the breakdown and the
+                # lifetime peak (what this used to report) are under "memory".
+                "memory_mb": round(current.live_mb, 2),
                 "memory_pct": round(
-                    (mem_usage / 512) * 100, 2
+                    (current.live_mb / 512) * 100, 2
                 ),  # Percentage of 512MB limit
+                "memory": current.as_dict(),
                 "warn_threshold_mb": SETTINGS.MEMORY_WARN_THRESHOLD,
                 "restart_threshold_mb": SETTINGS.MEMORY_RESTART_THRESHOLD,
+                "gc": gc_policy.stats(),
+                # This worker's evaluation cache hits and misses since it started.
+                "evaluation_cache": cache_stats(),
             }
         )
 
@@ -397,6 +396,10 @@ def create_app():
             logger.error(f"Traceback: {traceback.format_exc()}")
         db.session.remove()
 
+    # Last, once the context processors above exist: the content pages are
+    # rendered with them. See services/static_pages.py.
+    prerender_pages(app)
+
     return app
 
 
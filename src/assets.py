@@ -0,0 +1,324 @@
+"""Fingerprinted, minified and precompressed static assets.
+
+Everything under /static/ used to be sent as `immutable` for a week under its
+plain name, so a deploy either served a week of stale main.js (143 KB) and
+style.css (60 KB) or needed someone to remember to rename them.
+
+`flask build_assets` now writes a copy of every asset to static/dist/, under a
+name carrying a hash of its content, plus a gzip (and, with the optional
+`brotli` package, a brotli) copy of the text ones, and a manifest mapping each
+plain name to its built one:
+
+- JSON is re-serialized compactly. CSS and JS are minified with rcssmin and
+  rjsmin when installed; without them CSS gets a conservative comment and
+  whitespace pass and JS is left as written, which the compression mostly
+  makes up for.
+- The ES modules import one another with relative specifiers ("./helpers.js"),
+  and those are rewritten to the hashed names. A module's hash therefore covers
+  every module it reaches, not just its own text: otherwise a change to
+  helpers.js would rename helpers.js but leave main.js, which now imports the
+  new name, under its old one. helpers.js and translations.js import each
+  other, so there is no order to hash them in one at a time.
+
+Templates ask for assets with `static_url("js/main.js")`, which returns the
+hashed URL when a manifest was built and the plain one otherwise (development,
+tests). `preload="style"` or `preload="module"` also sends the URL in a `Link`
+header, so the browser, or Cloudflare's Early Hints, can start fetching before
+the HTML is parsed. Built files are immutable for a year; plain names, which
+JS still fetches directly, are cached for an hour. A request for a built file
+from a client accepting br or gzip gets the precompressed copy with its
+`Content-Encoding`, without compressing anything per request.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from dataclasses import dataclass, field
+
+from flask import Response, current_app, g, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip copies are built
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+logger = logging.getLogger(__name__)
+
+DIST = "dist"
+MANIFEST = "manifest.json"
+# The directories under static/ that are built; robots.txt and friends are
+# served from fixed URLs and stay as they are.
+SOURCES = ("css", "img", "js", "translations", "vid")
+COMPRESSIBLE = {".css", ".js", ".json", ".svg", ".ico", ".webmanifest", ".txt"}
+# content-coding -> file suffix, in order of preference.
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+_HASH_LENGTH = 10
+
+# A relative module specifier after `from`, or in `import "./x.js"` and
+# `import("./x.js")`.
+_IMPORT = re.compile(r"""(\bfrom\s*|\bimport\s*\(?\s*)(["'])(\.{1,2}/[^"'\s]+)\2""")
+# Strings are matched first so that comment markers and spaces inside them
+# are left alone.
+_CSS_TOKEN = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/|\s+""", re.DOTALL
+)
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,])\s*")
+
+
+def precompress(body):
+    """{content-coding: bytes} for `body`, keeping only copies that are smaller."""
+    variants = {}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    # mtime=0 so the bytes, and any ETag built from them, are reproducible.
+    variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+    return {coding: data for coding, data in variants.items() if len(data) < len(body)}
+
+
+def variant_response(variants, mimetype):
+    """A conditional response with the best of `variants` the client accepts.
+
+    `variants` maps a content-coding ("identity", "gzip", "br") to the body in
+    that coding and its strong ETag, as built once from `precompress`.
+    """
+    coding = "identity"
+    for candidate in SUFFIXES:
+        if candidate in variants and request.accept_encodings[candidate]:
+            coding = candidate
+            break
+    body, etag = variants[coding]
+
+    response = Response(body, mimetype=mimetype)
+    if coding != "identity":
+        response.headers["Content-Encoding"] = coding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(etag)
+    return response
+
+
+def _minify_css(text):
+    def token(match):
+        if match.group(1):
+            return match.group(1)
+        return "" if match.group(0).startswith("/*") else " "
+
+    text = _CSS_TOKEN.sub(token, text)
+    # Only around braces, semicolons and commas: a space before ":" or "."
+    # is a descendant combinator in a selector.
+    text = _CSS_PUNCTUATION.sub(r"\1", text)
+    return text.replace(";}", "}").strip()
+
+
+def _minify(name, data):
+    ext = posixpath.splitext(name)[1]
+    if ext == ".json":
+        return json.dumps(
+            json.loads(data), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+    if ext == ".css":
+        text = data.decode("utf-8")
+        text = rcssmin.cssmin(text) if rcssmin else _minify_css(text)
+        return text.encode("utf-8")
+    if ext == ".js" and rjsmin and not name.endswith(".min.js"):
+        return rjsmin.jsmin(data.decode("utf-8")).encode("utf-8")
+    return data
+
+
+def _resolve(name, specifier):
+    return posixpath.normpath(posixpath.join(posixpath.dirname(name), specifier))
+
+
+def _imports(name, data, names):
+    """The assets the module `name` imports by relative specifier."""
+    found = set()
+    for match in _IMPORT.finditer(data.decode("utf-8")):
+        target = _resolve(name, match.group(3))
+        if target in names:
+            found.add(target)
+    return found
+
+
+def _closure(name, imports):
+    seen, stack = set(), [name]
+    while stack:
+        current = stack.pop()
+        if current not in seen:
+            seen.add(current)
+            stack.extend(imports.get(current, ()))
+    return seen
+
+
+def _rewrite_imports(name, data, built):
+    here = posixpath.dirname(built[name])
+
+    def specifier(match):
+        target = _resolve(name, match.group(3))
+        if target not in built:
+            return match.group(0)
+        relative = posixpath.relpath(built[target], here)
+        if not relative.startswith("../"):
+            relative = f"./{relative}"
+        return f"{match.group(1)}{match.group(2)}{relative}{match.group(2)}"
+
+    return _IMPORT.sub(specifier, data.decode("utf-8")).encode("utf-8")
+
+
+def build_assets(static_folder):
+    """Build static_folder/dist and its manifest; return the manifest."""
+    out = os.path.join(static_folder, DIST)
+    shutil.rmtree(out, ignore_errors=True)
+
+    sources = {}
+    for top in SOURCES:
+        for dirpath, _, filenames in os.walk(os.path.join(static_folder, top)):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, static_folder).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    sources[name] = _minify(name, f.read())
+
+    own = {name: hashlib.sha256(data).hexdigest() for name, data in sources.items()}
+    imports = {
+        name: _imports(name, data, sources)
+        for name, data in sources.items()
+        if name.endswith(".js")
+    }
+
+    built = {}
+    for name in sources:
+        digest = own[name]
+        if imports.get(name):
+            closure = sorted(_closure(name, imports))
+            digest = hashlib.sha256(
+                "".join(f"{dep}:{own[dep]}\n" for dep in closure).encode()
+            ).hexdigest()
+        stem, ext = posixpath.splitext(name)
+        built[name] = f"{DIST}/{stem}.{digest[:_HASH_LENGTH]}{ext}"
+
+    encodings = {}
+    for name, data in sources.items():
+        if imports.get(name):
+            data = _rewrite_imports(name, data, built)
+        target = os.path.join(static_folder, built[name])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+        if posixpath.splitext(name)[1] not in COMPRESSIBLE:
+            continue
+        variants = precompress(data)
+        for coding, blob in variants.items():
+            with open(target + SUFFIXES[coding], "wb") as f:
+                f.write(blob)
+        if variants:
+            encodings[built[name]] = sorted(variants)
+
+    manifest = {"assets": built, "encodings": encodings}
+    with open(os.path.join(out, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+@dataclass(frozen=True)
+class Assets:
+    # plain name -> built path, both relative to the static folder
+    built: dict = field(default_factory=dict)
+    # built path -> content-codings it has a precompressed copy in
+    encodings: dict = field(default_factory=dict)
+
+
+def load_manifest(app):
+    """Read static/dist/manifest.json onto `app`; an empty one if not built."""
+    path = os.path.join(app.static_folder, DIST, MANIFEST)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        assets = Assets()
+    else:
+        assets = Assets(
+            manifest["assets"],
+            {
+                name: frozenset(codings)
+                for name, codings in manifest["encodings"].items()
+            },
+        )
+        logger.info("Serving %d built static assets", len(assets.built))
+    app.extensions["assets"] = assets
+    return assets
+
+
+def _link(url, preload):
+    if preload == "module":
+        return f"<{url}>; rel=modulepreload"
+    return f"<{url}>; rel=preload; as={preload}"
+
+
+def static_url(filename, preload=None):
+    """The URL to serve static `filename` from: its hashed copy, once built.
+
+    `preload` is the `as` type ("style", "script", "image", ...) or "module",
+    and adds the URL to this response's `Link` header.
+    """
+    assets = current_app.extensions.get("assets") or Assets()
+    url = url_for("static", filename=assets.built.get(filename, filename))
+    if preload:
+        g.setdefault("preload_links", []).append(_link(url, preload))
+    return url
+
+
+def take_preload_links():
+    """The Link values `static_url` collected while rendering; clears them."""
+    return g.pop("preload_links", [])
+
+
+def add_preload_links(response):
+    links = take_preload_links()
+    if links and response.mimetype == "text/html":
+        response.headers.add("Link", ", ".join(links))
+    return response
+
+
+def send_static(filename):
+    """Flask's static view, serving a built file precompressed when accepted."""
+    assets = current_app.extensions.get("assets") or Assets()
+    codings = assets.encodings.get(filename)
+    if not codings:
+        return current_app.send_static_file(filename)
+
+    for coding, suffix in SUFFIXES.items():
+        if coding in codings and request.accept_encodings[coding]:
+            response = send_from_directory(
+                current_app.static_folder,
+                filename + suffix,
+                mimetype=mimetypes.guess_type(filename)[0],
+            )
+            response.headers["Content-Encoding"] = coding
+            break
+    else:
+        response = current_app.send_static_file(filename)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def init_assets(app):
+    """Load the manifest and install the static view and template helper."""
+    load_manifest(app)
+    app.view_functions["static"] = send_static
+    app.add_template_global(static_url)
+    app.after_request(add_preload_links)
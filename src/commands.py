@@ -26,6 +26,81 @@ def register_commands(app):
             db.drop_all()
         print("Database dropped!")
 
+    @app.cli.command("backfill_fingerprints")
+    @click.option("--batch-size", default=500, show_default=True)
+    def backfill_fingerprints_command(batch_size):
+        """Fingerprint stored answers for the near-duplicate check."""
+        from services.similarity_service import backfill_fingerprints
+
+        with app.app_context():
+            added = backfill_fingerprints(batch_size=batch_size)
+        click.echo(f"Fingerprinted {added} answers.")
+
+    @app.cli.command("prune_sessions")
+    def prune_sessions_command():
+        """Delete expired server-side sessions."""
+        store = getattr(app.session_interface, "store", None)
+        if store is None:
+            click.echo("Sessions are stored in cookies; nothing to prune.")
+            return
+        with app.app_context():
+            removed = store.prune()
+        click.echo(f"Removed {removed} expired sessions.")
+
+    @app.cli.command("build_assets")
+    def build_assets_command():
+        """Minify, fingerprint and precompress static files into static/dist."""
+        from assets import build_assets
+
+        manifest = build_assets(app.static_folder)
+        click.echo(
+            f"Built {len(manifest['assets'])} assets, "
+            f"{len(manifest['encodings'])} precompressed."
+        )
+
+    @app.cli.command("startup_profile")
+    @click.option("--top", default=25, show_default=True, help="Modules to list.")
+    @click.option("--nested", is_flag=True, help="Include modules imported by others.")
+    @click.option("--path", default="/health", show_default=True)
+    def startup_profile_command(top, nested, path):
+        """Time a cold start: imports, first response, and what is slow."""
+        from startup_profile import profile_startup
+
+        profile = profile_startup(path)
+        click.echo(f"import app:     {profile.import_seconds * 1000:8.0f} ms")
+        click.echo(
+            f"first response: {profile.first_response_seconds * 1000:8.0f} ms "
+            f"(GET {path} -> {profile.status})"
+        )
+        click.echo("")
+        click.echo(f"{'cumulative ms':>14} {'self ms':>8}  module")
+        imports = [cost for cost in profile.imports if nested or cost.depth == 0]
+        for cost in sorted(imports, key=lambda c: c.cumulative_us, reverse=True)[:top]:
+            click.echo(
+                f"{cost.cumulative_us / 1000:14.1f} {cost.self_us / 1000:8.1f}  "
+                f"{'  ' * cost.depth}{cost.module}"
+            )
+        if profile.eager:
+            click.echo("")
+            click.echo(
+                f"Imported at startup, should be lazy: {', '.join(profile.eager)}"
+            )
+            raise SystemExit(1)
+
+    @app.cli.command("reconcile_xp")
+    @click.option("--batch-size", default=500, show_default=True)
+    @click.option("--repair", is_flag=True, help="Overwrite drifted totals.")
+    def reconcile_xp_command(batch_size, repair):
+        """Check every user's XP total against their answers."""
+        from services.xp_service import reconcile_xp
+
+        with app.app_context():
+            drifted = reconcile_xp(batch_size=batch_size, repair=repair)
+        for user_uuid, stored, actual in drifted:
+            click.echo(f"{user_uuid}: stored {stored}, actual {actual}")
+        action = "Repaired" if repair else "Found"
+        click.echo(f"{action} {len(drifted)} drifted XP totals.")
+
     @app.cli.command("upgrade_user")
     def upgrade_user_command():
         """Upgrade a user to a specific tier without payment."""
@@ -1,22 +1,22 @@
 import json
 import os
 
-import google.auth
-import openai
 from flask import request
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
-from google.oauth2 import service_account
 
 from config import get_settings
+from lazy import once
+from lifecycle import after_fork
 
 SETTINGS = get_settings()
 
 # Initialize Flask extensions
 db = SQLAlchemy()
 
+
 def client_identifier():
     """Best-effort client IP for rate limiting.
 
@@ -41,15 +41,15 @@ limiter = Limiter(key_func=client_identifier)
 login_manager = LoginManager()
 login_manager.login_view = "auth.login"
 
-# Initialize OpenAI client
-openai_client = openai.OpenAI(api_key=SETTINGS.OPENAI_API_KEY)
+SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
 
+# The SDK clients below are built on first use, not at import: see lazy.py.
 
-SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
 
+@once
+def google_credentials():
+    from google.oauth2 import service_account
 
-# Initialize Google credentials
-def get_google_credentials():
     if os.environ.get("GOOGLE_APPLICATION_CREDENTIALS_JSON"):
         credentials_info = json.loads(os.environ["GOOGLE_APPLICATION_CREDENTIALS_JSON"])
         return service_account.Credentials.from_service_account_info(
@@ -62,8 +62,43 @@ def get_google_credentials():
         )
     # On Cloud Run (and any GCP runtime) the attached service account is picked
     # up via Application Default Credentials, so no key file is needed.
+    import google.auth
+
     credentials, _ = google.auth.default(scopes=SCOPES)
     return credentials
 
 
-google_credentials = get_google_credentials()
+@once
+def openai_client():
+    import openai
+
+    return openai.OpenAI(api_key=SETTINGS.OPENAI_API_KEY)
+
+
+# One Vertex AI client for evaluation, deep analysis and transcript clean-up;
+# it is thread-safe, and sharing it shares its connection pool.
+@once
+def vertex_client():
+    from google import genai
+
+    return genai.Client(
+        vertexai=True,
+        credentials=google_credentials(),
+        project=SETTINGS.GCLOUD_PROJECT_NAME,
+        location=SETTINGS.GCLOUD_PROJECT_REGION,
+    )
+
+
+@once
+def storage_client():
+    from google.cloud import storage
+
+    return storage.Client(credentials=google_credentials())
+
+
+@after_fork
+def _reset_clients():
+    # Built in the preloading master (by a warm-up or a CLI command), a client's
+    # keep-alive pool would be shared by every worker; each builds its own.
+    for client in (openai_client, vertex_client, storage_client):
+        client.reset()
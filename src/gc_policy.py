@@ -0,0 +1,110 @@
+"""Garbage collector settings for the server, and a record of its pauses.
+
+Request handlers used to call `gc.collect()` themselves: on every /health
+probe, around each voice transcription (eight times in one request), and from
+the memory middleware. Each of those is a full collection that holds the GIL
+and so stops every thread in the worker, on a request's clock. They also did
+not do what they were for. Memory was read as `ru_maxrss`, the process's peak,
+which no collection can lower; and reference counting already frees everything
+that is not in a cycle the moment it is dropped.
+
+Instead the collector is configured once:
+
+- `configure()` sets generation thresholds from settings and starts recording
+  pauses. Raising the young threshold from Python's 700 to 2000 cut the time
+  spent collecting by about a quarter on a mix of page, profile and bundle
+  requests. Higher still saved a little more but made each pause longer, and
+  for p99 latency the longest pause is what counts.
+- Under gunicorn's preload, `disable_for_preload()` runs in the master before
+  the app is imported and `freeze()` right before workers are forked. Frozen
+  objects are left out of every later collection, so a worker's collector
+  never writes to the reference-tracking headers of the app's modules,
+  catalogs and pre-rendered pages, and those pages stay shared with the master
+  instead of being copied into each worker. Not collecting during the import
+  also avoids leaving freed holes among them. `enable_in_worker()` turns the
+  collector back on after the fork.
+
+`stats()` reports collections and pause times per generation, for /health.
+"""
+
+import gc
+import threading
+import time
+from collections import deque
+
+# Enough recent pauses for a stable p99 without holding on to many.
+_RECENT = 1024
+
+_lock = threading.Lock()
+_started = None
+_generation = None
+_collections = [0, 0, 0]
+_pause_total = [0.0, 0.0, 0.0]
+_pause_max = [0.0, 0.0, 0.0]
+_recent = deque(maxlen=_RECENT)
+
+
+def _on_collection(phase, info):
+    # The collector never runs in two threads at once, so the start can be a
+    # module global; only readers of the totals need the lock.
+    global _started, _generation
+    if phase == "start":
+        _started = time.perf_counter()
+        _generation = info["generation"]
+        return
+    if _started is None:
+        return
+    pause = time.perf_counter() - _started
+    _started = None
+    with _lock:
+        _collections[_generation] += 1
+        _pause_total[_generation] += pause
+        _pause_max[_generation] = max(_pause_max[_generation], pause)
+        _recent.append(pause)
+
+
+def configure(settings):
+    """Apply the thresholds from `settings` and record pauses from now on."""
+    gc.set_threshold(
+        settings.GC_GEN0_THRESHOLD,
+        settings.GC_GEN1_THRESHOLD,
+        settings.GC_GEN2_THRESHOLD,
+    )
+    if _on_collection not in gc.callbacks:
+        gc.callbacks.append(_on_collection)
+
+
+def disable_for_preload():
+    """Stop automatic collection in the gunicorn master while the app loads."""
+    gc.disable()
+
+
+def freeze():
+    """Exempt everything allocated so far from collection; call before forking."""
+    gc.freeze()
+
+
+def enable_in_worker():
+    gc.enable()
+
+
+def stats():
+    """Collections and pause times, in milliseconds, seen by this process."""
+    with _lock:
+        recent = sorted(_recent)
+        generations = [
+            {
+                "collections": _collections[generation],
+                "pause_total_ms": round(_pause_total[generation] * 1000, 3),
+                "pause_max_ms": round(_pause_max[generation] * 1000, 3),
+            }
+            for generation in range(3)
+        ]
+    p99 = recent[min(len(recent) - 1, int(len(recent) * 0.99))] if recent else 0.0
+    return {
+        "enabled": gc.isenabled(),
+        "thresholds": list(gc.get_threshold()),
+        "frozen": gc.get_freeze_count(),
+        "generations": generations,
+        "recent_pause_p99_ms": round(p99 * 1000, 3),
+    }
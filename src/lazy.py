@@ -0,0 +1,73 @@
+"""Deferred imports and clients, for a faster cold start.
+
+Cloud Run scales to zero, so the first request after idle waits for the whole
+app to import. Much of that time went to work the request may never need:
+resolving Google credentials, building an OpenAI client and two Vertex AI
+clients, and importing stripe, google.genai and google.cloud.storage.
+
+`once` makes a factory run on its first call only, so a client is built when
+something first uses it. `LazyModule` stands in for a module until one of its
+attributes is read or assigned. Both are safe to call from gunicorn's threads.
+The first caller builds or imports, and the others wait for that result rather
+than making their own.
+
+`flask startup_profile` (startup_profile.py) shows what is still paid for at
+import time.
+"""
+
+import functools
+import importlib
+import threading
+
+_UNSET = object()
+
+
+def once(factory):
+    """Wrap `factory` so it runs on the first call; later calls get its result.
+
+    `.reset()` drops the result, so the next call builds it again.
+    """
+    lock = threading.Lock()
+    result = _UNSET
+
+    @functools.wraps(factory)
+    def get():
+        nonlocal result
+        value = result
+        if value is _UNSET:
+            with lock:
+                if result is _UNSET:
+                    result = factory()
+                value = result
+        return value
+
+    def reset():
+        nonlocal result
+        with lock:
+            result = _UNSET
+
+    get.reset = reset
+    return get
+
+
+class LazyModule:
+    """The module `name`, imported when first used rather than when declared.
+
+    Attribute reads and writes go to the real module, so `stripe.api_key = ...`
+    and `except stripe.error.StripeError` work unchanged.
+    """
+
+    def __init__(self, name):
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(
+            self, "_lazy_load", once(lambda: importlib.import_module(name))
+        )
+
+    def __getattr__(self, attribute):
+        return getattr(self._lazy_load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._lazy_load(), attribute, value)
+
+    def __repr__(self):
+        return f"<LazyModule {self._lazy_name!r}>"
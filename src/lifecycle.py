@@ -0,0 +1,81 @@
+"""Per-worker setup for gunicorn workers forked from a preloaded master.
+
+The Procfile and the Docker image run gunicorn with `preload_app`, so
+`create_app()` runs once in the master and every worker is a fork of it. That
+saves each worker importing the app and keeps the catalogs and pre-rendered
+pages shared copy-on-write, but whatever the master opened is then shared as
+well:
+
+- SQLAlchemy's pool. Two workers writing to the one inherited socket corrupt
+  each other's protocol stream.
+- SDK clients (Vertex AI, OpenAI, Cloud Storage), whose keep-alive pools hold
+  sockets the same way.
+- Threads, which do not survive the fork at all. The memory monitor started in
+  the master ran in no worker.
+
+gunicorn.conf.py calls `reinitialize_after_fork` from its post_fork hook, and
+`start_background_threads` once the worker has loaded the app. Modules holding
+per-process state register a reset with `@after_fork`, and long-running
+threads are registered with `background_thread` rather than started directly.
+
+Without gunicorn's hooks (the dev server, a test, gunicorn without the config)
+create_app starts the threads itself; see `hooks_installed`.
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Set by gunicorn.conf.py before the app is imported.
+HOOKS_ENV = "ARGUMENTOR_WORKER_HOOKS"
+
+_after_fork = []
+# name -> target
+_threads = {}
+_threads_started_in = None
+
+
+def after_fork(callback):
+    """Register `callback()` to run in each worker right after it is forked."""
+    _after_fork.append(callback)
+    return callback
+
+
+def background_thread(name, target):
+    """Register `target` to run on a daemon thread in each serving process."""
+    _threads[name] = target
+
+
+def hooks_installed():
+    """True when gunicorn.conf.py will call this module's hooks."""
+    return os.environ.get(HOOKS_ENV) == "1"
+
+
+def reinitialize_after_fork(app=None):
+    """Drop what the master process opened, so this worker opens its own.
+
+    `app` is the preloaded Flask app, whose engines are disposed without
+    closing the master's connections; None when nothing was preloaded.
+    """
+    if app is not None:
+        from extensions import db
+
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+    for callback in _after_fork:
+        callback()
+    logger.info("Worker %d reinitialized after fork", os.getpid())
+
+
+def start_background_threads():
+    """Start every registered thread, once per process."""
+    global _threads_started_in
+    if _threads_started_in == os.getpid():
+        return
+    _threads_started_in = os.getpid()
+    for name, target in _threads.items():
+        threading.Thread(target=target, name=name, daemon=True).start()
+        logger.info("Started %s thread in process %d", name, os.getpid())
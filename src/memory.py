@@ -0,0 +1,154 @@
+"""How much memory this worker is using now, and when that warrants a restart.
+
+Memory used to be read as `getrusage().ru_maxrss`, the process's lifetime
+peak. A peak never goes down: once a worker touched MEMORY_RESTART_THRESHOLD,
+even for one large export, every later request scheduled another SIGTERM, and
+workers were recycled (a cold start on the next request) long after the
+memory was given back.
+
+Current usage comes from /proc instead:
+
+- `rss_mb()` reads /proc/self/statm, which is cheap enough to read on every
+  request.
+- `pss_mb()` reads /proc/self/smaps_rollup. Proportional set size splits each
+  page shared with the preloading master and the other workers (gc_policy.py
+  keeps many shared) between the processes that map it. So the workers' PSS
+  adds up to what the instance is really using, where their RSS would count
+  the shared pages once per worker. The kernel walks the page tables to
+  produce it, so it is read by the monitor and /health, not per request.
+
+`MemoryWatch` decides on restarts. The monitor thread samples it once a
+minute, and a worker is restarted only after MEMORY_RESTART_SAMPLES samples in
+a row above MEMORY_RESTART_THRESHOLD. Dipping below it does not reset the
+count; only falling under MEMORY_WARN_THRESHOLD does. A worker hovering at the
+limit is restarted rather than let off by every brief dip, while a single
+spike that is then released never counts. Outside Linux there is no /proc,
+and the peak is all there is to go on.
+"""
+
+import logging
+import os
+import platform
+import resource
+import signal
+import threading
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024) if hasattr(os, "sysconf") else 0
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+_MAXRSS_DIVISOR = 1024 if platform.system() != "Darwin" else 1024 * 1024
+
+
+def peak_rss_mb():
+    """The most this process has ever had resident, in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / _MAXRSS_DIVISOR
+
+
+def rss_mb():
+    """This process's resident set now, in MB; the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_MB
+    except (OSError, IndexError, ValueError):
+        return peak_rss_mb()
+
+
+def pss_mb():
+    """This process's proportional set size in MB, or None without /proc."""
+    try:
+        with open("/proc/self/smaps_rollup", "rb") as rollup:
+            for line in rollup:
+                if line.startswith(b"Pss:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    return None
+
+
+@dataclass(frozen=True)
+class Usage:
+    rss_mb: float
+    # None where the kernel does not report it
+    pss_mb: float | None
+    peak_mb: float
+
+    @property
+    def live_mb(self):
+        """What restart decisions go by: PSS where there is one, else RSS."""
+        return self.pss_mb if self.pss_mb is not None else self.rss_mb
+
+    def as_dict(self):
+        return {
+            "rss_mb": round(self.rss_mb, 2),
+            "pss_mb": None if self.pss_mb is None else round(self.pss_mb, 2),
+            "peak_mb": round(self.peak_mb, 2),
+        }
+
+
+def usage():
+    return Usage(rss_mb(), pss_mb(), peak_rss_mb())
+
+
+class MemoryWatch:
+    """Restart on sustained high usage, with hysteresis; see the module docstring."""
+
+    def __init__(self, warn_mb, restart_mb, samples):
+        self.warn_mb = warn_mb
+        self.restart_mb = restart_mb
+        self.samples = samples
+        self.over = 0
+        self._lock = threading.Lock()
+
+    def observe(self, live_mb):
+        """Record a sample; True when the worker should now be restarted."""
+        with self._lock:
+            if live_mb > self.restart_mb:
+                self.over += 1
+            elif live_mb < self.warn_mb:
+                self.over = 0
+            return self.over >= self.samples
+
+
+def _restart(live_mb):
+    logger.warning(
+        "Worker %d has used %.2fMB for too long, restarting it",
+        os.getpid(),
+        live_mb,
+    )
+    # Give a moment for any in-progress requests
+    time.sleep(2)
+    # Send SIGTERM to self - Gunicorn will handle worker replacement
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+def monitor(settings, interval=60):
+    """Sample this worker's memory forever; run on a background thread."""
+    logger.info("Starting memory monitor thread")
+    watch = MemoryWatch(
+        settings.MEMORY_WARN_THRESHOLD,
+        settings.MEMORY_RESTART_THRESHOLD,
+        settings.MEMORY_RESTART_SAMPLES,
+    )
+    while True:
+        try:
+            time.sleep(interval)
+            sample = usage()
+            logger.info(
+                "Memory: %.2fMB live, %.2fMB RSS, %.2fMB peak",
+                sample.live_mb,
+                sample.rss_mb,
+                sample.peak_mb,
+            )
+            if sample.live_mb > settings.MEMORY_WARN_THRESHOLD:
+                logger.warning("High memory usage: %.2fMB", sample.live_mb)
+            if watch.observe(sample.live_mb):
+                _restart(sample.live_mb)
+                return
+        except Exception:
+            # Continue running even if there's an error. Reading /proc already
+            # falls back on its own, so anything caught here is unexpected and
+            # is logged with its traceback.
+            logger.exception("Error in memory monitor thread")
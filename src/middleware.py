@@ -1,12 +1,10 @@
-import gc
 import logging
-import resource
-import sys
 from datetime import UTC, datetime
 
 from flask import Response, after_this_request, request, session
 from flask_login import current_user
 
+import memory
 from config import get_settings
 from extensions import db
 from models import Visit
@@ -74,8 +72,11 @@ def block_wp_scanners():
 
 
 def ensure_user_id():
-    # Skip user identification for static files to improve performance
-    if request.path.startswith("/static/"):
+    # Skip user identification for static files to improve performance. Share
+    # pages and translation bundles need no identity either, and minting one
+    # would put a Set-Cookie on a response that is meant to be cached publicly
+    # (routes/share.py, routes/translations.py).
+    if request.path.startswith(("/static/", "/share/", "/translations/")):
         return
 
     # Identity only, no database write. This used to INSERT a users row for every
@@ -86,8 +87,10 @@ def ensure_user_id():
 
 
 def log_visit():
-    # Skip logging for static files to improve performance
-    if request.path.startswith("/static/"):
+    # Skip logging for static files to improve performance, and for the publicly
+    # cached responses ensure_user_id skips: recording a visit writes the
+    # session, and so a Set-Cookie.
+    if request.path.startswith(("/static/", "/share/", "/translations/")):
         return
 
     # A client that returned no session cookie is almost certainly not a browser:
@@ -123,80 +126,29 @@ def log_visit():
 
 def monitor_memory_usage():
     """
-    Middleware to monitor memory usage and log when it exceeds thresholds.
-    This helps identify memory leaks or high memory usage patterns.
+    Middleware to log requests that grow the worker's memory a lot.
+    This helps identify memory leaks or high memory usage patterns. Restarts
+    are left to the memory monitor thread, which only acts on sustained usage
+    (see memory.py); a single request over the limit used to trigger one.
     """
 
-    def memory_usage_kb():
-        """Return memory usage in kilobytes"""
-        try:
-            # For Unix systems
-            rusage_denom = 1024.0
-            if sys.platform == "darwin":
-                # ... macOS ...
-                rusage_denom = rusage_denom
-            else:
-                # ... Linux ...
-                rusage_denom = rusage_denom
-
-            # Get memory usage from resource module
-            usage = resource.getrusage(resource.RUSAGE_SELF)
-            return usage.ru_maxrss / rusage_denom
-        except Exception as e:
-            logger.error(f"Error getting memory usage: {e}")
-            return 0
-
     def middleware():
-        # Check memory before request
-        mem_before = memory_usage_kb()
-
-        # Convert MB thresholds to KB for comparison with memory_usage_kb
-        warn_threshold_kb = SETTINGS.MEMORY_WARN_THRESHOLD * 1024
-        restart_threshold_kb = SETTINGS.MEMORY_RESTART_THRESHOLD * 1024
-
-        # Log if memory usage is high and trigger garbage collection
-        if mem_before > warn_threshold_kb:
-            logger.warning(
-                f"High memory usage detected: {mem_before:.2f}KB - triggering garbage collection"
-            )
-            # Force garbage collection to free up memory
-            gc.collect()
-
-            # Check if memory is still critical after garbage collection
-            mem_after_gc = memory_usage_kb()
-
-            # If memory usage is too high even after GC, gracefully restart worker
-            if mem_after_gc > restart_threshold_kb:
-                import os
-                import signal
-                from threading import Timer
-
-                def delayed_exit():
-                    logger.warning(
-                        f"Worker exceeded memory threshold ({mem_after_gc / 1024:.2f}MB), shutting down gracefully"
-                    )
-                    # Send SIGTERM to self - Gunicorn will handle worker replacement
-                    os.kill(os.getpid(), signal.SIGTERM)
-
-                # Schedule exit after response is sent
-                Timer(1.0, delayed_exit).start()
-                logger.warning(
-                    f"Scheduled worker shutdown due to high memory usage: {mem_after_gc / 1024:.2f}MB"
-                )
+        # Current RSS, which goes down as well as up; the peak that was read
+        # here before could only show growth past the previous high.
+        mem_before = memory.rss_mb()
 
         @after_this_request
         def after_request(response):
-            # Check memory after request
-            mem_after = memory_usage_kb()
-            mem_diff = mem_after - mem_before
+            # With several threads per worker this includes whatever the
+            # others allocated meanwhile, so it flags requests to look at
+            # rather than measuring them exactly.
+            mem_diff = memory.rss_mb() - mem_before
 
             # Log significant memory increases
-            if mem_diff > 50 * 1024:  # 50MB increase in a single request
+            if mem_diff > 50:  # 50MB increase in a single request
                 logger.warning(
-                    f"Large memory increase: {mem_diff:.2f}KB in request {request.path}"
+                    f"Large memory increase: {mem_diff:.2f}MB in request {request.path}"
                 )
-                # Force garbage collection after large memory increases
-                gc.collect()
 
             return response
 
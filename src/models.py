@@ -46,6 +46,9 @@ class User(db.Model, UserMixin):
     feedback = db.relationship(
         "Feedback", backref="user", lazy=True, cascade="all, delete-orphan"
     )
+    # Superseded by quota_ledger (services/quota_service.py) and no longer read
+    # or written. Kept until a release has run on the ledger alone, so a
+    # rollback still finds the values it expects.
     last_voice_transcription = db.Column(db.DateTime, nullable=True)
     daily_voice_count = db.Column(db.Integer, default=0, nullable=True)
 
@@ -65,20 +68,14 @@ class User(db.Model, UserMixin):
     def __repr__(self):
         return f"<User {self.uuid} {self.username}>"
 
+    @property
+    def earned_achievement_ids(self) -> set:
+        """The ids of every achievement earned, for repeated membership checks."""
+        return {a.achievement_id for a in self.achievements}
+
     def has_achievement(self, achievement_id: str) -> bool:
         """Check if user has earned a specific achievement"""
-        return any(a.achievement_id == achievement_id for a in self.achievements)
-
-    def award_achievement(self, achievement_id: str) -> bool:
-        """Award an achievement to the user if they don't already have it"""
-        if not self.has_achievement(achievement_id):
-            achievement = UserAchievement(
-                user_uuid=self.uuid, achievement_id=achievement_id
-            )
-            db.session.add(achievement)
-            db.session.commit()
-            return True
-        return False
+        return achievement_id in self.earned_achievement_ids
 
 
 class Answer(db.Model):
@@ -92,8 +89,19 @@ class Answer(db.Model):
     argument = db.Column(db.Text, nullable=False)
     counterargument = db.Column(db.Text, nullable=True)
     evaluation_scores = db.Column(db.JSON, default=dict, nullable=False)
-    evaluation_feedback = db.Column(db.JSON, default=dict, nullable=False)
+    # The feedback JSON is the bulk of a row — a paragraph per dimension — and
+    # only the pages that show it need it, so it is deferred: left out of every
+    # SELECT unless the query asks for it, through a profile in
+    # ANSWER_PROFILES below. Same for the challenge feedback and deep_analysis.
+    evaluation_feedback = db.deferred(
+        db.Column(db.JSON, default=dict, nullable=False), group="feedback"
+    )
     xp_earned = db.Column(db.Integer, nullable=False)
+    # Copies of evaluation_scores["Relevance"] and its challenge counterpart,
+    # written with the scores, so the XP sum in services/xp_service.py can run
+    # in SQL without opening the JSON.
+    relevance_rating = db.Column(db.SmallInteger, nullable=True)
+    challenge_relevance_rating = db.Column(db.SmallInteger, nullable=True)
 
     # Challenge refinement feature:
     challenge = db.Column(
@@ -103,7 +111,9 @@ class Answer(db.Model):
         db.Text, nullable=True
     )  # The user's response to the challenge
     challenge_evaluation_scores = db.Column(db.JSON, default=dict, nullable=False)
-    challenge_evaluation_feedback = db.Column(db.JSON, default=dict, nullable=False)
+    challenge_evaluation_feedback = db.deferred(
+        db.Column(db.JSON, default=dict, nullable=False), group="feedback"
+    )
     challenge_xp_earned = db.Column(db.Integer, nullable=False, default=0)
 
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
@@ -114,8 +124,13 @@ class Answer(db.Model):
     # revisit is free. Nullable rather than defaulting to {} because "never run"
     # and "run and returned nothing" have to stay distinguishable — a truthiness
     # check on this column is what stops a second call spending quota again.
-    deep_analysis = db.Column(db.JSON, nullable=True)
+    deep_analysis = db.deferred(db.Column(db.JSON, nullable=True))
     deep_analysis_created_at = db.Column(db.DateTime, nullable=True)
+    # The run itself happens off the request thread (routes/deep_analysis.py):
+    # None before the first press, then "pending" until it lands, "done" or
+    # "failed". requested_at is what a stale "pending" is judged by.
+    deep_analysis_status = db.Column(db.String(10), nullable=True)
+    deep_analysis_requested_at = db.Column(db.DateTime, nullable=True)
 
     # Achievement that was completed by this answer (if any)
     completed_achievement = db.Column(db.String(50), nullable=True)
@@ -123,12 +138,19 @@ class Answer(db.Model):
     # Store multiple achievements completed by this answer
     completed_achievements = db.Column(db.JSON, default=list, nullable=True)
 
-    __table_args__ = (db.Index("ix_user_question", "user_uuid", "question_id"),)
+    __table_args__ = (
+        db.Index("ix_user_question", "user_uuid", "question_id"),
+        # The history's keyset order (services/history_service.py). Ascending
+        # is fine for a DESC walk: both databases scan an index either way.
+        db.Index("ix_answer_user_created_id", "user_uuid", "created_at", "id"),
+    )
 
     def __repr__(self):
         return f"<Answer {self.id} for user {self.user_uuid}>"
 
-    def to_dict(self):
+    @property
+    def total_xp(self):
+        """The XP this answer counts for: each part only if it was relevant."""
         total_xp = 0
         if (
             self.evaluation_scores.get("Relevance", 0)
@@ -142,11 +164,18 @@ class Answer(db.Model):
             >= SETTINGS.RELEVANCE_THRESHOLD_FOR_XP
         ):
             total_xp += self.challenge_xp_earned
+        return total_xp
+
+    def to_dict(self, deep_analysis=True):
+        """The answer as the profile page's JSON.
 
+        Pass deep_analysis=False when the query left it out (the "list"
+        profile), rather than loading it again per row.
+        """
         # Determine if this is a custom question
         is_custom = self.question_id and self.question_id.startswith("custom_")
 
-        return {
+        data = {
             "id": self.id,
             "question_text": self.question_text,
             "claim": self.claim,
@@ -162,12 +191,37 @@ class Answer(db.Model):
             "challenge_xp_earned": self.challenge_xp_earned,
             "created_at": self.created_at.isoformat(),
             "input_mode": self.input_mode,
-            "total_xp": total_xp,
+            "total_xp": self.total_xp,
             "category": "Custom" if is_custom else None,
             "completed_achievement": getattr(self, "completed_achievement", None),
             "completed_achievements": getattr(self, "completed_achievements", []),
-            "deep_analysis": self.deep_analysis,
         }
+        if deep_analysis:
+            data["deep_analysis"] = self.deep_analysis
+        return data
+
+
+class AnswerFingerprint(db.Model):
+    """One LSH band of an answer's MinHash; see services/similarity_service.py.
+
+    user_uuid duplicates the answer's owner so a candidate lookup is a single
+    range scan on (user_uuid, bucket) instead of a join across every user's
+    answers that happen to share a bucket.
+    """
+
+    __tablename__ = "answer_fingerprints"
+    __table_args__ = (
+        db.Index("ix_answer_fingerprints_user_uuid_bucket", "user_uuid", "bucket"),
+    )
+
+    answer_id = db.Column(
+        db.String(36),
+        db.ForeignKey("answer.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    band = db.Column(db.SmallInteger, primary_key=True)
+    user_uuid = db.Column(db.String(36), nullable=False)
+    bucket = db.Column(db.BigInteger, nullable=False)
 
 
 class Visit(db.Model):
@@ -211,3 +265,162 @@ class UserAchievement(db.Model):
 
     def __repr__(self):
         return f"<UserAchievement {self.achievement_id}>"
+
+
+class UserStats(db.Model):
+    """Running counters the achievement rules read; see achievement_service.py.
+
+    `voice_answer_count` counts every voice answer. `categories` maps a
+    category name to its {"answered", "passed", "strong"} counts: answers in
+    it, and answers or challenge responses scoring at least MIN_SCORE and
+    STRONG_SCORE.
+    """
+
+    __tablename__ = "user_stats"
+
+    user_uuid = db.Column(
+        db.String(36),
+        db.ForeignKey("users.uuid", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    voice_answer_count = db.Column(db.Integer, nullable=False, default=0)
+    categories = db.Column(db.JSON, nullable=False, default=dict)
+
+
+class StoredSession(db.Model):
+    """A server-side session, when SESSION_BACKEND is "postgres".
+
+    `data` is the encoded session (session_store.encode); the cookie holds
+    only `sid`.
+    """
+
+    __tablename__ = "server_sessions"
+
+    sid = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class QuotaLedger(db.Model):
+    """Usage per user, resource and period; see services/quota_service.py.
+
+    No foreign key to users: an anonymous visitor's first evaluation is charged
+    before their users row is created, and a merged-away anonymous uuid's rows
+    are simply never read again.
+    """
+
+    __tablename__ = "quota_ledger"
+
+    user_uuid = db.Column(db.String(36), primary_key=True)
+    resource = db.Column(db.String(20), primary_key=True)
+    # "2026-10" for a monthly allowance, "2026-10-18" for a daily one.
+    period = db.Column(db.String(10), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class EvaluationCache(db.Model):
+    """A scored evaluation, stored under a hash of everything that produced it.
+
+    The key covers the normalized inputs, the language, the model and a digest of
+    the system instruction and schema -- see services/evaluation_cache.py -- so a
+    prompt or model change simply stops matching the old rows rather than needing
+    an invalidation step.
+    """
+
+    __tablename__ = "evaluation_cache"
+
+    key = db.Column(db.String(64), primary_key=True)
+    evaluation = db.Column(db.JSON, nullable=False)
+    model = db.Column(db.String(64), nullable=True)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
+    # Eviction is least-recently-used, so this is bumped on every hit and is the
+    # column the trim orders by.
+    last_used_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), index=True)
+
+    def __repr__(self):
+        return f"<EvaluationCache {self.key[:12]} hits={self.hits}>"
+
+
+class EvaluationJob(db.Model):
+    """One queued scored evaluation, for a submission made in async mode.
+
+    Holds everything needed to replay the original request on a worker thread,
+    and then the response it produced. `user_uuid` is deliberately not a foreign
+    key: an anonymous visitor has no users row until their first answer is
+    stored, which is exactly what the job is about to do.
+    """
+
+    __tablename__ = "evaluation_jobs"
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_uuid = db.Column(db.String(36), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # "answer" or "challenge"
+    # pending -> running -> done | failed
+    status = db.Column(db.String(10), nullable=False, default="pending")
+    request_json = db.Column(db.JSON, nullable=False)
+    session_snapshot = db.Column(db.JSON, nullable=False, default=dict)
+    remote_addr = db.Column(db.String(45), nullable=True)
+    user_agent = db.Column(db.String(500), nullable=True)
+    response_json = db.Column(db.JSON, nullable=True)
+    response_status = db.Column(db.Integer, nullable=True)
+    # Session keys the evaluation changed (xp, earned_achievements). The worker
+    # has no cookie to write them to, so they are applied when the owner polls.
+    session_updates = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), index=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<EvaluationJob {self.id} {self.kind} {self.status}>"
+
+
+# Named column sets for Answer queries. Every site that loads answers picks
+# one, so what it pulls from the database is a decision made where the rows
+# are used, rather than every column of every row by default:
+#
+#   Answer.query.options(*ANSWER_PROFILES["list"]).filter_by(...)
+#
+# - "xp": ids and the XP columns, for moving and totting up answers.
+# - "summary": scores and timestamps, no free text beyond the question.
+# - "list": everything the history list shows, feedback included, without
+#   deep_analysis.
+# - "full": every column.
+#
+# The narrow profiles raise on access to anything they left out, so a template
+# reaching for another column fails in the tests instead of quietly issuing
+# one SELECT per row in production.
+ANSWER_PROFILES = {
+    "xp": (
+        db.load_only(
+            Answer.id,
+            Answer.user_uuid,
+            Answer.question_id,
+            Answer.xp_earned,
+            Answer.challenge_xp_earned,
+            Answer.relevance_rating,
+            Answer.challenge_relevance_rating,
+            raiseload=True,
+        ),
+    ),
+    "summary": (
+        db.load_only(
+            Answer.id,
+            Answer.user_uuid,
+            Answer.question_id,
+            Answer.question_text,
+            Answer.input_mode,
+            Answer.evaluation_scores,
+            Answer.challenge_response,
+            Answer.challenge_evaluation_scores,
+            Answer.xp_earned,
+            Answer.challenge_xp_earned,
+            Answer.created_at,
+            raiseload=True,
+        ),
+    ),
+    "list": (
+        db.undefer_group("feedback"),
+        db.defer(Answer.deep_analysis, raiseload=True),
+    ),
+    "full": (db.undefer_group("feedback"), db.undefer(Answer.deep_analysis)),
+}
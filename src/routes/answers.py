@@ -1,27 +1,31 @@
 import logging
 from datetime import UTC, datetime
-from difflib import SequenceMatcher
 
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, g, jsonify, request, session
 
 from config import get_settings
 from extensions import db, limiter
-from models import Answer, User
+from models import Answer
 from services.achievement_service import check_and_award_achievements
+from services.evaluation_jobs import (
+    enqueue_evaluation,
+    register_job_handler,
+    stream_evaluation,
+    wants_async,
+    wants_stream,
+)
 from services.evaluator import DummyEvaluator
 from services.level_service import get_level_for_xp, get_level_info, get_level_name
-from services.question_service import get_questions
+from services.question_service import find_question_by_id
+from services.quota_service import QuotaSnapshot, consume, refund
+from services.similarity_service import add_fingerprint, find_similar_answer
 from services.user_service import (
     get_session_user,
     load_session_user,
     persist_session_user,
 )
-from utils import (
-    get_daily_evaluation_count,
-    get_eval_limit,
-    get_monthly_eval_limit,
-    get_monthly_evaluation_count,
-)
+from services.xp_service import add_xp
+from utils import get_eval_limit, get_monthly_eval_limit
 
 logger = logging.getLogger(__name__)
 
@@ -33,9 +37,9 @@ SETTINGS = get_settings()
 
 def create_evaluator():
     if SETTINGS.USE_LLM_EVALUATOR:
+        from extensions import vertex_client
         from services.evaluator import LLMEvaluator
         from services.llm import (
-            CLIENT,
             RESPONSE_SCHEMA,
             SYSTEM_INSTRUCTION_DE,
             SYSTEM_INSTRUCTION_EN,
@@ -43,7 +47,7 @@ def create_evaluator():
 
         system_instructions = {"en": SYSTEM_INSTRUCTION_EN, "de": SYSTEM_INSTRUCTION_DE}
 
-        return LLMEvaluator(CLIENT, system_instructions, RESPONSE_SCHEMA)
+        return LLMEvaluator(vertex_client(), system_instructions, RESPONSE_SCHEMA)
     else:
         return DummyEvaluator()
 
@@ -58,12 +62,46 @@ def evaluate_answer(question_text, claim, argument, counterargument, input_mode=
     )
 
 
+def _monthly_limit_error(monthly_limit, tier):
+    en = session.get("language", SETTINGS.DEFAULT_LANGUAGE) == "en"
+    error_message = (
+        f"Monthly evaluation limit reached ({monthly_limit}). "
+        if en
+        else f"Monatliches Bewertungslimit erreicht ({monthly_limit}). "
+    )
+    if tier == "anonymous":
+        error_message += (
+            'Log in for higher limits <a href="/login" class="underline">here</a>.'
+            if en
+            else 'Für höhere Limits kannst du dich <a href="/login" class="underline">hier</a> anmelden.'
+        )
+    else:
+        error_message += (
+            'Upgrade your account for higher limits <a href="/subscription" class="underline">here</a>.'
+            if en
+            else 'Erhöhe dein Limit durch ein Upgrade deines Kontos <a href="/subscription" class="underline">hier</a>.'
+        )
+    return jsonify({"error": error_message}), 429
+
+
 @answers_bp.route("/submit_answer", methods=["POST"])
 @limiter.limit(
     SETTINGS.SUBMISSION_RATE_LIMITS,
     error_message="tooManySubmissions",
 )
 def submit_answer():
+    return handle_submit_answer()
+
+
+def handle_submit_answer(allow_async=True):
+    """Validate, evaluate and store an answer.
+
+    Split from the route so an async job can replay it without the rate limit
+    being charged twice; see services/evaluation_jobs.py.
+    """
+    # Whose monthly allowance paid for this evaluation, until the answer is
+    # stored; the error handler gives it back if anything fails before then.
+    charged_to = None
     try:
         data = request.get_json() or {}
         user_uuid = session.get("user_id")
@@ -117,13 +155,9 @@ def submit_answer():
             ):
                 question_text = "Does free will exist if all decisions are ultimately influenced by biological/physical factors?"
             else:
-                for questions in get_questions().values():
-                    for q in questions:
-                        if q["id"] == question_id:
-                            question_text = q["description"]
-                            break
-                    if question_text:
-                        break
+                question = find_question_by_id(question_id)
+                if question:
+                    question_text = question["description"]
 
         if not user_uuid:
             return jsonify({"error": "User not identified."}), 400
@@ -133,8 +167,11 @@ def submit_answer():
         # runs against a placeholder and a rejected submission writes nothing.
         user = get_session_user()
 
+        # Every counter in one read; see services/quota_service.py.
+        quota = QuotaSnapshot.load(user_uuid)
+
         # Check today's evaluation count (initial submission counts as one)
-        daily_count = get_daily_evaluation_count(user_uuid)
+        daily_count = quota.daily_evaluations
         eval_limit = get_eval_limit(user.tier)
 
         if daily_count >= eval_limit:
@@ -166,36 +203,11 @@ def submit_answer():
             return jsonify({"error": error_message}), 429
 
         # Check monthly evaluation count
-        monthly_count = get_monthly_evaluation_count(user_uuid)
+        monthly_count = quota.monthly_evaluations
         monthly_limit = get_monthly_eval_limit(user.tier)
 
         if monthly_count >= monthly_limit:
-            error_message = (
-                f"Monthly evaluation limit reached ({monthly_limit}). "
-                if session.get("language", SETTINGS.DEFAULT_LANGUAGE) == "en"
-                else f"Monatliches Bewertungslimit erreicht ({monthly_limit}). "
-            )
-            if user.tier == "anonymous":
-                error_message += (
-                    (
-                        'Log in for higher limits <a href="/login" class="underline">here</a>.'
-                    )
-                    if session.get("language", SETTINGS.DEFAULT_LANGUAGE) == "en"
-                    else (
-                        'Für höhere Limits kannst du dich <a href="/login" class="underline">hier</a> anmelden.'
-                    )
-                )
-            else:
-                error_message += (
-                    (
-                        'Upgrade your account for higher limits <a href="/subscription" class="underline">here</a>.'
-                    )
-                    if session.get("language", SETTINGS.DEFAULT_LANGUAGE) == "en"
-                    else (
-                        'Erhöhe dein Limit durch ein Upgrade deines Kontos <a href="/subscription" class="underline">hier</a>.'
-                    )
-                )
-            return jsonify({"error": error_message}), 429
+            return _monthly_limit_error(monthly_limit, user.tier)
 
         # Get mode from request payload
         input_mode = data.get("input_mode", "text")
@@ -209,6 +221,35 @@ def submit_answer():
             argument = voice_answer
             counterargument = None
 
+        # A resubmission of an answer the user already has is rejected before the
+        # model is called, not after it has been paid for. A lookup of a few
+        # fingerprint candidates, not a scan of the history; see
+        # services/similarity_service.py.
+        if find_similar_answer(user_uuid, claim, argument, counterargument):
+            return jsonify({"error": "similarAnswer"}), 409
+
+        # Everything that can reject the submission cheaply has run, so this is
+        # the point to hand the model call to a worker if the client asked.
+        if allow_async and wants_async():
+            queued = enqueue_evaluation("answer")
+            if queued is not None:
+                return queued
+        if allow_async and wants_stream():
+            streamed = stream_evaluation("answer")
+            if streamed is not None:
+                return streamed
+
+        # The check above is a read, so a request over the limit is answered
+        # before anything is queued. This is the enforcement: one atomic
+        # statement that takes an evaluation from this month's allowance, or
+        # refuses if a concurrent submission took the last one. It is given back
+        # if anything fails before the commit below -- the model call, creating
+        # the user row, the insert, the commit itself -- so only a stored
+        # evaluation is paid for.
+        if consume(user_uuid, "eval", monthly_limit) is None:
+            return _monthly_limit_error(monthly_limit, user.tier)
+        charged_to = user_uuid
+
         evaluator = create_evaluator()
         evaluation = evaluator.evaluate(
             question_text,
@@ -219,6 +260,8 @@ def submit_answer():
             voice_answer
             if input_mode == "voice"
             else None,  # Pass voice_answer to evaluator
+            # Set when this handler is replayed for a streamed submission.
+            on_field=g.get("on_evaluation_field"),
         )
 
         # Determine XP and overall rating for the main answer
@@ -242,40 +285,6 @@ def submit_answer():
         # Add relevance_too_low flag to response
         relevance_too_low = scores["Relevance"] < SETTINGS.RELEVANCE_THRESHOLD_FOR_XP
 
-        old_xp = user.xp
-
-        existing_answers = (
-            Answer.query.filter_by(user_uuid=user.uuid)
-            .order_by(Answer.created_at.desc(), Answer.id.desc())
-            .all()
-        )
-
-        for existing in existing_answers:
-            existing_counter = (existing.counterargument or "").strip()
-            new_counter = counterargument  # Already trimmed when parsing input
-
-            claim_similarity = SequenceMatcher(None, claim, existing.claim).ratio()
-            argument_similarity = SequenceMatcher(
-                None, argument, existing.argument
-            ).ratio()
-
-            if (
-                claim_similarity > SETTINGS.SIMILARITY_THRESHOLD
-                and argument_similarity > SETTINGS.SIMILARITY_THRESHOLD
-            ):
-                # Only consider the counterargument if both submissions have one.
-                if bool(new_counter) == bool(existing_counter):
-                    if new_counter:
-                        counter_similarity = SequenceMatcher(
-                            None, new_counter, existing_counter
-                        ).ratio()
-                        if counter_similarity > SETTINGS.SIMILARITY_THRESHOLD:
-                            return jsonify({"error": "similarAnswer"}), 409
-                    else:
-                        # Neither submission has a counterargument.
-                        return jsonify({"error": "similarAnswer"}), 409
-                # If one has a counterargument and the other doesn't, we treat them as different.
-
         # The submission is going to be stored, so this is the point where an
         # anonymous visitor becomes a real row. Everything from here on needs one:
         # answers, achievements and the XP total are all keyed on users.uuid.
@@ -298,6 +307,7 @@ def submit_answer():
             evaluation_scores=scores_dict,
             evaluation_feedback=feedback_dict,
             xp_earned=xp_earned,
+            relevance_rating=scores["Relevance"],
             challenge=evaluation.get("challenge"),
             challenge_evaluation_scores={},
             challenge_evaluation_feedback={},
@@ -305,22 +315,23 @@ def submit_answer():
             created_at=datetime.now(UTC),
         )
         db.session.add(new_answer)
-        db.session.commit()
-
-        # Recalculate the user's total XP from all of their answers.
-        user = User.query.filter_by(uuid=user_uuid).first()
-        total_xp = recalc_user_xp(user)
-        user.xp = total_xp
+        db.session.flush()
+        add_fingerprint(new_answer)
+        answer_id = new_answer.id
+
+        # The answer, its fingerprint, the XP total and any achievements go in
+        # one commit at the end. Each commit expires every loaded row, and the
+        # next read of the user (or of its achievements) is another round trip.
+
+        # xp_earned is already 0 below the relevance threshold, so it is
+        # exactly what this answer adds to the total.
+        total_xp = add_xp(user, xp_earned)
+        old_xp = total_xp - xp_earned
         session["xp"] = total_xp
 
-        # Increment monthly evaluation count
-        user.monthly_eval_count = (user.monthly_eval_count or 0) + 1
-        user.last_monthly_eval_reset = user.last_monthly_eval_reset or datetime.now(UTC)
-
-        db.session.commit()
-
         # Check and award any new achievements
         answer_data = {
+            "question_id": question_id,
             "input_mode": input_mode,
             "total_score": avg_all,
             "evaluation_scores": evaluation["scores"],
@@ -333,12 +344,13 @@ def submit_answer():
         # If an achievement was completed by this answer, store it in the Answer object
         if answer_data.get("completed_achievement"):
             new_answer.completed_achievement = answer_data["completed_achievement"]
-            db.session.commit()
 
         # Store all completed achievements
         if answer_data.get("completed_achievements"):
             new_answer.completed_achievements = answer_data["completed_achievements"]
-            db.session.commit()
+
+        db.session.commit()
+        charged_to = None
 
         old_level = get_level_name(old_xp)
         new_level = get_level_name(total_xp)
@@ -364,7 +376,7 @@ def submit_answer():
             "leveled_up": leveled_up,
             "level_info": level_info,
             "relevance_too_low": relevance_too_low,
-            "answer_id": new_answer.id,
+            "answer_id": answer_id,
             "current_level": level_info["display_name"],
         }
 
@@ -384,6 +396,8 @@ def submit_answer():
         return jsonify(response_data)
     except Exception as e:
         db.session.rollback()
+        if charged_to is not None:
+            refund(charged_to, "eval")
         return jsonify({"error": str(e)}), 500
     finally:
         db.session.remove()
@@ -395,6 +409,14 @@ def submit_answer():
     error_message="Too many submissions. Please wait before trying again.",
 )
 def submit_challenge_response():
+    return handle_challenge_response()
+
+
+def handle_challenge_response(allow_async=True):
+    """Evaluate and store a challenge response. Split out like handle_submit_answer."""
+    # As in handle_submit_answer: set while the evaluation is paid for but the
+    # response is not yet stored.
+    charged_to = None
     try:
         if not request.is_json:
             return jsonify({"error": "Content-Type must be application/json"}), 400
@@ -449,8 +471,11 @@ def submit_challenge_response():
         if user is None:
             return jsonify({"error": "User not identified."}), 400
 
+        # Every counter in one read; see services/quota_service.py.
+        quota = QuotaSnapshot.load(user_uuid)
+
         # Check today's evaluation count (initial submission counts as one)
-        daily_count = get_daily_evaluation_count(user_uuid)
+        daily_count = quota.daily_evaluations
         eval_limit = get_eval_limit(user.tier)
 
         if daily_count >= eval_limit:
@@ -482,36 +507,21 @@ def submit_challenge_response():
             return jsonify({"error": error_message}), 429
 
         # Check monthly evaluation count
-        monthly_count = get_monthly_evaluation_count(user_uuid)
+        monthly_count = quota.monthly_evaluations
         monthly_limit = get_monthly_eval_limit(user.tier)
 
         if monthly_count >= monthly_limit:
-            error_message = (
-                f"Monthly evaluation limit reached ({monthly_limit}). "
-                if session.get("language", SETTINGS.DEFAULT_LANGUAGE) == "en"
-                else f"Monatliches Bewertungslimit erreicht ({monthly_limit}). "
-            )
-            if user.tier == "anonymous":
-                error_message += (
-                    (
-                        'Log in for higher limits <a href="/login" class="underline">here</a>.'
-                    )
-                    if session.get("language", SETTINGS.DEFAULT_LANGUAGE) == "en"
-                    else (
-                        'Für höhere Limits kannst du dich <a href="/login" class="underline">hier</a> anmelden.'
-                    )
-                )
-            else:
-                error_message += (
-                    (
-                        'Upgrade your account for higher limits <a href="/subscription" class="underline">here</a>.'
-                    )
-                    if session.get("language", SETTINGS.DEFAULT_LANGUAGE) == "en"
-                    else (
-                        'Erhöhe dein Limit durch ein Upgrade deines Kontos <a href="/subscription" class="underline">hier</a>.'
-                    )
-                )
-            return jsonify({"error": error_message}), 429
+            return _monthly_limit_error(monthly_limit, user.tier)
+
+        if allow_async and wants_async():
+            queued = enqueue_evaluation("challenge")
+            if queued is not None:
+                return queued
+
+        # Enforced atomically here, as in handle_submit_answer.
+        if consume(user_uuid, "eval", monthly_limit) is None:
+            return _monthly_limit_error(monthly_limit, user.tier)
+        charged_to = user_uuid
 
         try:
             evaluator = create_evaluator()
@@ -523,6 +533,7 @@ def submit_challenge_response():
             )
         except Exception as eval_error:
             logger.error(f"Error during challenge evaluation: {str(eval_error)}")
+            refund(charged_to, "eval")
             return jsonify({"error": f"Evaluation error: {str(eval_error)}"}), 500
 
         scores = evaluation["scores"]
@@ -540,6 +551,7 @@ def submit_challenge_response():
             logger.debug(f"Average score calculated: {avg_all}")
         except Exception as avg_error:
             logger.error(f"Error calculating average score: {str(avg_error)}")
+            refund(charged_to, "eval")
             return jsonify({"error": f"Score calculation error: {str(avg_error)}"}), 500
 
         # Only award XP if the overall average meets the threshold.
@@ -561,21 +573,21 @@ def submit_challenge_response():
         feedback_with_overall["Overall"] = evaluation["overall_feedback"]
         answer.challenge_evaluation_feedback = feedback_with_overall
         answer.challenge_xp_earned = xp_gained
+        answer.challenge_relevance_rating = scores["Relevance"]
         answer.challenge_response_created_at = datetime.now(UTC)
 
         # Update user's XP
-        user.xp += xp_gained
-
-        # Increment monthly evaluation count
-        user.monthly_eval_count = (user.monthly_eval_count or 0) + 1
-        user.last_monthly_eval_reset = user.last_monthly_eval_reset or datetime.now(UTC)
+        total_xp = add_xp(user, xp_gained)
+        old_xp = total_xp - xp_gained
 
         db.session.commit()
+        charged_to = None
 
         # Check and award any new achievements
         try:
             logger.debug("Checking for achievements")
             challenge_answer_data = {
+                "question_id": answer.question_id,
                 "input_mode": input_mode,  # Use the input mode we defined above
                 "total_score": avg_all,  # Use the avg_all we calculated directly instead of trying to access it through scores
                 "evaluation_scores": evaluation["scores"],
@@ -598,26 +610,29 @@ def submit_challenge_response():
                     and answer.completed_achievement
                     not in answer.completed_achievements
                 ):
-                    answer.completed_achievements.append(answer.completed_achievement)
+                    # Reassigned rather than appended to: a JSON column does
+                    # not notice in-place changes.
+                    answer.completed_achievements = [
+                        *answer.completed_achievements,
+                        answer.completed_achievement,
+                    ]
 
                 # Set the new completed_achievement
                 answer.completed_achievement = challenge_answer_data[
                     "completed_achievement"
                 ]
-                db.session.commit()
 
             # Store all completed achievements
             if challenge_answer_data.get("completed_achievements"):
-                # Initialize completed_achievements if it doesn't exist
-                if not answer.completed_achievements:
-                    answer.completed_achievements = []
-
                 # Merge the achievements from the challenge with existing achievements
+                merged = list(answer.completed_achievements or [])
                 for achievement_id in challenge_answer_data["completed_achievements"]:
-                    if achievement_id not in answer.completed_achievements:
-                        answer.completed_achievements.append(achievement_id)
+                    if achievement_id not in merged:
+                        merged.append(achievement_id)
+                answer.completed_achievements = merged
 
-                db.session.commit()
+            # The awards, the stats update and the fields above in one commit.
+            db.session.commit()
 
         except Exception as achievement_error:
             logger.error(f"Error checking achievements: {str(achievement_error)}")
@@ -626,14 +641,12 @@ def submit_challenge_response():
             ), 500
 
         try:
-            leveled_up = get_level_name(
-                recalc_user_xp(user) - xp_gained
-            ) != get_level_name(user.xp)
-            level_info = get_level_info(user.xp)
+            leveled_up = get_level_name(old_xp) != get_level_name(total_xp)
+            level_info = get_level_info(total_xp)
 
             # Add previous level image if user leveled up
             if leveled_up:
-                previous_level = get_level_for_xp(recalc_user_xp(user) - xp_gained)
+                previous_level = get_level_for_xp(old_xp)
                 level_info["previous_level_image"] = previous_level.image_path
 
             logger.debug(f"Leveled up: {leveled_up}")
@@ -648,7 +661,7 @@ def submit_challenge_response():
                 response_data = {
                     "evaluation": eval_copy,
                     "challenge_xp_earned": xp_gained,
-                    "current_xp": user.xp,
+                    "current_xp": total_xp,
                     "current_level": level_info["display_name"],
                     "leveled_up": leveled_up,
                     "level_info": level_info,
@@ -685,33 +698,14 @@ def submit_challenge_response():
     except Exception as e:
         logger.error(f"Uncaught exception in challenge response: {str(e)}")
         db.session.rollback()
+        if charged_to is not None:
+            refund(charged_to, "eval")
         return jsonify({"error": str(e)}), 500
     finally:
         db.session.remove()
 
 
-def recalc_user_xp(user):
-    answers = (
-        Answer.query.filter_by(user_uuid=user.uuid)
-        .order_by(Answer.created_at.desc(), Answer.id.desc())
-        .all()
-    )
-    total_xp = 0
-
-    for answer in answers:
-        # Check main answer relevance
-        if (
-            answer.evaluation_scores.get("Relevance", 0)
-            >= SETTINGS.RELEVANCE_THRESHOLD_FOR_XP
-        ):
-            total_xp += answer.xp_earned
-
-        # Check challenge response relevance if it exists
-        if (
-            answer.challenge_response
-            and answer.challenge_evaluation_scores.get("Relevance", 0)
-            >= SETTINGS.RELEVANCE_THRESHOLD_FOR_XP
-        ):
-            total_xp += answer.challenge_xp_earned
-
-    return total_xp
+register_job_handler("answer", "/submit_answer", handle_submit_answer)
+register_job_handler(
+    "challenge", "/submit_challenge_response", handle_challenge_response
+)
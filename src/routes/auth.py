@@ -4,16 +4,23 @@ import uuid
 
 from flask import Blueprint, jsonify, request, session
 from flask_login import login_required, login_user, logout_user
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
 from sqlalchemy import or_, update
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from config import get_settings
 from extensions import login_manager
-from models import Answer, User, UserAchievement, db
+from lazy import LazyModule
+from models import ANSWER_PROFILES, Answer, User, UserAchievement, db
+from services.achievement_service import reset_user_stats
 from services.level_service import get_level_info
-from services.user_service import get_session_user
+from services.question_service import answered_question_ids
+from services.similarity_service import sync_fingerprint_owner
+from services.user_service import get_session_user, get_user
+from services.xp_service import add_xp, answers_xp
+
+# Only Google sign-in needs these, and google.auth is slow to import; see lazy.py.
+google_requests = LazyModule("google.auth.transport.requests")
+id_token = LazyModule("google.oauth2.id_token")
 
 logger = logging.getLogger(__name__)
 SETTINGS = get_settings()
@@ -23,7 +30,7 @@ auth_bp = Blueprint("auth", __name__)
 
 @login_manager.user_loader
 def load_user(user_uuid):
-    return User.query.get(user_uuid)
+    return get_user(user_uuid)
 
 
 @auth_bp.route("/signup", methods=["POST"])
@@ -63,7 +70,7 @@ def signup():
         # Merge anonymous user data if present.
         anonymous_user = None
         if "user_id" in session:
-            anonymous_user = User.query.filter_by(uuid=session["user_id"]).first()
+            anonymous_user = get_user(session["user_id"])
 
         # Create the new user with the provided username.
         user = User(
@@ -84,6 +91,7 @@ def signup():
                 .where(Answer.user_uuid == anonymous_user.uuid)
                 .values(user_uuid=user.uuid)
             )
+            sync_fingerprint_owner(user.uuid)
 
             # Transfer achievements using direct SQL update
             db.session.execute(
@@ -91,6 +99,11 @@ def signup():
                 .where(UserAchievement.user_uuid == anonymous_user.uuid)
                 .values(user_uuid=user.uuid)
             )
+            # get_user() loaded the anonymous row with its achievements. Drop
+            # that stale collection, or deleting the row below would null
+            # out the user_uuid of achievements that have just moved.
+            db.session.expire(anonymous_user, ["achievements"])
+            reset_user_stats(anonymous_user.uuid, user.uuid)
 
             db.session.delete(anonymous_user)
 
@@ -135,24 +148,22 @@ def login():
         try:
             # Start a transaction
             if "user_id" in session:
-                anonymous_user = User.query.filter_by(uuid=session["user_id"]).first()
+                anonymous_user = get_user(session["user_id"])
                 if anonymous_user:
                     # Get all answers from the anonymous user
-                    anonymous_answers = Answer.query.filter_by(
-                        user_uuid=anonymous_user.uuid
-                    ).all()
-
-                    # Get all question IDs for which the authenticated user already has answers
-                    existing_question_ids = set(
-                        answer.question_id
-                        for answer in Answer.query.filter_by(user_uuid=user.uuid).all()
-                        if answer.question_id is not None
+                    # Only the ids are read and user_uuid written, so none of
+                    # the text or feedback columns are loaded.
+                    anonymous_answers = (
+                        Answer.query.options(*ANSWER_PROFILES["xp"])
+                        .filter_by(user_uuid=anonymous_user.uuid)
+                        .all()
                     )
 
-                    # Transfer XP from anonymous user
-                    user.xp += anonymous_user.xp
+                    # Get all question IDs for which the authenticated user already has answers
+                    existing_question_ids = answered_question_ids(user.uuid)
 
                     # Transfer each answer individually, skipping those for questions the user already answered
+                    moved_ids = []
                     for answer in anonymous_answers:
                         # Skip if the authenticated user already has an answer for this question
                         if (
@@ -166,6 +177,12 @@ def login():
 
                         # Update the user_uuid for this answer
                         answer.user_uuid = user.uuid
+                        moved_ids.append(answer.id)
+
+                    # Only the XP of the answers that moved. The anonymous
+                    # total also counts the skipped ones, which are deleted
+                    # with the anonymous user below.
+                    add_xp(user, answers_xp(moved_ids))
 
                     # Transfer achievements using direct SQL update
                     db.session.execute(
@@ -173,12 +190,15 @@ def login():
                         .where(UserAchievement.user_uuid == anonymous_user.uuid)
                         .values(user_uuid=user.uuid)
                     )
+                    db.session.expire(anonymous_user, ["achievements"])
+                    reset_user_stats(anonymous_user.uuid, user.uuid)
 
                     # Mark the anonymous user for deletion
                     db.session.delete(anonymous_user)
 
                     # Flush to ensure the updates are processed before the commit
                     db.session.flush()
+                    sync_fingerprint_owner(user.uuid)
 
             if user.tier == "anonymous":
                 user.tier = "free"
@@ -254,7 +274,7 @@ def google_auth():
         # Check for an existing anonymous user in session.
         anonymous_user = None
         if "user_id" in session:
-            session_user = User.query.filter_by(uuid=session["user_id"]).first()
+            session_user = get_user(session["user_id"])
             if session_user and (not user or session_user.uuid != user.uuid):
                 anonymous_user = session_user
 
@@ -299,11 +319,14 @@ def google_auth():
                 .where(Answer.user_uuid == anonymous_user.uuid)
                 .values(user_uuid=user.uuid)
             )
+            sync_fingerprint_owner(user.uuid)
             db.session.execute(
                 update(UserAchievement)
                 .where(UserAchievement.user_uuid == anonymous_user.uuid)
                 .values(user_uuid=user.uuid)
             )
+            db.session.expire(anonymous_user, ["achievements"])
+            reset_user_stats(anonymous_user.uuid, user.uuid)
             db.session.delete(anonymous_user)
 
         new_pic = id_info.get("picture")
@@ -13,25 +13,119 @@ services/deep_analysis.py and DEEP_ANALYSIS_MODEL in config.py.
 
 Never automatic — it costs ~16x a normal evaluation, so it only ever runs on an
 explicit button press against an answer the caller already owns.
+
+The call takes ~45s, longer than gunicorn's 30s timeout, so it never runs on the
+request thread. POST /deep_analysis does every check, marks the answer
+"pending" and hands the call to a small per-process pool; the browser then polls
+GET /deep_analysis/<answer_id> until the status is "done" (with the analysis)
+or "failed". The pending mark is also what stops a double press from paying
+twice. The allowance is taken when the run is queued and given back unless
+the run stores its result: when the call fails, when storing it fails, and when
+the run goes stale, so only a stored result is paid for.
+
+A run is identified by the answer plus the `deep_analysis_requested_at` its
+claim wrote. Failing a run and storing its result are both conditional UPDATEs
+on that pair while the status is still "pending", so exactly one of them wins.
+The allowance is therefore given back once at most. A run that went stale and
+then finished anyway, after the user pressed again, cannot store its result
+over the new run, and cannot charge for it a second time.
 """
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime
 
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, current_app, jsonify, request, session, url_for
+from sqlalchemy import or_
 
 from config import get_settings
 from extensions import db
-from models import Answer
+from lifecycle import after_fork
+from models import ANSWER_PROFILES, Answer
 from services.deep_analysis import run_deep_analysis
+from services.quota_service import QuotaSnapshot, consume, refund
 from services.user_service import load_session_user
-from utils import get_monthly_deep_analysis_count, get_monthly_deep_analysis_limit
+from utils import get_monthly_deep_analysis_limit
 
 logger = logging.getLogger(__name__)
 deep_analysis_bp = Blueprint("deep_analysis", __name__)
 
 SETTINGS = get_settings()
 
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Lazily, for the same reason as in services/evaluation_jobs.py: threads
+    # started in the preloading gunicorn master do not survive the fork.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=SETTINGS.DEEP_ANALYSIS_WORKERS,
+                thread_name_prefix="deep-analysis",
+            )
+        return _executor
+
+
+@after_fork
+def _forget_executor():
+    global _executor
+    _executor = None
+
+
+def _this_run(answer_id, requested_at):
+    """Criteria matching the run claimed at `requested_at` while it is pending."""
+    return (
+        Answer.id == answer_id,
+        Answer.deep_analysis_status == "pending",
+        Answer.deep_analysis_requested_at == requested_at,
+    )
+
+
+def _release(answer_id, user_uuid, requested_at):
+    """Fail the run and give back its allowance, unless it already ended.
+
+    The status change and the refund commit together.
+    """
+    failed = Answer.query.filter(*_this_run(answer_id, requested_at)).update(
+        {Answer.deep_analysis_status: "failed"}, synchronize_session=False
+    )
+    if failed:
+        refund(user_uuid, "deep_analysis")
+    else:
+        db.session.commit()
+    return bool(failed)
+
+
+def _expire_if_stale(answer):
+    """Fail a run whose instance went away before it finished."""
+    if (
+        answer.deep_analysis_status != "pending"
+        or not answer.deep_analysis_requested_at
+    ):
+        return answer
+    requested_at = answer.deep_analysis_requested_at
+    if requested_at.tzinfo is None:
+        requested_at = requested_at.replace(tzinfo=UTC)
+    age = datetime.now(UTC) - requested_at
+    if age.total_seconds() >= SETTINGS.DEEP_ANALYSIS_STALE_AFTER_SECONDS:
+        logger.warning("Deep analysis for answer %s went stale", answer.id)
+        # Compared as loaded, so the criteria match the stored value exactly.
+        _release(answer.id, answer.user_uuid, answer.deep_analysis_requested_at)
+    return answer
+
+
+def _pending_response(answer_id):
+    status_url = url_for("deep_analysis.deep_analysis_status", answer_id=answer_id)
+    return (
+        jsonify({"status": "pending", "status_url": status_url}),
+        202,
+        {"Location": status_url},
+    )
+
 
 @deep_analysis_bp.route("/deep_analysis", methods=["POST"])
 def create_deep_analysis():
@@ -54,7 +148,9 @@ def create_deep_analysis():
             }
         ), 402
 
-    answer = Answer.query.filter_by(id=answer_id).first()
+    answer = (
+        Answer.query.options(*ANSWER_PROFILES["full"]).filter_by(id=answer_id).first()
+    )
     if not answer:
         return jsonify({"error": "Answer not found."}), 404
     # 404 rather than 403, matching submit_challenge_response: this must not
@@ -66,11 +162,43 @@ def create_deep_analysis():
     # Already run: return the stored result rather than paying for it twice.
     # Checked before the quota so revisiting an analysis never costs an allowance.
     if answer.deep_analysis:
-        return jsonify({"analysis": answer.deep_analysis, "cached": True})
+        return jsonify(
+            {"status": "done", "analysis": answer.deep_analysis, "cached": True}
+        )
+
+    # Pressed twice, or pressed again while the first run is in flight: report
+    # the run already under way rather than starting and paying for a second.
+    # The claim is a conditional UPDATE so two concurrent presses cannot both
+    # win it.
+    _expire_if_stale(answer)
+    requested_at = datetime.now(UTC)
+    claimed = Answer.query.filter(
+        Answer.id == answer_id,
+        or_(
+            Answer.deep_analysis_status.is_(None),
+            Answer.deep_analysis_status != "pending",
+        ),
+    ).update(
+        {
+            Answer.deep_analysis_status: "pending",
+            Answer.deep_analysis_requested_at: requested_at,
+        },
+        synchronize_session=False,
+    )
+    db.session.commit()
+    if not claimed:
+        return _pending_response(answer_id)
 
-    monthly_count = get_monthly_deep_analysis_count(user_uuid)
     monthly_limit = get_monthly_deep_analysis_limit(user.tier)
-    if monthly_count >= monthly_limit:
+    # The allowance is taken in one atomic statement (services/quota_service.py)
+    # rather than read here and incremented later, so two presses on different
+    # answers cannot both spend the last one. It is given back unless the run
+    # stores its analysis; see the module docstring.
+    if consume(user_uuid, "deep_analysis", monthly_limit) is None:
+        Answer.query.filter_by(id=answer_id).update(
+            {Answer.deep_analysis_status: None}, synchronize_session=False
+        )
+        db.session.commit()
         return jsonify(
             {
                 "error": (
@@ -83,35 +211,92 @@ def create_deep_analysis():
         ), 429
 
     language = session.get("language", SETTINGS.DEFAULT_LANGUAGE)
-    try:
-        analysis = run_deep_analysis(answer, language)
-    except Exception as e:
-        # Nothing is counted against the allowance for a failed call. The user
-        # gets a plain failure and can press the button again.
-        logger.error("Deep analysis failed for answer %s: %s", answer_id, e)
-        db.session.rollback()
-        return jsonify({"error": "Deep analysis failed. Please try again."}), 502
-
-    answer.deep_analysis = analysis
-    answer.deep_analysis_created_at = datetime.now(UTC)
-    user.monthly_deep_analysis_count = (user.monthly_deep_analysis_count or 0) + 1
-    user.last_monthly_deep_analysis_reset = (
-        user.last_monthly_deep_analysis_reset or datetime.now(UTC)
+    app = current_app._get_current_object()
+    _get_executor().submit(
+        _run_in_background, app, answer_id, user_uuid, language, requested_at
     )
-    db.session.commit()
+    logger.info("Queued deep analysis for user %s on answer %s", user_uuid, answer_id)
 
-    logger.info(
-        "Deep analysis %s/%s for user %s on answer %s",
-        user.monthly_deep_analysis_count,
-        monthly_limit,
-        user_uuid,
-        answer_id,
-    )
+    return _pending_response(answer_id)
 
-    return jsonify(
-        {
-            "analysis": analysis,
-            "cached": False,
-            "remaining": max(monthly_limit - user.monthly_deep_analysis_count, 0),
-        }
+
+@deep_analysis_bp.route("/deep_analysis/<answer_id>", methods=["GET"])
+def deep_analysis_status(answer_id):
+    user_uuid = session.get("user_id")
+    answer = (
+        Answer.query.options(*ANSWER_PROFILES["full"]).filter_by(id=answer_id).first()
     )
+    # Same 404 for missing and not-yours, as above.
+    if not user_uuid or not answer or answer.user_uuid != user_uuid:
+        return jsonify({"error": "Answer not found."}), 404
+
+    if answer.deep_analysis:
+        body = {"status": "done", "analysis": answer.deep_analysis, "cached": False}
+        user = load_session_user()
+        if user:
+            monthly_limit = get_monthly_deep_analysis_limit(user.tier)
+            used = QuotaSnapshot.load(user_uuid).monthly_deep_analyses
+            body["remaining"] = max(monthly_limit - used, 0)
+        return jsonify(body)
+
+    status = _expire_if_stale(answer).deep_analysis_status
+    if status == "pending":
+        return jsonify({"status": "pending"})
+    if status == "failed":
+        return jsonify(
+            {"status": "failed", "error": "Deep analysis failed. Please try again."}
+        )
+    return jsonify({"status": "none"})
+
+
+def _run_in_background(app, answer_id, user_uuid, language, requested_at):
+    with app.app_context():
+        try:
+            answer = (
+                Answer.query.options(*ANSWER_PROFILES["full"])
+                .filter(*_this_run(answer_id, requested_at))
+                .first()
+            )
+            if answer is None:
+                # Failed as stale while queued, and refunded then; or deleted
+                # along with its account, and the allowance with it.
+                return
+            try:
+                analysis = run_deep_analysis(answer, language)
+            except Exception:
+                # Nothing is counted against the allowance for a failed call. The
+                # user sees a plain failure and can press the button again.
+                logger.exception("Deep analysis failed for answer %s", answer_id)
+                db.session.rollback()
+                _release(answer_id, user_uuid, requested_at)
+                return
+
+            stored = Answer.query.filter(*_this_run(answer_id, requested_at)).update(
+                {
+                    Answer.deep_analysis: analysis,
+                    Answer.deep_analysis_created_at: datetime.now(UTC),
+                    Answer.deep_analysis_status: "done",
+                },
+                synchronize_session=False,
+            )
+            db.session.commit()
+
+            if stored:
+                logger.info(
+                    "Deep analysis stored for user %s on answer %s",
+                    user_uuid,
+                    answer_id,
+                )
+            else:
+                # Failed as stale, and refunded, while the call was running.
+                logger.warning(
+                    "Deep analysis for answer %s finished after it went stale; "
+                    "the result is discarded",
+                    answer_id,
+                )
+        except Exception:
+            logger.exception("Deep analysis for answer %s could not be run", answer_id)
+            db.session.rollback()
+            _release(answer_id, user_uuid, requested_at)
+        finally:
+            db.session.remove()
@@ -0,0 +1,79 @@
+"""Status of queued evaluations. See services/evaluation_jobs.py."""
+
+import json
+import logging
+import time
+
+from flask import Blueprint, Response, jsonify, session, stream_with_context
+
+from extensions import db
+from models import EvaluationJob
+from services.evaluation_jobs import STREAM_SECONDS, expire_if_stale
+
+logger = logging.getLogger(__name__)
+evaluation_jobs_bp = Blueprint("evaluation_jobs", __name__)
+
+# Streams are closed after STREAM_SECONDS (see services/evaluation_jobs.py),
+# and the browser's EventSource reconnects on its own after `retry`.
+_STREAM_POLL_SECONDS = 1
+
+
+def _owned_job(job_id):
+    """The job, if it belongs to this session. 404 otherwise, never 403."""
+    user_uuid = session.get("user_id")
+    job = db.session.get(EvaluationJob, job_id)
+    if not job or not user_uuid or job.user_uuid != user_uuid:
+        return None
+    return job
+
+
+@evaluation_jobs_bp.route("/evaluation_jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = _owned_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found."}), 404
+
+    job = expire_if_stale(job)
+    body = {"job_id": job.id, "kind": job.kind, "status": job.status}
+    if job.status in ("done", "failed"):
+        body["result"] = job.response_json
+        body["result_status"] = job.response_status
+        # The worker could not write these to the cookie; this request can.
+        for key, value in (job.session_updates or {}).items():
+            session[key] = value
+    return jsonify(body)
+
+
+@evaluation_jobs_bp.route("/evaluation_jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """Server-Sent Events alternative to polling job_status.
+
+    Emits a `status` event on every change and `done` once the job has
+    finished. The result itself is fetched from job_status afterwards, because
+    a streamed response cannot update the session cookie.
+    """
+    job = _owned_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found."}), 404
+
+    def events():
+        last_status = None
+        deadline = time.monotonic() + STREAM_SECONDS
+        yield f"retry: {_STREAM_POLL_SECONDS * 1000}\n\n"
+        while time.monotonic() < deadline:
+            db.session.expire_all()
+            current = expire_if_stale(db.session.get(EvaluationJob, job_id))
+            if current.status != last_status:
+                last_status = current.status
+                payload = json.dumps({"job_id": job_id, "status": current.status})
+                yield f"event: status\ndata: {payload}\n\n"
+            if current.status in ("done", "failed"):
+                yield f"event: done\ndata: {payload}\n\n"
+                return
+            time.sleep(_STREAM_POLL_SECONDS)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
@@ -7,19 +7,41 @@ a reason to keep.
 
 Deliberately one self-contained HTML file rather than PDF: no new dependency, no
 extra weight in a 1.2 GB image, and it prints to PDF from any browser.
+`?format=ndjson` gives the same answers as one JSON object per line instead,
+for anyone who wants their data rather than a document.
+
+Both are streamed: answers are read a batch at a time and written out as they
+are rendered. Loading every answer and rendering the whole file into one string
+first could take a worker with a long history past MEMORY_RESTART_THRESHOLD.
 """
 
+import json
 import logging
 from datetime import UTC, datetime
 
-from flask import Blueprint, Response, jsonify, render_template, session
+from flask import (
+    Blueprint,
+    Response,
+    jsonify,
+    request,
+    session,
+    stream_template,
+    stream_with_context,
+)
+from sqlalchemy import func, select
 
-from models import Answer
+from extensions import db
+from models import ANSWER_PROFILES, Answer
 from services.user_service import get_session_user
 
 logger = logging.getLogger(__name__)
 export_bp = Blueprint("export", __name__)
 
+# Rows per round trip to the database while streaming.
+_BATCH_SIZE = 100
+# Bytes of rendered HTML gathered before each write to the client.
+_CHUNK_SIZE = 16 * 1024
+
 DIMENSIONS = (
     "Logical Structure",
     "Clarity",
@@ -44,44 +66,109 @@ def export_answers():
             }
         ), 402
 
-    answers = (
-        Answer.query.filter_by(user_uuid=user_uuid)
-        .order_by(Answer.created_at.desc())
-        .all()
-    )
+    export_format = request.args.get("format", "html")
+    if export_format not in ("html", "ndjson"):
+        return jsonify({"error": "Unknown export format."}), 400
 
-    entries = []
-    for a in answers:
-        scores = a.evaluation_scores or {}
-        feedback = a.evaluation_feedback or {}
-        entries.append(
-            {
-                "answer": a,
-                "overall": scores.get("Overall"),
-                "overall_feedback": feedback.get("Overall"),
-                # Relevance is excluded here for the same reason it is excluded
-                # from the UI: it gates XP rather than grading the argument.
-                "dimensions": [
-                    (n, scores.get(n), feedback.get(n))
-                    for n in DIMENSIONS
-                    if scores.get(n) is not None
-                ],
-            }
+    stamp = datetime.now(UTC).strftime("%Y%m%d")
+    headers = {
+        "Content-Disposition": (
+            f'attachment; filename="argumentor-{stamp}.{export_format}"'
+        ),
+        # An export is per-user; never let a proxy or the browser reuse it.
+        "Cache-Control": "no-store, private",
+    }
+
+    if export_format == "ndjson":
+        rows = (_ndjson_line(a) for a in _answers(user_uuid, "full"))
+        return Response(
+            stream_with_context(rows),
+            mimetype="application/x-ndjson",
+            headers=headers,
         )
 
-    html = render_template(
+    count = db.session.scalar(
+        select(func.count(Answer.id)).where(Answer.user_uuid == user_uuid)
+    )
+    chunks = stream_template(
         "export.html",
         user=user,
-        entries=entries,
+        count=count,
+        entries=(_entry(a) for a in _answers(user_uuid, "list")),
         generated_at=datetime.now(UTC).strftime("%Y-%m-%d"),
     )
-    stamp = datetime.now(UTC).strftime("%Y%m%d")
-    return Response(
-        html,
-        mimetype="text/html",
-        headers={
-            "Content-Disposition": f'attachment; filename="argumentor-{stamp}.html"',
-            # An export is per-user; never let a proxy or the browser reuse it.
-            "Cache-Control": "no-store, private",
-        },
+    return Response(_buffered(chunks), mimetype="text/html", headers=headers)
+
+
+def _answers(user_uuid, profile):
+    """The user's answers, newest first, fetched a batch at a time.
+
+    yield_per streams from a server-side cursor on Postgres, so only one batch
+    of rows is in memory however long the history is; rendered answers are
+    dropped as the template moves on.
+    """
+    return db.session.scalars(
+        select(Answer)
+        .options(*ANSWER_PROFILES[profile])
+        .where(Answer.user_uuid == user_uuid)
+        .order_by(Answer.created_at.desc(), Answer.id.desc())
+        .execution_options(yield_per=_BATCH_SIZE)
     )
+
+
+def _entry(a):
+    scores = a.evaluation_scores or {}
+    feedback = a.evaluation_feedback or {}
+    return {
+        "answer": a,
+        "overall": scores.get("Overall"),
+        "overall_feedback": feedback.get("Overall"),
+        # Relevance is excluded here for the same reason it is excluded
+        # from the UI: it gates XP rather than grading the argument.
+        "dimensions": [
+            (n, scores.get(n), feedback.get(n))
+            for n in DIMENSIONS
+            if scores.get(n) is not None
+        ],
+    }
+
+
+def _ndjson_line(a):
+    return (
+        json.dumps(
+            {
+                "id": a.id,
+                "question_id": a.question_id,
+                "question_text": a.question_text,
+                "created_at": a.created_at.isoformat() if a.created_at else None,
+                "input_mode": a.input_mode,
+                "claim": a.claim,
+                "argument": a.argument,
+                "counterargument": a.counterargument,
+                "evaluation_scores": a.evaluation_scores,
+                "evaluation_feedback": a.evaluation_feedback,
+                "xp_earned": a.xp_earned,
+                "challenge": a.challenge,
+                "challenge_response": a.challenge_response,
+                "challenge_evaluation_scores": a.challenge_evaluation_scores,
+                "challenge_evaluation_feedback": a.challenge_evaluation_feedback,
+                "challenge_xp_earned": a.challenge_xp_earned,
+                "deep_analysis": a.deep_analysis,
+            },
+            ensure_ascii=False,
+        )
+        + "\n"
+    )
+
+
+def _buffered(chunks, size=_CHUNK_SIZE):
+    """Join the template's many small pieces into chunks worth a write each."""
+    pending, length = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(pending)
+            pending, length = [], 0
+    if pending:
+        yield "".join(pending)
@@ -0,0 +1,67 @@
+"""The answer history as JSON, for the profile page and anything else.
+
+`/api/history` returns compact summary rows a keyset page at a time (see
+services/history_service.py); `/api/history/<answer_id>` returns one answer in
+full, feedback included, for when an entry is expanded. Feedback is most of an
+answer's size and is read for the few entries someone opens. It is no longer
+shipped with every page for all of them.
+"""
+
+import logging
+
+from flask import Blueprint, jsonify, request, session
+
+from models import ANSWER_PROFILES, Answer
+from services.history_service import (
+    MAX_PAGE_SIZE,
+    PAGE_SIZE,
+    InvalidCursor,
+    detail_row,
+    history_cap,
+    history_page,
+    summary_row,
+)
+from services.user_service import get_session_user
+
+logger = logging.getLogger(__name__)
+history_bp = Blueprint("history", __name__)
+
+
+@history_bp.route("/api/history", methods=["GET"])
+def history():
+    user_uuid = session.get("user_id")
+    if not user_uuid:
+        return jsonify({"error": "User not identified."}), 400
+
+    size = request.args.get("limit", PAGE_SIZE, type=int)
+    size = max(1, min(size, MAX_PAGE_SIZE))
+    try:
+        page = history_page(
+            user_uuid,
+            request.args.get("cursor"),
+            size=size,
+            cap=history_cap(get_session_user().tier),
+        )
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor."}), 400
+
+    return jsonify(
+        {
+            "answers": [summary_row(answer) for answer in page.answers],
+            "position": page.position,
+            "next_cursor": page.older,
+            "prev_cursor": page.newer,
+        }
+    )
+
+
+@history_bp.route("/api/history/<answer_id>", methods=["GET"])
+def history_entry(answer_id):
+    user_uuid = session.get("user_id")
+    answer = (
+        Answer.query.options(*ANSWER_PROFILES["list"]).filter_by(id=answer_id).first()
+    )
+    # 404 for missing and not-yours alike, as in routes/deep_analysis.py.
+    if not user_uuid or not answer or answer.user_uuid != user_uuid:
+        return jsonify({"error": "Answer not found."}), 404
+    return jsonify(detail_row(answer))
@@ -1,10 +1,7 @@
 import hmac
-import json
 import logging
-import os
 from datetime import UTC, datetime, timedelta
 
-import stripe
 from flask import (
     Blueprint,
     current_app,
@@ -17,34 +14,43 @@ from flask import (
 )
 from flask_login import current_user
 from flask_mail import Message
+from sqlalchemy import func, select
 
 from config import get_settings
 from constants.achievements import ACHIEVEMENTS
 from constants.levels import Level
 from extensions import db, limiter
+from lazy import LazyModule
 from models import Answer, Feedback, User, Visit
 from routes.password_reset import mail
-from services.achievement_service import get_question_category
+from services.history_service import (
+    InvalidCursor,
+    category_for,
+    history_cap,
+    history_page,
+    summary_row,
+)
 from services.level_service import get_level_info
-from services.question_service import load_questions
+from services.quota_service import QuotaSnapshot
+from services.static_pages import content_page, content_page_response
+from services.translation_service import get_translations
 from services.user_service import (
     get_session_user,
+    get_user,
     load_session_user,
     persist_session_user,
 )
 from utils import (
-    get_daily_evaluation_count,
-    get_daily_voice_count,
     get_eval_limit,
-    get_monthly_deep_analysis_count,
     get_monthly_deep_analysis_limit,
     get_monthly_eval_limit,
-    get_monthly_evaluation_count,
-    get_monthly_voice_count,
     get_monthly_voice_limit,
     get_voice_limit,
 )
 
+# Only the subscription routes need stripe, which is slow to import; see lazy.py.
+stripe = LazyModule("stripe")
+
 pages_bp = Blueprint("pages", __name__)
 
 SETTINGS = get_settings()
@@ -105,22 +111,20 @@ def home(lang=None):
     user = get_session_user()
 
     level_info = get_level_info(user.xp)
-    daily_eval_count = get_daily_evaluation_count(user.uuid)
+    quota = QuotaSnapshot.load(user.uuid)
+    daily_eval_count = quota.daily_evaluations
     eval_limit = get_eval_limit(user.tier)
-    daily_voice_count = get_daily_voice_count(user.uuid)
+    daily_voice_count = quota.daily_voice
     voice_limit = get_voice_limit(user.tier)
 
     # Get monthly counts and limits
-    monthly_eval_count = get_monthly_evaluation_count(user.uuid)
+    monthly_eval_count = quota.monthly_evaluations
     monthly_eval_limit = get_monthly_eval_limit(user.tier)
-    monthly_voice_count = get_monthly_voice_count(user.uuid)
+    monthly_voice_count = quota.monthly_voice
     monthly_voice_limit = get_monthly_voice_limit(user.tier)
 
     # Only the limit, not the count: the template no longer shows how many are
-    # left, so reading the count here would be a query -- and, on the first
-    # request of a new month, a write -- for nothing. /deep_analysis reads it
-    # when it actually needs it. The limit is passed so the JS can say "N of M
-    # left" after a run.
+    # left. The limit is passed so the JS can say "N of M left" after a run.
     monthly_deep_analysis_limit = get_monthly_deep_analysis_limit(user.tier)
 
     # Get all achievements and user's earned achievements
@@ -156,24 +160,26 @@ def home(lang=None):
     )
 
 
-@pages_bp.route("/<lang>/how_it_works")
-@pages_bp.route("/how_it_works")
-def how_it_works(lang=None):
-    if lang:
-        if lang not in ["en", "de"]:
-            return redirect(url_for("pages.how_it_works"))
-        session["language"] = lang
-        if current_user.is_authenticated:
-            current_user.preferred_language = lang
-            db.session.commit()
+def _remember_language(lang):
+    """Apply a /<lang>/ URL prefix: the session's language, and the user's."""
+    session["language"] = lang
+    if current_user.is_authenticated:
+        current_user.preferred_language = lang
+        db.session.commit()
 
-    # First check for the query parameter; if not present, use the session language (default to "en")
-    lang = session.get("language", "en")
-    trans_file = os.path.join(
-        current_app.root_path, "static", "translations", f"{lang}.json"
-    )
-    with open(trans_file, "r", encoding="utf-8") as f:
-        translations = json.load(f)
+
+def _translations(lang):
+    return get_translations(lang).data
+
+
+# The content pages below are rendered once per language when the app starts
+# (services/static_pages.py). The builders run then, not per request; the views
+# only apply a language prefix and pick the bytes.
+
+
+@content_page("pages.how_it_works", "/how_it_works")
+def _how_it_works_page(lang):
+    translations = _translations(lang)
 
     # Get the evaluation criteria from the translation file
     criteria = translations.get("evaluationCriteria", {})
@@ -200,33 +206,16 @@ def how_it_works(lang=None):
             "Creativity": translations["evaluation"]["scores"]["creativity"],
         }
 
-    return render_template(
-        "how_it_works.html",
-        criteria=criteria,
-        dimension_mapping=dimension_mapping,
-        translations=translations,
-    )
-
+    return "how_it_works.html", {
+        "criteria": criteria,
+        "dimension_mapping": dimension_mapping,
+        "translations": translations,
+    }
 
-@pages_bp.route("/<lang>/how_to_improve")
-@pages_bp.route("/how_to_improve")
-def how_to_improve(lang=None):
-    if lang:
-        if lang not in ["en", "de"]:
-            return redirect(url_for("pages.how_to_improve"))
-        session["language"] = lang
-        if current_user.is_authenticated:
-            current_user.preferred_language = lang
-            db.session.commit()
-
-    # Get language from session (default to "en")
-    lang = session.get("language", "en")
-    trans_file = os.path.join(
-        current_app.root_path, "static", "translations", f"{lang}.json"
-    )
 
-    with open(trans_file, "r", encoding="utf-8") as f:
-        translations = json.load(f)
+@content_page("pages.how_to_improve", "/how_to_improve")
+def _how_to_improve_page(lang):
+    translations = _translations(lang)
 
     # Get the page content from translations
     page_content = translations.get("howToImprovePage", {})
@@ -234,44 +223,66 @@ def how_to_improve(lang=None):
     # Ensure the translations are properly loaded
     if not page_content:
         # Fallback to English if the current language doesn't have the content
-        fallback_file = os.path.join(
-            current_app.root_path, "static", "translations", "en.json"
-        )
-        with open(fallback_file, "r", encoding="utf-8") as f:
-            fallback_translations = json.load(f)
-            page_content = fallback_translations.get("howToImprovePage", {})
+        page_content = _translations("en").get("howToImprovePage", {})
 
-    return render_template(
-        "how_to_improve.html", page_content=page_content, translations=translations
-    )
+    return "how_to_improve.html", {
+        "page_content": page_content,
+        "translations": translations,
+    }
 
 
-@pages_bp.route("/<lang>/support")
-@pages_bp.route("/support")
-def support(lang=None):
+@content_page("pages.support", "/support")
+def _support_page(lang):
+    translations = _translations(lang)
+    return "support.html", {
+        "page_content": translations.get("supportPage", {}),
+        "translations": translations,
+    }
+
+
+@content_page("pages.privacy", "/privacy")
+def _privacy_page(lang):
+    return "privacy.html", {}
+
+
+@content_page("pages.terms", "/terms")
+def _terms_page(lang):
+    return "terms.html", {}
+
+
+@content_page("pages.contact", "/contact")
+def _contact_page(lang):
+    return "contact.html", {}
+
+
+@pages_bp.route("/<lang>/how_it_works")
+@pages_bp.route("/how_it_works")
+def how_it_works(lang=None):
     if lang:
         if lang not in ["en", "de"]:
-            return redirect(url_for("pages.support"))
-        session["language"] = lang
-        if current_user.is_authenticated:
-            current_user.preferred_language = lang
-            db.session.commit()
+            return redirect(url_for("pages.how_it_works"))
+        _remember_language(lang)
+    return content_page_response("pages.how_it_works")
 
-    # Get language from session (default to "en")
-    lang = session.get("language", "en")
-    trans_file = os.path.join(
-        current_app.root_path, "static", "translations", f"{lang}.json"
-    )
 
-    with open(trans_file, "r", encoding="utf-8") as f:
-        translations = json.load(f)
+@pages_bp.route("/<lang>/how_to_improve")
+@pages_bp.route("/how_to_improve")
+def how_to_improve(lang=None):
+    if lang:
+        if lang not in ["en", "de"]:
+            return redirect(url_for("pages.how_to_improve"))
+        _remember_language(lang)
+    return content_page_response("pages.how_to_improve")
 
-    # Get the page content from translations
-    page_content = translations.get("supportPage", {})
 
-    return render_template(
-        "support.html", page_content=page_content, translations=translations
-    )
+@pages_bp.route("/<lang>/support")
+@pages_bp.route("/support")
+def support(lang=None):
+    if lang:
+        if lang not in ["en", "de"]:
+            return redirect(url_for("pages.support"))
+        _remember_language(lang)
+    return content_page_response("pages.support")
 
 
 @pages_bp.route("/profile")
@@ -285,20 +296,21 @@ def profile():
 
     # Get language from query parameter or session (default to "en")
     level_info = get_level_info(user.xp)
-    daily_eval_count = get_daily_evaluation_count(user.uuid)
+    quota = QuotaSnapshot.load(user.uuid)
+    daily_eval_count = quota.daily_evaluations
     eval_limit = get_eval_limit(user.tier)
-    daily_voice_count = get_daily_voice_count(user.uuid)
+    daily_voice_count = quota.daily_voice
     voice_limit = get_voice_limit(user.tier)
 
     # Get monthly counts and limits
-    monthly_eval_count = get_monthly_evaluation_count(user.uuid)
+    monthly_eval_count = quota.monthly_evaluations
     monthly_eval_limit = get_monthly_eval_limit(user.tier)
-    monthly_voice_count = get_monthly_voice_count(user.uuid)
+    monthly_voice_count = quota.monthly_voice
     monthly_voice_limit = get_monthly_voice_limit(user.tier)
     # Unlike the home page, reading the count here is the point: this section is
     # the only place a subscriber can see what is left before spending 45s on a
     # call that may be refused.
-    monthly_deep_analysis_count = get_monthly_deep_analysis_count(user.uuid)
+    monthly_deep_analysis_count = quota.monthly_deep_analyses
     monthly_deep_analysis_limit = get_monthly_deep_analysis_limit(user.tier)
 
     # Get all achievements and user's earned achievements
@@ -307,50 +319,38 @@ def profile():
         achievement.achievement_id for achievement in user.achievements
     ]
 
-    # Pagination parameters
-    page = request.args.get("page", 1, type=int)
-    per_page = 10  # Show 10 answers per page
-
-    # Query answers sorted by created_at descending and then by id descending to break ties
-    answers_query = Answer.query.filter_by(user_uuid=user.uuid).order_by(
-        Answer.created_at.desc(), Answer.id.desc()
-    )
-
-    # Total the user actually has, before any tier cap.
-    total_answers_all_time = answers_query.count()
+    # History, a keyset page at a time (services/history_service.py): a deep
+    # page costs what the first does, and nothing is counted to get there.
+    history_limit = history_cap(user.tier)
+    try:
+        page = history_page(
+            user.uuid, request.args.get("cursor"), cap=history_limit, profile="list"
+        )
+    except InvalidCursor:
+        page = history_page(user.uuid, cap=history_limit, profile="list")
 
     # Free tiers see only their most recent answers. Reported explicitly rather
     # than silently truncated, so a short history reads as a limit rather than as
-    # lost data or a broken chart.
-    history_limit = SETTINGS.TIER_HISTORY_LIMITS.get(
-        user.tier, SETTINGS.TIER_HISTORY_LIMITS["free"]
-    )
-    history_capped = (
-        history_limit is not None and total_answers_all_time > history_limit
-    )
-    total_answers = (
-        min(total_answers_all_time, history_limit)
-        if history_limit is not None
-        else total_answers_all_time
-    )
-    total_pages = (total_answers + per_page - 1) // per_page  # Ceiling division
-
-    # Apply pagination, never reaching past the tier's window.
-    offset = (page - 1) * per_page
-    page_size = per_page
+    # lost data or a broken chart. Only a capped tier is counted, and only to say
+    # how much the cap hides.
+    total_answers_all_time = None
+    total_answers = None
+    history_capped = False
     if history_limit is not None:
-        page_size = max(0, min(per_page, history_limit - offset))
-    answers = answers_query.limit(page_size).offset(offset).all() if page_size else []
+        total_answers_all_time = db.session.scalar(
+            select(func.count(Answer.id)).where(Answer.user_uuid == user.uuid)
+        )
+        history_capped = total_answers_all_time > history_limit
+        total_answers = min(total_answers_all_time, history_limit)
 
+    # The per-dimension feedback is left out and fetched from /api/history when
+    # an entry is expanded; the chart reads the compact summary rows.
     answers_dict = []
-    for answer in answers:
-        answer_data = answer.to_dict()
-        # Add the category to each answer
-        if answer.question_id and answer.question_id.startswith("custom_"):
-            answer_data["category"] = "Custom"
-        elif not answer_data.get("category"):
-            answer_data["category"] = get_question_category(answer.question_id)
+    for answer in page.answers:
+        answer_data = answer.to_dict(deep_analysis=False)
+        answer_data["category"] = category_for(answer)
         answers_dict.append(answer_data)
+    chart_rows = [summary_row(answer) for answer in page.answers]
 
     # Pre-compute level status flags
     levels_with_status = []
@@ -374,7 +374,8 @@ def profile():
         xp=user.xp,
         level_info=level_info,
         user=user,
-        answers_json=answers_dict,
+        answers=answers_dict,
+        answers_json=chart_rows,
         daily_eval_count=daily_eval_count,
         eval_limit=eval_limit,
         daily_voice_count=daily_voice_count,
@@ -388,8 +389,9 @@ def profile():
         all_achievements=all_achievements,
         earned_achievements=earned_achievements,
         levels=levels_with_status,
-        current_page=page,
-        total_pages=total_pages,
+        history_position=page.position,
+        older_cursor=page.older,
+        newer_cursor=page.newer,
         total_answers=total_answers,
         history_capped=history_capped,
         history_limit=history_limit,
@@ -594,7 +596,7 @@ def subscription_success():
         plan = checkout_session.metadata.get("plan")
 
         # Update the user's tier
-        user = User.query.filter_by(uuid=user_uuid).first()
+        user = get_user(user_uuid)
         if user and plan in ["plus", "pro"]:
             user.tier = plan
 
@@ -729,7 +731,7 @@ def stripe_webhook():
         user_uuid = subscription.metadata.get("user_uuid")
 
         if user_uuid:
-            user = User.query.filter_by(uuid=user_uuid).first()
+            user = get_user(user_uuid)
             if user:
                 # Update user tier based on subscription status
                 if subscription["status"] == "active":
@@ -790,7 +792,7 @@ def stripe_webhook():
         user_uuid = subscription.metadata.get("user_uuid")
 
         if user_uuid:
-            user = User.query.filter_by(uuid=user_uuid).first()
+            user = get_user(user_uuid)
             if user:
                 # Only update tier to free if the subscription end date has passed
                 current_time = datetime.now(UTC)
@@ -898,7 +900,6 @@ def set_language():
         # Only set is_first_time_visit in the session if it's explicitly True
         if is_first_time_visit is True:
             session["is_first_time_visit"] = True
-        load_questions()
         # If logged in, persist language preference in the user's account.
         if current_user.is_authenticated:
             current_user.preferred_language = language
@@ -910,17 +911,17 @@ def set_language():
 
 @pages_bp.route("/privacy")
 def privacy():
-    return render_template("privacy.html")
+    return content_page_response("pages.privacy")
 
 
 @pages_bp.route("/terms")
 def terms():
-    return render_template("terms.html")
+    return content_page_response("pages.terms")
 
 
 @pages_bp.route("/contact")
 def contact():
-    return render_template("contact.html")
+    return content_page_response("pages.contact")
 
 
 def maintenance_key_ok():
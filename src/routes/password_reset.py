@@ -1,18 +1,17 @@
-import json
 import logging
 import secrets
 import sys
 import traceback
 from datetime import UTC, datetime, timedelta
-from pathlib import Path
 
-from flask import Blueprint, current_app, jsonify, render_template, request, session
+from flask import Blueprint, jsonify, render_template, request, session
 from flask_login import login_user
 from flask_mail import Mail, Message
 from werkzeug.security import generate_password_hash
 
 from config import get_settings
 from models import User, db
+from services.translation_service import get_translations
 
 password_reset_bp = Blueprint("password_reset", __name__)
 SETTINGS = get_settings()
@@ -62,11 +61,7 @@ def request_reset():
 
     # Load translations
     try:
-        translations_path = (
-            Path(current_app.root_path) / "static" / "translations" / f"{language}.json"
-        )
-        with open(translations_path, "r", encoding="utf-8") as f:
-            translations = json.load(f)
+        translations = get_translations(language).data
 
         email_subject = (
             translations.get("resetPassword", {})
@@ -220,14 +215,7 @@ def reset_password_page():
 
         # Load translations
         try:
-            translations_path = (
-                Path(current_app.root_path)
-                / "static"
-                / "translations"
-                / f"{language}.json"
-            )
-            with open(translations_path, "r", encoding="utf-8") as f:
-                translations = json.load(f)
+            translations = get_translations(language).data
 
             error_message = (
                 translations.get("resetPassword", {})
@@ -251,14 +239,7 @@ def reset_password_page():
 
         # Load translations
         try:
-            translations_path = (
-                Path(current_app.root_path)
-                / "static"
-                / "translations"
-                / f"{language}.json"
-            )
-            with open(translations_path, "r", encoding="utf-8") as f:
-                translations = json.load(f)
+            translations = get_translations(language).data
 
             error_message = (
                 translations.get("resetPassword", {})
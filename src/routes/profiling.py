@@ -0,0 +1,37 @@
+"""The allocation profiler's report; see alloc_profiler.py."""
+
+from flask import Blueprint, jsonify, request
+
+from alloc_profiler import get_profiler
+from routes.pages import maintenance_key_ok
+
+profiling_bp = Blueprint("profiling", __name__)
+
+
+@profiling_bp.route("/profiling/allocations", methods=["GET", "POST"])
+def allocations():
+    """Top allocation growers in the worker that answers.
+
+    `limit` caps each list (default 20). GET only reads. A POST returns the
+    same report and then starts a fresh measurement: `reset=1` clears the
+    per-request totals, and `rebaseline=1` makes the heap as it is now the
+    baseline for the next comparison. They change state, so a link preview or
+    a crawler following a GET cannot trigger them.
+    """
+    if not maintenance_key_ok():
+        return jsonify({"error": "Unauthorized"}), 401
+    profiler = get_profiler()
+    if profiler is None:
+        return jsonify({"error": "Allocation profiling is off"}), 404
+
+    limit = request.args.get("limit", 20, type=int)
+    report = profiler.report(limit=max(1, min(limit, 200)))
+    if request.method == "POST":
+        if request.args.get("reset") == "1":
+            profiler.reset()
+        if request.args.get("rebaseline") == "1":
+            # Tracing starts on the first profiled request. Until then there is
+            # nothing to snapshot, and take_snapshot() raises.
+            profiler.ensure_tracing()
+            profiler.rebaseline()
+    return jsonify(report)
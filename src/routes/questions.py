@@ -1,12 +1,14 @@
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, Response, jsonify, request, session
 
 from errors import json_error
 from services.user_service import get_session_user
 from services.question_service import (
     find_question_by_id,
-    get_all_questions,
+    get_catalog,
     get_fixed_question,
     get_random_question,
+    has_seen_questions,
+    mark_question_seen,
 )
 
 questions_bp = Blueprint("questions", __name__)
@@ -14,11 +16,11 @@ questions_bp = Blueprint("questions", __name__)
 
 @questions_bp.route("/get_question", methods=["GET"])
 def handle_get_question():
-    if not session.get("seen_question_ids"):
+    if not has_seen_questions():
         fixed_question = get_fixed_question()
         if fixed_question is None:
             return json_error("No fixed question available", 404)
-        session.setdefault("seen_question_ids", []).append(fixed_question["id"])
+        mark_question_seen(fixed_question["id"])
         return jsonify(fixed_question)
 
     categories = (
@@ -32,7 +34,9 @@ def handle_get_question():
 
 @questions_bp.route("/get_all_questions", methods=["GET"])
 def handle_get_all_questions():
-    return jsonify(get_all_questions())
+    # Serialized once per catalog build, not once per request.
+    catalog = get_catalog(session.get("language"))
+    return Response(catalog.all_questions_json, mimetype="application/json")
 
 
 @questions_bp.route("/select_question", methods=["POST"])
@@ -48,7 +52,7 @@ def handle_select_question():
     if not question:
         return json_error("Question not found", 404)
 
-    session.setdefault("seen_question_ids", []).append(question["id"])
+    mark_question_seen(question["id"])
     return jsonify(question)
 
 
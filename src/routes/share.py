@@ -4,18 +4,56 @@ Unlisted, not public: the pages carry noindex/nofollow and are reachable only
 by the signed link. That was a deliberate v1 choice -- the growth benefit comes
 from people passing links around, and it needs no consent flow because nothing
 is published or indexed.
+
+The pages are cacheable all the same. Each carries an ETag built from the
+columns that can still change, so a repeat view is answered 304 from one narrow
+SELECT, and a render is reused from a small in-process cache. Cache-Control
+lets Cloudflare serve repeat views from the edge. That is only safe because
+nothing on the page depends on the viewer's session: the page language comes
+from the link (`?lang=de`), which is part of the edge's cache key, where a
+session cookie is not.
 """
 
+import hashlib
 import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import UTC
 
-from flask import Blueprint, abort, jsonify, render_template, request, session
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    jsonify,
+    render_template,
+    request,
+    session,
+)
+from sqlalchemy import select
 
-from models import Answer
+from config import get_settings
+from extensions import db
+from models import ANSWER_PROFILES, Answer
 from services.share_service import make_share_token, verify_share_token
 
 logger = logging.getLogger(__name__)
 share_bp = Blueprint("share", __name__)
 
+SETTINGS = get_settings()
+
+_BROWSER_MAX_AGE = 300
+_EDGE_MAX_AGE = 3600
+
+_TEMPLATE_MTIME = os.stat(
+    os.path.join(os.path.dirname(__file__), "..", "templates", "share.html")
+).st_mtime_ns
+
+# Rendered pages by ETag, least recently viewed dropped first. A link that
+# goes viral is rendered once per worker and version, not once per view.
+_pages = OrderedDict()
+_pages_lock = threading.Lock()
+
 
 @share_bp.route("/create_share_link", methods=["POST"])
 def create_share_link():
@@ -28,7 +66,11 @@ def create_share_link():
     if not answer_id:
         return jsonify({"error": "answer_id is required."}), 400
 
-    answer = Answer.query.filter_by(id=answer_id).first()
+    answer = (
+        Answer.query.options(*ANSWER_PROFILES["summary"])
+        .filter_by(id=answer_id)
+        .first()
+    )
     if not answer:
         return jsonify({"error": "Answer not found."}), 404
     # Only the author may create a link, otherwise knowing an answer id would be
@@ -38,28 +80,90 @@ def create_share_link():
         return jsonify({"error": "Not your answer."}), 403
 
     token = make_share_token(answer_id)
-    return jsonify(
-        {
-            "token": token,
-            "url": f"https://www.argumentorai.com/share/{token}",
-        }
+    url = f"https://www.argumentorai.com/share/{token}"
+    # The link carries the author's language, so whoever opens it sees the page
+    # the author saw, whatever their own session says.
+    lang = session.get("language", SETTINGS.DEFAULT_LANGUAGE)
+    if lang != SETTINGS.DEFAULT_LANGUAGE and lang in SETTINGS.SUPPORTED_LANGUAGES:
+        url = f"{url}?lang={lang}"
+    return jsonify({"token": token, "url": url})
+
+
+def _version(answer_id):
+    """(ETag, Last-Modified) for the page, or None if the answer is gone.
+
+    Read from the few columns that can change after an answer is shared (a
+    challenge response, a deep analysis) rather than from the answer itself.
+    A repeat view then costs one narrow SELECT, not a row with its feedback.
+    """
+    row = db.session.execute(
+        select(
+            Answer.created_at,
+            Answer.challenge_response.is_not(None),
+            Answer.deep_analysis_created_at,
+        ).where(Answer.id == answer_id)
+    ).first()
+    if row is None:
+        return None
+    created_at, responded, analysed_at = row
+    # The page language is part of the page (<html lang>), and the template's
+    # mtime is, so a deploy that changes the markup changes every ETag.
+    key = "|".join(
+        str(part)
+        for part in (
+            answer_id,
+            created_at,
+            responded,
+            analysed_at,
+            _page_lang(),
+            _TEMPLATE_MTIME,
+        )
     )
+    etag = hashlib.sha256(key.encode()).hexdigest()[:16]
+    last_modified = max(filter(None, (created_at, analysed_at)), default=None)
+    return etag, last_modified
 
 
-@share_bp.route("/share/<token>", methods=["GET"])
-def view_shared_answer(token):
-    answer_id = verify_share_token(token)
-    if not answer_id:
-        abort(404)
+def _page_lang():
+    """The page language, from the URL only.
+
+    Not from the session: the response is cached publicly, and Cloudflare keys
+    on the URL, not on the cookie. A page rendered from one viewer's session
+    would be served to everyone else who opens the link.
+    """
+    lang = request.args.get("lang", SETTINGS.DEFAULT_LANGUAGE)
+    return lang if lang in SETTINGS.SUPPORTED_LANGUAGES else SETTINGS.DEFAULT_LANGUAGE
+
+
+def _cached_page(etag):
+    with _pages_lock:
+        html = _pages.get(etag)
+        if html is not None:
+            _pages.move_to_end(etag)
+        return html
 
-    answer = Answer.query.filter_by(id=answer_id).first()
+
+def _store_page(etag, html):
+    with _pages_lock:
+        _pages[etag] = html
+        _pages.move_to_end(etag)
+        while len(_pages) > SETTINGS.SHARE_PAGE_CACHE_SIZE:
+            _pages.popitem(last=False)
+
+
+def _render(answer_id):
+    answer = (
+        Answer.query.options(*ANSWER_PROFILES["list"]).filter_by(id=answer_id).first()
+    )
     if not answer:
-        abort(404)
+        return None
 
     scores = answer.evaluation_scores or {}
     feedback = answer.evaluation_feedback or {}
     return render_template(
         "share.html",
+        # Overrides the session-based page_lang from the context processor.
+        page_lang=_page_lang(),
         answer=answer,
         scores=scores,
         overall_feedback=feedback.get("Overall") or feedback.get("overall"),
@@ -76,3 +180,45 @@ def view_shared_answer(token):
             if scores.get(name) is not None
         ],
     )
+
+
+@share_bp.route("/share/<token>", methods=["GET"])
+def view_shared_answer(token):
+    answer_id = verify_share_token(token)
+    if not answer_id:
+        abort(404)
+
+    version = _version(answer_id)
+    if version is None:
+        abort(404)
+    etag, last_modified = version
+
+    # The ETag covers everything the page shows, so it doubles as the cache
+    # key; answer_id is hashed into it.
+    html = _cached_page(etag)
+    if html is None:
+        html = _render(answer_id)
+        if html is None:
+            abort(404)
+        _store_page(etag, html)
+
+    response = Response(html, mimetype="text/html")
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified.replace(tzinfo=UTC)
+    if session or session.modified:
+        # This viewer has a session, and the response may carry its cookie
+        # back (a permanent session is re-sent on every response). A shared
+        # cache storing that would hand the session to the next viewer.
+        response.headers["Cache-Control"] = "private, no-store"
+    else:
+        # Shareable by any cache, Cloudflare's included: the link is the only
+        # access control, and every viewer of it sees the same page. Short for
+        # browsers, longer at the edge, and revalidated by ETag either way.
+        response.headers["Cache-Control"] = (
+            f"public, max-age={_BROWSER_MAX_AGE}, s-maxage={_EDGE_MAX_AGE}"
+        )
+    # Still unlisted: the header keeps crawlers off even where the <meta> tag
+    # is not read.
+    response.headers["X-Robots-Tag"] = "noindex, nofollow"
+    return response.make_conditional(request)
@@ -1,22 +1,17 @@
-import gc
 import io
 import logging
-import platform
 import re
-import resource
 import uuid
-from datetime import UTC, datetime, time
 
 from flask import Blueprint, jsonify, request, session
-from google import genai
-from google.cloud import storage
 
+import memory
 from config import get_settings
-from extensions import db, google_credentials, limiter, openai_client
-from services.user_service import get_session_user, persist_session_user
+from extensions import db, limiter, openai_client, storage_client, vertex_client
+from lazy import LazyModule
+from services.quota_service import QuotaSnapshot, consume, refund
+from services.user_service import get_session_user
 from utils import (
-    get_daily_voice_count,
-    get_monthly_voice_count,
     get_monthly_voice_limit,
     get_voice_limit,
 )
@@ -25,13 +20,8 @@ logger = logging.getLogger(__name__)
 transcribe_bp = Blueprint("transcribe", __name__)
 SETTINGS = get_settings()
 
-# Initialize Gemini client
-CLIENT = genai.Client(
-    vertexai=True,
-    credentials=google_credentials,
-    project=SETTINGS.GCLOUD_PROJECT_NAME,
-    location=SETTINGS.GCLOUD_PROJECT_REGION,
-)
+# google.genai takes a noticeable share of a cold start to import; see lazy.py.
+genai = LazyModule("google.genai")
 
 TRANSCRIPTION_SYSTEM_PROMPT_EN = """
 You are a transcription post-processor. You are seeing text that has
@@ -118,7 +108,7 @@ def post_process_transcription(
         llm_response = None
         improved_transcript = None
         try:
-            llm_response = CLIENT.models.generate_content(
+            llm_response = vertex_client().models.generate_content(
                 model=SETTINGS.MODEL,
                 contents=[
                     genai.types.Content(
@@ -160,12 +150,11 @@ def post_process_transcription(
                 )
                 improved_transcript = transcript
 
-            # Free up memory
+            # Drop the response now rather than when the frame ends
             if "user_prompt" in locals():
                 del user_prompt
             if llm_response:
                 del llm_response
-            gc.collect()
 
             logger.debug(
                 f"LLM post-processing completed. Result: {improved_transcript}"
@@ -179,20 +168,17 @@ def post_process_transcription(
                 del user_prompt
             if llm_response:
                 del llm_response
-            gc.collect()
             return transcript
 
     except Exception as e:
         logger.error(f"Error in post-processing setup: {str(e)}", exc_info=True)
-        gc.collect()
         return transcript
 
 
 def upload_audio_to_gcs(audio_content, file_mime):
-    # Initialize a GCS client with our credentials
-    storage_client = storage.Client(credentials=google_credentials)
+    # One storage client per process, built on first upload
     bucket_name = SETTINGS.GCS_BUCKET
-    bucket = storage_client.bucket(bucket_name)
+    bucket = storage_client().bucket(bucket_name)
     extension = "webm" if "webm" in file_mime or "ogg" in file_mime else "wav"
     filename = f"voice_recordings/{uuid.uuid4()}.{extension}"
     blob = bucket.blob(filename)
@@ -205,8 +191,6 @@ def transcribe_audio(audio_content, file_mime):
     """
     Transcribes the audio content using OpenAI's Whisper API.
     """
-    import gc
-
     from flask import session
 
     # Capture session-dependent data
@@ -232,7 +216,7 @@ def transcribe_audio(audio_content, file_mime):
 
         with io.BytesIO(audio_content) as audio_file:
             audio_file.name = temp_file_name
-            response = openai_client.audio.transcriptions.create(
+            response = openai_client().audio.transcriptions.create(
                 model=SETTINGS.WHISPER_MODEL,
                 file=audio_file,
                 response_format=SETTINGS.WHISPER_RESPONSE_FORMAT,
@@ -260,9 +244,6 @@ def transcribe_audio(audio_content, file_mime):
             f"Whisper API transcription successful. Transcript length: {len(transcript)}"
         )
 
-        # Force garbage collection
-        gc.collect()
-
         # Return the cleaned transcript
         clean_transcript = re.sub(r"\s+", " ", transcript).strip()
         return clean_transcript
@@ -273,7 +254,6 @@ def transcribe_audio(audio_content, file_mime):
         # a billing or auth failure as "no text detected" sends the user back to
         # re-record something that can never succeed.
         logger.error(f"Error in Whisper API transcription: {e}", exc_info=True)
-        gc.collect()
         return None
 
 
@@ -290,8 +270,9 @@ def check_voice_limits():
     # Read-only: a visitor who has never recorded has no users row, and asking
     # whether they are over their limit must not create one.
     user = get_session_user()
+    quota = QuotaSnapshot.load(user_uuid)
 
-    daily_count = get_daily_voice_count(user_uuid)
+    daily_count = quota.daily_voice
     voice_limit = get_voice_limit(user.tier)
 
     if daily_count >= voice_limit:
@@ -323,7 +304,7 @@ def check_voice_limits():
         return jsonify({"error": error_message, "limit_reached": True}), 200
 
     # Check monthly voice recording count
-    monthly_count = get_monthly_voice_count(user_uuid)
+    monthly_count = quota.monthly_voice
     monthly_limit = get_monthly_voice_limit(user.tier)
 
     if monthly_count >= monthly_limit:
@@ -374,8 +355,9 @@ def transcribe_voice():
         # Read-only until the recording is accepted below, so a request that is
         # over its limit or carries no audio writes nothing.
         user = get_session_user()
+        quota = QuotaSnapshot.load(user_uuid)
 
-        daily_count = get_daily_voice_count(user_uuid)
+        daily_count = quota.daily_voice
         voice_limit = get_voice_limit(user.tier)
 
         if daily_count >= voice_limit:
@@ -407,7 +389,7 @@ def transcribe_voice():
             return jsonify({"error": error_message}), 429
 
         # Check monthly voice recording count
-        monthly_count = get_monthly_voice_count(user_uuid)
+        monthly_count = quota.monthly_voice
         monthly_limit = get_monthly_voice_limit(user.tier)
 
         if monthly_count >= monthly_limit:
@@ -449,32 +431,17 @@ def transcribe_voice():
         try:
             logger.debug("Processing voice transcription")
 
-            # The voice counters live on the user row, so this is the point where
-            # an anonymous visitor has to become one.
-            user = persist_session_user()
-
-            # Update voice transcription count
-            today_start = datetime.combine(datetime.now(UTC).date(), time.min)
-            today_start = today_start.replace(tzinfo=UTC)
-
-            # Ensure the datetime is timezone-aware before comparison
-            last_transcription = user.last_voice_transcription
-            if last_transcription and last_transcription.tzinfo is None:
-                last_transcription = last_transcription.replace(tzinfo=UTC)
-
-            if not last_transcription or last_transcription < today_start:
-                user.daily_voice_count = 1
-            else:
-                user.daily_voice_count += 1
-            user.last_voice_transcription = datetime.now(UTC)
-
-            # Update monthly voice count
-            user.monthly_voice_count = (user.monthly_voice_count or 0) + 1
-            user.last_monthly_voice_reset = (
-                user.last_monthly_voice_reset or datetime.now(UTC)
-            )
-
-            db.session.commit()
+            # The checks above are reads, so an over-limit request is turned
+            # away with the full message. This is the enforcement: each counter
+            # is taken in one atomic statement in quota_ledger, so two
+            # recordings landing together cannot both take the last one.
+            # Usage is keyed by the session uuid, so an anonymous visitor does
+            # not need a users row to record.
+            if consume(user_uuid, "voice_daily", voice_limit) is None:
+                return jsonify({"error": "Voice recording limit reached."}), 429
+            if consume(user_uuid, "voice", monthly_limit) is None:
+                refund(user_uuid, "voice_daily")
+                return jsonify({"error": "Voice recording limit reached."}), 429
 
             # Get the current language and question
             language = session.get("language", SETTINGS.DEFAULT_LANGUAGE)
@@ -502,14 +469,12 @@ def transcribe_voice():
                 # Ensure cleanup happens in all cases
                 if "audio_content" in locals():
                     del audio_content
-                gc.collect()
 
             # The transcription service itself failed (billing, auth, network).
             # 500 makes the frontend show "Error during transcription" instead of
             # blaming the recording.
             if transcript is None:
                 logger.error("Transcription service failed - see preceding error")
-                gc.collect()
                 return jsonify(
                     {
                         "error": "Transcription service is unavailable",
@@ -520,7 +485,6 @@ def transcribe_voice():
             # Genuinely empty: the recording contained no recognisable speech.
             if not transcript:
                 logger.info("Transcription returned no speech")
-                gc.collect()
                 return jsonify(
                     {
                         "error": "No text could be identified in the recording",
@@ -549,18 +513,15 @@ def transcribe_voice():
                 if transcript:
                     del transcript
                     transcript = None
-                gc.collect()
             except Exception as e:
                 logger.error(f"Error during post-processing: {str(e)}", exc_info=True)
                 # Ensure cleanup even on error
                 if "transcript" in locals() and transcript:
                     del transcript
-                gc.collect()
                 return jsonify({"error": "Error during transcription"}), 500
 
             if not improved_transcript:
                 logger.error("Post-processing failed - empty result")
-                gc.collect()
                 return jsonify({"error": "Error during transcription"}), 500
 
             was_improved = improved_transcript != original_transcript
@@ -571,12 +532,7 @@ def transcribe_voice():
                 del original_transcript
             """
 
-            # Final cleanup before returning response
-            gc.collect()
-            memory_divisor = 1024 if platform.system() != "Darwin" else 1024 * 1024
-            logger.info(
-                f"Memory usage after transcription: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / memory_divisor}MB"
-            )
+            logger.info(f"Memory usage after transcription: {memory.rss_mb():.2f}MB")
             return jsonify(
                 {
                     "transcript": improved_transcript,
@@ -588,11 +544,8 @@ def transcribe_voice():
         except Exception as e:
             logger.error(f"Error in voice transcription: {str(e)}")
             db.session.rollback()
-            # Ensure memory cleanup on any exception
-            gc.collect()
             return jsonify({"error": "Error processing voice recording"}), 500
     finally:
         # Ensure all references are cleared
         if "audio_content" in locals() and audio_content:
             del audio_content
-        gc.collect()
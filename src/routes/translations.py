@@ -0,0 +1,25 @@
+"""Namespaced translation bundles; see services/translation_service.py."""
+
+from flask import Blueprint, abort, request
+
+from assets import variant_response
+from config import get_settings
+from services.translation_service import get_translations
+
+translations_bp = Blueprint("translations", __name__)
+SETTINGS = get_settings()
+
+
+@translations_bp.route("/translations/<lang>/<namespace>.json")
+def bundle(lang, namespace):
+    if lang not in SETTINGS.SUPPORTED_LANGUAGES:
+        abort(404)
+    found = get_translations(lang).bundles.get(namespace)
+    if found is None:
+        abort(404)
+
+    response = variant_response(found.variants, "application/json")
+    # The URL stays the same when the text changes, so the cache is short and
+    # revalidating costs a 304 against the ETag.
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return response.make_conditional(request)
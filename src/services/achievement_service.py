@@ -1,294 +1,369 @@
-from typing import List
-
-from models import User
-from services.question_service import get_questions
+"""Achievements: a registry of rules, checked against a per-user stats row.
+
+Each rule names the events it cares about ("answer", "challenge") and decides
+from the event itself plus the user's `UserStats` row: the voice answer count
+and per-category tallies. Recording an event updates the row in place and
+checking the rules reads only the row, so a submission costs the same whether
+the user has written five answers or five thousand.
+
+It used to walk `user.answers` five or six times per submission, once per
+counting achievement, calling `get_question_category` inside those loops —
+itself a re-read of the translation file and a scan of every question — and
+commit once per award. Awards now join the caller's transaction, along with the
+stats update, and earned ids are checked against a set.
+
+The stats row is built from the answer history the first time it is needed (a
+user from before it existed, or one whose answers were just merged in at login;
+see `reset_user_stats`), and maintained incrementally from then on. The row is
+read FOR UPDATE, so two submissions by the same user at once add to it one
+after the other rather than both writing back what they read.
+
+The rules award exactly what the per-answer checks did. That includes never
+awarding the answer and challenge milestones or the daily streak: those
+counted `getattr(answer, "total_score", 0)`, which Answer does not have, so
+they never fired, and they have no rule here. Making them fire is a product
+change of its own, not part of this one.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from sqlalchemy import delete
+
+from extensions import db
+from models import ANSWER_PROFILES, Answer, User, UserAchievement, UserStats
+from services.question_service import get_catalog
 from src.constants.achievements import ACHIEVEMENTS, ACHIEVEMENTS_BY_ID, Achievement
 
+# Minimum overall score for an answer or challenge response to count towards
+# the all-categories achievement.
+MIN_SCORE = 5
+# Minimum overall score for a "strong" answer, as domain_expert counts them.
+STRONG_SCORE = 7
+
 
 def get_question_category(question_id):
     """Get the category for a given question ID."""
     if not question_id:
         return None
+    # Question ids and categories are the same in every language, so the
+    # default language's catalog answers for all of them.
+    return get_catalog().category_by_id.get(question_id)
 
-    questions = get_questions()
-    for category, category_questions in questions.items():
-        for question in category_questions:
-            if question["id"] == question_id:
-                return category
-    return None
 
+@dataclass(frozen=True)
+class AchievementEvent:
+    """One scored submission: an initial answer, or a challenge response."""
 
-def check_and_award_achievements(
-    user: User, answer_data: dict, session=None
-) -> List[Achievement]:
-    """Check for and award any newly earned achievements
+    kind: str  # "answer" or "challenge"
+    total_score: float
+    evaluation_scores: dict
+    input_mode: str
+    text_length: int
+    category: str | None
 
-    Args:
-        user: The user to check achievements for
-        answer_data: Data about the answer submission
-        session: Optional Flask session object for anonymous users
 
-    Returns:
-        List of newly awarded achievements
-    """
-    if not user:
-        return []
+@dataclass(frozen=True)
+class Rule:
+    achievement_id: str
+    events: frozenset
+    check: Callable[[AchievementEvent, UserStats], bool]
+    # Rules that count across answers need the stats row, so only a persisted
+    # user is checked against them.
+    needs_stats: bool = False
 
-    newly_awarded = []
-    # Store the achievement ID in the answer data if it triggered an achievement
-    answer_data["completed_achievement"] = None
-    # Store multiple achievements completed by this answer
-    answer_data["completed_achievements"] = []
 
-    # For tracking achievements for anonymous users
-    session_achievements = []
-    if session and "earned_achievements" in session:
-        session_achievements = session.get("earned_achievements", [])
+_RULES: list = []
+_RULES_BY_EVENT: dict = {}
 
-    # Check each achievement condition
-    def award_achievement(achievement_id):
-        """Helper to award achievement to user and track in session"""
-        # Award to user if authenticated
-        if user.is_authenticated:
-            if not user.has_achievement(achievement_id):
-                user.award_achievement(achievement_id)
-                newly_awarded.append(ACHIEVEMENTS_BY_ID[achievement_id])
-                # Store the first achievement that this answer completed
-                if answer_data.get("completed_achievement") is None:
-                    answer_data["completed_achievement"] = achievement_id
-                # Store all achievements that this answer completed
-                answer_data["completed_achievements"].append(achievement_id)
-        # Track in session for anonymous users
-        elif session is not None:
-            if achievement_id not in session_achievements:
-                session_achievements.append(achievement_id)
-                newly_awarded.append(ACHIEVEMENTS_BY_ID[achievement_id])
-                # Store the first achievement that this answer completed
-                if answer_data.get("completed_achievement") is None:
-                    answer_data["completed_achievement"] = achievement_id
-                # Store all achievements that this answer completed
-                answer_data["completed_achievements"].append(achievement_id)
-
-    # First argument achievement
-    if not user.is_authenticated or not user.has_achievement("first_argument"):
-        award_achievement("first_argument")
-
-    # Voice pioneer
-    has_voice_pioneer = user.is_authenticated and user.has_achievement("voice_pioneer")
-    if answer_data.get("input_mode") == "voice" and not has_voice_pioneer:
-        award_achievement("voice_pioneer")
-
-    # Check for exceptional rating
-    total_score = answer_data.get("total_score", 0)
-    has_exceptional = user.is_authenticated and user.has_achievement(
-        "exceptional_rating"
+
+def rule(achievement_id, *events, needs_stats=False):
+    """Register the decorated predicate as the rule for `achievement_id`."""
+
+    def register(check):
+        registered = Rule(achievement_id, frozenset(events), check, needs_stats)
+        _RULES.append(registered)
+        for event in events:
+            _RULES_BY_EVENT.setdefault(event, []).append(registered)
+        return check
+
+    return register
+
+
+# Registered in the order the checks used to run, which decides an answer's
+# `completed_achievement` when it earns several.
+@rule("first_argument", "answer", "challenge")
+def _first_argument(event, stats):
+    return True
+
+
+@rule("voice_pioneer", "answer", "challenge")
+def _voice_pioneer(event, stats):
+    return event.input_mode == "voice"
+
+
+@rule("exceptional_rating", "answer", "challenge")
+def _exceptional_rating(event, stats):
+    return event.total_score >= 9
+
+
+@rule("great_rating", "answer", "challenge")
+def _great_rating(event, stats):
+    return event.total_score >= 7
+
+
+@rule("master_of_all", "answer", "challenge")
+def _master_of_all(event, stats):
+    return all(score >= 8 for score in event.evaluation_scores.values())
+
+
+@rule("all_categories", "answer", "challenge", needs_stats=True)
+def _all_categories(event, stats):
+    return sum(1 for tally in stats.categories.values() if tally["passed"]) >= 9
+
+
+@rule("wordsmith", "answer", "challenge")
+def _wordsmith(event, stats):
+    return event.text_length > 1700 and event.total_score >= 7
+
+
+@rule("concise_master", "answer", "challenge")
+def _concise_master(event, stats):
+    return event.text_length < 400 and event.total_score >= 7
+
+
+@rule("voice_master", "answer", "challenge", needs_stats=True)
+def _voice_master(event, stats):
+    return stats.voice_answer_count >= 10
+
+
+@rule("category_explorer", "answer", "challenge", needs_stats=True)
+def _category_explorer(event, stats):
+    return sum(1 for tally in stats.categories.values() if tally["answered"]) >= 9
+
+
+@rule("first_challenge", "challenge")
+def _first_challenge(event, stats):
+    return True
+
+
+@rule("domain_expert", "answer", "challenge", needs_stats=True)
+def _domain_expert(event, stats):
+    return any(tally["strong"] >= 5 for tally in stats.categories.values())
+
+
+@dataclass
+class _Tally:
+    """Accumulates stats for one user; also used to rebuild them from history."""
+
+    voice_answer_count: int = 0
+    categories: dict = field(default_factory=dict)
+
+    @classmethod
+    def of(cls, stats):
+        return cls(
+            voice_answer_count=stats.voice_answer_count or 0,
+            # Copies: JSON columns only notice reassignment, not mutation.
+            categories={
+                name: dict(tally) for name, tally in (stats.categories or {}).items()
+            },
+        )
+
+    def record(self, kind, score, input_mode, category):
+        if kind == "answer" and input_mode == "voice":
+            self.voice_answer_count += 1
+
+        if category:
+            tally = self.categories.setdefault(
+                category, {"answered": 0, "passed": 0, "strong": 0}
+            )
+            if kind == "answer":
+                tally["answered"] += 1
+            if score >= MIN_SCORE:
+                tally["passed"] += 1
+            if score >= STRONG_SCORE:
+                tally["strong"] += 1
+
+    def save(self, stats):
+        stats.voice_answer_count = self.voice_answer_count
+        stats.categories = self.categories
+
+
+# The rated dimensions. Stored scores also carry "Overall", which for a
+# challenge is the model's own rating rather than their mean, so it is left out
+# to score history the way submissions are scored (`avg_all` in
+# routes/answers.py).
+_DIMENSIONS = (
+    "Relevance",
+    "Logical Structure",
+    "Clarity",
+    "Depth",
+    "Objectivity",
+    "Creativity",
+)
+
+
+def _average(scores):
+    rated = [scores[name] for name in _DIMENSIONS if name in (scores or {})]
+    return sum(rated) / len(rated) if rated else 0
+
+
+def _build_from_history(user_uuid):
+    """A tally over every answer the user has, for a user with no stats row."""
+    tally = _Tally()
+    answers = Answer.query.options(*ANSWER_PROFILES["summary"]).filter_by(
+        user_uuid=user_uuid
     )
-    if total_score >= 9 and not has_exceptional:
-        award_achievement("exceptional_rating")
-
-    # Check for great rating (7+ score)
-    has_great = user.is_authenticated and user.has_achievement("great_rating")
-    if total_score >= 7 and not has_great:
-        award_achievement("great_rating")
-
-    # Check for master of all categories
-    scores = answer_data.get("evaluation_scores", {})
-    has_master = user.is_authenticated and user.has_achievement("master_of_all")
-    if all(score >= 8 for score in scores.values()) and not has_master:
-        award_achievement("master_of_all")
-
-    # Check for all categories with 5+ rating - only for authenticated users
-    if user.is_authenticated and not user.has_achievement("all_categories"):
-        # Get all answers with their categories and scores
-        category_high_scores = {}
-        for answer in user.answers:
-            if not answer.question_id:
-                continue
-
-            category = get_question_category(answer.question_id)
-            if not category:
-                continue
-
-            score = (
-                (sum(answer.evaluation_scores.values()) / len(answer.evaluation_scores))
-                if answer.evaluation_scores
-                else 0
+    for answer in answers:
+        category = get_question_category(answer.question_id)
+        tally.record(
+            "answer", _average(answer.evaluation_scores), answer.input_mode, category
+        )
+        if answer.challenge_response and answer.challenge_evaluation_scores:
+            tally.record(
+                "challenge",
+                _average(answer.challenge_evaluation_scores),
+                None,
+                category,
             )
-            if score >= 5:
-                category_high_scores[category] = True
+    return tally
+
 
-            # Check if challenge response also meets criteria
-            if answer.challenge_response and answer.challenge_evaluation_scores:
-                challenge_score = sum(
-                    answer.challenge_evaluation_scores.values()
-                ) / len(answer.challenge_evaluation_scores)
-                if challenge_score >= 5:
-                    category_high_scores[category] = True
+def _record(user_uuid, event):
+    """Apply `event` to the user's stats row, creating it if needed; return it.
 
-        if len(category_high_scores) >= 9:
-            award_achievement("all_categories")
+    A missing row is built from the history, which already contains the answer
+    behind this event — the caller has flushed it — so the event is not
+    applied a second time.
 
-    # Check for wordsmith (long argument)
+    An existing row is locked until the caller commits. Without the lock, two
+    concurrent submissions would each add their event to the same old counts,
+    and whichever committed last would drop the other's.
+    """
+    stats = db.session.get(
+        UserStats, user_uuid, with_for_update=True, populate_existing=True
+    )
+    if stats is None:
+        stats = UserStats(user_uuid=user_uuid)
+        db.session.add(stats)
+        _build_from_history(user_uuid).save(stats)
+        return stats
+
+    tally = _Tally.of(stats)
+    tally.record(event.kind, event.total_score, event.input_mode, event.category)
+    tally.save(stats)
+    return stats
+
+
+def reset_user_stats(*user_uuids):
+    """Drop stats rows so they are rebuilt from the history on next use.
+
+    For when answers move between users, as login and signup merge an
+    anonymous visitor's answers into the account.
+    """
+    db.session.execute(delete(UserStats).where(UserStats.user_uuid.in_(user_uuids)))
+
+
+def _event_from(answer_data, question_id):
+    is_challenge = answer_data.get("is_challenge", False)
     input_mode = answer_data.get("input_mode", "text")
     argument = answer_data.get("argument", "")
-    claim = answer_data.get("claim", "")
-    counterargument = answer_data.get("counterargument", "")
-    voice_answer = answer_data.get("voice_answer", "")
-    is_challenge = answer_data.get("is_challenge", False)
-
     if is_challenge:
-        # For challenges, argument contains the full text for both voice and text inputs
-        total_length = len(argument)
+        # For challenges, argument contains the full text for both voice and
+        # text inputs.
+        text_length = len(argument)
     elif input_mode == "voice":
-        total_length = len(voice_answer)
+        text_length = len(answer_data.get("voice_answer", ""))
     else:
-        total_length = len(claim) + len(argument) + len(counterargument)
-
-    has_wordsmith = user.is_authenticated and user.has_achievement("wordsmith")
-    if total_length > 1700 and total_score >= 7 and not has_wordsmith:
-        award_achievement("wordsmith")
-
-    # Check for concise master
-    has_concise = user.is_authenticated and user.has_achievement("concise_master")
-    if total_length < 400 and total_score >= 7 and not has_concise:
-        award_achievement("concise_master")
-
-    # Count total answers and award milestones - only for authenticated users
-    if user.is_authenticated:
-        MIN_SCORE = 5
-        answer_count = sum(
-            1 for a in user.answers if getattr(a, "total_score", 0) >= MIN_SCORE
+        text_length = (
+            len(answer_data.get("claim", ""))
+            + len(argument)
+            + len(answer_data.get("counterargument") or "")
         )
-        if answer_count >= 10 and not user.has_achievement("ten_answers"):
-            award_achievement("ten_answers")
+    return AchievementEvent(
+        kind="challenge" if is_challenge else "answer",
+        total_score=answer_data.get("total_score", 0),
+        evaluation_scores=answer_data.get("evaluation_scores", {}),
+        input_mode=input_mode,
+        text_length=text_length,
+        category=get_question_category(question_id),
+    )
 
-        if answer_count >= 25 and not user.has_achievement("twenty_five_answers"):
-            award_achievement("twenty_five_answers")
 
-        if answer_count >= 50 and not user.has_achievement("fifty_answers"):
-            award_achievement("fifty_answers")
+def check_and_award_achievements(
+    user: User, answer_data: dict, session=None
+) -> list[Achievement]:
+    """Check for and award any newly earned achievements
 
-        if answer_count >= 100 and not user.has_achievement("hundred_answers"):
-            award_achievement("hundred_answers")
-    else:
-        MIN_SCORE = 5
+    Awards and the stats update are added to the session, not committed; the
+    caller's commit stores them with the answer.
 
-    # Count voice answers - only for authenticated users
-    if user.is_authenticated:
-        voice_answers = sum(1 for a in user.answers if a.input_mode == "voice")
-        if voice_answers >= 10 and not user.has_achievement("voice_master"):
-            award_achievement("voice_master")
-
-        # Check for category explorer achievement - only for authenticated users
-        answered_categories = {
-            get_question_category(a.question_id)
-            for a in user.answers
-            if a.question_id and get_question_category(a.question_id)
-        }
-        if len(answered_categories) >= 9 and not user.has_achievement(
-            "category_explorer"
-        ):  # All 9 categories
-            award_achievement("category_explorer")
-
-    # Check for challenge achievements
-    if answer_data.get("is_challenge"):
-        # First challenge achievement - no score requirement
-        has_challenge = user.is_authenticated and user.has_achievement(
-            "first_challenge"
-        )
-        if not has_challenge:
-            award_achievement("first_challenge")
-
-        # Other challenge achievements - require minimum score
-        if total_score >= MIN_SCORE and user.is_authenticated:
-            challenge_count = sum(
-                1
-                for a in user.answers
-                if a.challenge_response and getattr(a, "total_score", 0) >= MIN_SCORE
-            )
+    Args:
+        user: The user to check achievements for
+        answer_data: Data about the answer submission, including "question_id"
+        session: Optional Flask session object for anonymous users
 
-            if challenge_count >= 10 and not user.has_achievement("ten_challenges"):
-                award_achievement("ten_challenges")
-
-            if challenge_count >= 100 and not user.has_achievement(
-                "hundred_challenges"
-            ):
-                award_achievement("hundred_challenges")
-
-    # Check for daily streak achievement - only for authenticated users
-    if user.is_authenticated and not user.has_achievement("daily_streak"):
-        from datetime import UTC, datetime, timedelta
-
-        # Get all answers from the last 5 days
-        five_days_ago = datetime.now(UTC) - timedelta(days=5)
-        recent_answers = [
-            a
-            for a in user.answers
-            if a.created_at
-            and a.created_at.replace(tzinfo=UTC) >= five_days_ago
-            and getattr(a, "total_score", 0) >= MIN_SCORE
-        ]
+    Returns:
+        List of newly awarded achievements
+    """
+    if not user:
+        return []
 
-        # Group answers by date
-        answer_dates = {a.created_at.replace(tzinfo=UTC).date() for a in recent_answers}
-
-        # Check if we have answers for 5 consecutive days
-        today = datetime.now(UTC).date()
-        has_streak = True
-        for i in range(5):
-            check_date = today - timedelta(days=i)
-            if check_date not in answer_dates:
-                has_streak = False
-                break
-
-        if has_streak:
-            award_achievement("daily_streak")
-
-    # Check for domain expert achievement - only for authenticated users
-    if user.is_authenticated and not user.has_achievement("domain_expert"):
-        # Get all answers with their categories
-        category_scores = {}
-        for answer in user.answers:
-            if not answer.question_id:
-                continue
-
-            category = get_question_category(answer.question_id)
-            if not category:
-                continue
-
-            score = (
-                (sum(answer.evaluation_scores.values()) / len(answer.evaluation_scores))
-                if answer.evaluation_scores
-                else 0
-            )
-            if score >= 7:
-                category_scores[category] = category_scores.get(category, 0) + 1
+    newly_awarded = []
+    # Store the achievement ID in the answer data if it triggered an achievement
+    answer_data["completed_achievement"] = None
+    # Store multiple achievements completed by this answer
+    answer_data["completed_achievements"] = []
 
-            # Check if challenge response also meets criteria
-            if answer.challenge_response and answer.challenge_evaluation_scores:
-                challenge_score = sum(
-                    answer.challenge_evaluation_scores.values()
-                ) / len(answer.challenge_evaluation_scores)
-                if challenge_score >= 7:
-                    category_scores[category] = category_scores.get(category, 0) + 1
+    event = _event_from(answer_data, answer_data.get("question_id"))
 
-        # Check if any category has 5 or more high scores
-        if any(count >= 5 for count in category_scores.values()):
-            award_achievement("domain_expert")
+    if user.is_authenticated:
+        earned = user.earned_achievement_ids
+        stats = _record(user.uuid, event)
+    else:
+        # For tracking achievements for anonymous users
+        earned = set(session.get("earned_achievements", [])) if session else set()
+        stats = None
+
+    for candidate in _RULES_BY_EVENT.get(event.kind, []):
+        if candidate.achievement_id in earned:
+            continue
+        if candidate.needs_stats and stats is None:
+            continue
+        if not candidate.check(event, stats):
+            continue
+
+        earned.add(candidate.achievement_id)
+        if user.is_authenticated:
+            db.session.add(
+                UserAchievement(
+                    user_uuid=user.uuid, achievement_id=candidate.achievement_id
+                )
+            )
+        elif session is None:
+            continue
+        newly_awarded.append(ACHIEVEMENTS_BY_ID[candidate.achievement_id])
+        # Store the first achievement that this answer completed
+        if answer_data.get("completed_achievement") is None:
+            answer_data["completed_achievement"] = candidate.achievement_id
+        # Store all achievements that this answer completed
+        answer_data["completed_achievements"].append(candidate.achievement_id)
 
     # Update the session with achievements for non-authenticated users
-    if session is not None and not user.is_authenticated and session_achievements:
-        session["earned_achievements"] = session_achievements
+    if session is not None and not user.is_authenticated and newly_awarded:
+        session["earned_achievements"] = session.get("earned_achievements", []) + [
+            achievement.id for achievement in newly_awarded
+        ]
 
     return newly_awarded
 
 
-def get_all_achievements() -> List[Achievement]:
+def get_all_achievements() -> list[Achievement]:
     """Get list of all possible achievements"""
     return ACHIEVEMENTS
 
 
-def get_user_achievements(user: User) -> List[Achievement]:
+def get_user_achievements(user: User) -> list[Achievement]:
     """Get list of achievements earned by user"""
     if not user:
         return []
@@ -13,11 +13,10 @@ than an across-the-board upgrade.
 import json
 import logging
 
-from google.genai import types
-
 from config import get_settings
+from extensions import vertex_client
+from lazy import LazyModule
 from services.llm import (
-    CLIENT,
     DEEP_ANALYSIS_INSTRUCTION_DE,
     DEEP_ANALYSIS_INSTRUCTION_EN,
     DEEP_ANALYSIS_SCHEMA,
@@ -26,6 +25,8 @@ from utils import auto_dedent
 
 SETTINGS = get_settings()
 logger = logging.getLogger(__name__)
+# google.genai takes a noticeable share of a cold start to import; see lazy.py.
+types = LazyModule("google.genai.types")
 
 
 def build_deep_analysis_prompt(
@@ -78,7 +79,7 @@ def run_deep_analysis(answer, language: str = "en") -> dict:
     logger.debug("Deep analysis - language: %s, answer: %s", language, answer.id)
     logger.debug("Deep analysis - prompt: %s", prompt)
 
-    response = CLIENT.models.generate_content(
+    response = vertex_client().models.generate_content(
         model=SETTINGS.DEEP_ANALYSIS_MODEL,
         contents=[
             types.Content(role="user", parts=[types.Part.from_text(text=prompt)])
@@ -0,0 +1,175 @@
+"""Content-addressed cache in front of the scored evaluation.
+
+The scored pass runs at temperature 0 with top_k=1, so the same prompt against
+the same model and instruction gets the same answer. Paying for it twice buys
+nothing, and repeats are common: the "Try an example" prefills submit the exact
+`exampleAnswers` text, a submission that timed out on the client gets retried,
+and answers get pasted between accounts.
+
+The key is a SHA-256 over the normalized inputs plus everything else that shapes
+the output: language, input mode, `SETTINGS.MODEL`, and a digest of the system
+instruction and the response schema. Editing a prompt or switching models
+therefore never serves a stale evaluation — the old rows simply stop matching
+and age out through the LRU trim.
+
+Stored in Postgres rather than in-process, because an instance lives for
+minutes under `--min-instances=0` and a cache that dies with it would rarely be
+warm. A failure anywhere in here is logged and treated as a miss: the cache may
+cost an evaluation its speed-up, never the evaluation itself.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from datetime import UTC, datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import get_settings
+from extensions import db
+from models import EvaluationCache
+
+SETTINGS = get_settings()
+logger = logging.getLogger(__name__)
+
+# Per-process hit/miss tally, for logs and /health. The table's `hits` column is
+# the durable per-entry record; this is only the running rate.
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _normalize(text) -> str:
+    """Collapse whitespace, so a trailing newline or double space still hits.
+
+    Case and punctuation are left alone: the feedback quotes the user's text
+    back at them, and two answers that differ only in case are not guaranteed
+    to be read the same way by the model.
+    """
+    return " ".join((text or "").split())
+
+
+def prompt_digest(system_instruction: str, response_schema: dict) -> str:
+    """Digest of the fixed half of the prompt, so editing it invalidates the cache."""
+    payload = json.dumps(
+        {"instruction": system_instruction, "schema": response_schema},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cache_key(
+    question_text: str,
+    claim: str,
+    argument: str,
+    counterargument: str,
+    language: str,
+    input_mode: str,
+    system_instruction: str,
+    response_schema: dict,
+) -> str:
+    payload = json.dumps(
+        [
+            _normalize(question_text),
+            _normalize(claim),
+            _normalize(argument),
+            _normalize(counterargument),
+            language,
+            input_mode or "text",
+            SETTINGS.MODEL,
+            prompt_digest(system_instruction, response_schema),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _record(outcome: str):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def cache_stats() -> dict:
+    """Hits and misses seen by this process since it started."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def get_cached_evaluation(key: str):
+    """Return the stored evaluation for `key`, or None on a miss.
+
+    A hit bumps `last_used_at` and `hits` so the entry survives the LRU trim.
+    """
+    if not SETTINGS.EVALUATION_CACHE_ENABLED:
+        return None
+
+    try:
+        entry = db.session.get(EvaluationCache, key)
+        if entry is None:
+            _record("misses")
+            logger.info("Evaluation cache miss %s", key[:12])
+            return None
+
+        entry.hits = (entry.hits or 0) + 1
+        entry.last_used_at = datetime.now(UTC)
+        evaluation = entry.evaluation
+        db.session.commit()
+    except SQLAlchemyError as e:
+        logger.error("Evaluation cache lookup failed, treating as a miss: %s", e)
+        db.session.rollback()
+        _record("misses")
+        return None
+
+    _record("hits")
+    logger.info("Evaluation cache hit %s", key[:12])
+    return evaluation
+
+
+def store_evaluation(key: str, evaluation: dict):
+    """Store a fresh evaluation under `key`, then trim to the size bound."""
+    if not SETTINGS.EVALUATION_CACHE_ENABLED:
+        return
+
+    try:
+        db.session.merge(
+            EvaluationCache(
+                key=key,
+                evaluation=evaluation,
+                model=SETTINGS.MODEL,
+                hits=0,
+                last_used_at=datetime.now(UTC),
+            )
+        )
+        db.session.commit()
+        _evict_least_recently_used()
+    except SQLAlchemyError as e:
+        # Most likely two identical submissions racing to insert the same key,
+        # in which case the other one's row is just as good.
+        logger.warning("Could not store evaluation %s in cache: %s", key[:12], e)
+        db.session.rollback()
+
+
+def _evict_least_recently_used():
+    """Delete everything beyond the newest EVALUATION_CACHE_MAX_ENTRIES by last use.
+
+    Runs after each insert, i.e. only on a miss, where it sits next to a model
+    call that costs seconds; the count is an index-only scan.
+    """
+    limit = SETTINGS.EVALUATION_CACHE_MAX_ENTRIES
+    if db.session.query(EvaluationCache.key).count() <= limit:
+        return
+
+    stale = (
+        db.session.query(EvaluationCache.key)
+        .order_by(EvaluationCache.last_used_at.desc())
+        .offset(limit)
+        .subquery()
+    )
+    deleted = (
+        db.session.query(EvaluationCache)
+        .filter(EvaluationCache.key.in_(db.select(stale.c.key)))
+        .delete(synchronize_session=False)
+    )
+    db.session.commit()
+    logger.info("Evicted %s least recently used evaluation cache entries", deleted)
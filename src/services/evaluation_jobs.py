@@ -0,0 +1,329 @@
+"""Queued scored evaluations, so a submission does not pin a request thread.
+
+Each gunicorn worker has three threads and a 30s timeout, and a synchronous
+/submit_answer holds one of them for the whole Gemini call. A handful of
+concurrent users is enough to saturate an instance.
+
+A client that sends `Prefer: respond-async` gets the same validation and quota
+checks inline, and then a 202 with a job id instead of the evaluation. The job
+row is written first, so the work is recorded before any thread picks it up;
+a bounded pool per process then runs it.
+
+The worker does not get a second implementation of the submission. It replays
+the original handler under a request context rebuilt from the stored JSON body
+and session snapshot, with async mode off, so the evaluated answer is persisted
+by exactly the code that persists it for a synchronous submission — and quota
+is re-checked at the moment it is actually spent. Session keys the handler
+changes are recorded on the job and applied when the owner polls, because the
+worker has no cookie to write them to.
+
+Jobs do not survive the instance that queued them. One left pending or running
+past ASYNC_EVALUATION_STALE_AFTER_SECONDS is reported as failed; quota is only
+charged when an evaluation is stored, so the user loses nothing by resubmitting.
+
+Cloud Run throttles CPU outside requests, so a job progresses while its owner
+is polling or holding the event stream open — which is whenever anyone is
+waiting for it.
+
+A client that sends `Accept: text/event-stream` instead gets the job's progress
+on the same response: the model output is streamed, and each RESPONSE_SCHEMA
+field is forwarded as a `field` event the moment it is complete, so the first
+rating shows after the first field rather than the whole generation. It is the
+same job underneath — same replay, same persistence — and the closing `result`
+event carries the status URL, which the client fetches once so the session
+updates reach the cookie.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+
+from flask import (
+    Response,
+    current_app,
+    g,
+    request,
+    session,
+    stream_with_context,
+    url_for,
+)
+
+from config import get_settings
+from extensions import db
+from lifecycle import after_fork
+from models import EvaluationJob
+
+SETTINGS = get_settings()
+logger = logging.getLogger(__name__)
+
+# kind -> (path, handler). Registered by the route modules that own the
+# handlers, so this module never imports routes.
+_HANDLERS = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+# Finished jobs are only read by the poll that follows them, so a day is ample.
+_RETENTION = timedelta(days=1)
+
+# Put on a streamed job's event queue once the job has finished either way.
+_STREAM_END = object()
+
+# An event stream holds a request thread for as long as it is open, so it is
+# closed well inside gunicorn's 30s timeout. A job still running then goes on,
+# and the client collects it from its status URL.
+STREAM_SECONDS = 20
+
+
+def register_job_handler(kind, path, handler):
+    """Make `handler` the replay target for jobs of `kind`.
+
+    The handler must accept `allow_async=False` and return anything a Flask view
+    may return.
+    """
+    _HANDLERS[kind] = (path, handler)
+
+
+def wants_async():
+    """True when the client asked for a job id rather than the evaluation."""
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+def _get_executor():
+    # Created on first use rather than at import: under --preload the import
+    # happens in the gunicorn master, and threads do not survive the fork.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=SETTINGS.ASYNC_EVALUATION_WORKERS,
+                thread_name_prefix="evaluation-job",
+            )
+        return _executor
+
+
+@after_fork
+def _forget_executor():
+    # The master's executor, if anything made one, has no threads in a worker.
+    global _executor
+    _executor = None
+
+
+def wants_stream():
+    """True when the client asked for the evaluation as an event stream."""
+    return "text/event-stream" in request.headers.get("Accept", "")
+
+
+def _reserve_slot(kind):
+    global _pending
+    with _pending_lock:
+        if _pending >= SETTINGS.ASYNC_EVALUATION_MAX_PENDING:
+            logger.warning("Evaluation queue full, evaluating %s inline", kind)
+            return False
+        _pending += 1
+        return True
+
+
+def _release_slot():
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def _queue_job(kind, runner, *args):
+    """Write the job row for the current request and hand it to `runner`."""
+    try:
+        user_agent = request.headers.get("User-Agent", "")[:500]
+        job = EvaluationJob(
+            user_uuid=session["user_id"],
+            kind=kind,
+            status="pending",
+            request_json=request.get_json(),
+            session_snapshot=dict(session),
+            remote_addr=request.remote_addr,
+            user_agent=user_agent,
+        )
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+        app = current_app._get_current_object()
+        _get_executor().submit(runner, app, job_id, *args)
+    except Exception:
+        _release_slot()
+        raise
+
+    logger.info("Queued %s evaluation job %s", kind, job_id)
+    return job_id
+
+
+def enqueue_evaluation(kind):
+    """Record the current request as a job and queue it.
+
+    Returns the 202 response, or None when this process already has
+    ASYNC_EVALUATION_MAX_PENDING jobs queued — the caller then evaluates inline.
+    """
+    if not _reserve_slot(kind):
+        return None
+
+    job_id = _queue_job(kind, _run_job)
+    status_url = url_for("evaluation_jobs.job_status", job_id=job_id)
+    return (
+        {"job_id": job_id, "status": "pending", "status_url": status_url},
+        202,
+        {"Location": status_url},
+    )
+
+
+def stream_evaluation(kind):
+    """Record the current request as a job and stream its fields as they come.
+
+    Events: `job` (id and status URL) first, `field` ({name, value}) for each
+    completed RESPONSE_SCHEMA field, then `result` ({status, result,
+    status_url}) with the body a synchronous submission would have returned.
+    Returns None when the queue is full, like enqueue_evaluation.
+    """
+    if not _reserve_slot(kind):
+        return None
+
+    events = queue.SimpleQueue()
+    job_id = _queue_job(kind, _run_streamed_job, events)
+    status_url = url_for("evaluation_jobs.job_status", job_id=job_id)
+
+    def generate():
+        payload = json.dumps({"job_id": job_id, "status_url": status_url})
+        yield f"event: job\ndata: {payload}\n\n"
+
+        deadline = time.monotonic() + STREAM_SECONDS
+        while True:
+            try:
+                item = events.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                # The job keeps running; its result can still be collected.
+                payload = json.dumps({"job_id": job_id, "status_url": status_url})
+                yield f"event: timeout\ndata: {payload}\n\n"
+                return
+            if item is _STREAM_END:
+                break
+            name, value = item
+            payload = json.dumps({"name": name, "value": value})
+            yield f"event: field\ndata: {payload}\n\n"
+
+        db.session.expire_all()
+        job = db.session.get(EvaluationJob, job_id)
+        payload = json.dumps(
+            {
+                "status": job.response_status,
+                "result": job.response_json,
+                "status_url": status_url,
+            }
+        )
+        yield f"event: result\ndata: {payload}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+def _run_streamed_job(app, job_id, events):
+    try:
+        _run_job(app, job_id, on_field=lambda name, value: events.put((name, value)))
+    finally:
+        events.put(_STREAM_END)
+
+
+def _run_job(app, job_id, on_field=None):
+    try:
+        with app.app_context():
+            job = db.session.get(EvaluationJob, job_id)
+            if job is None or job.status != "pending":
+                return
+            job.status = "running"
+            db.session.commit()
+            kind = job.kind
+            body = job.request_json
+            snapshot = job.session_snapshot or {}
+            remote_addr = job.remote_addr
+            user_agent = job.user_agent
+            db.session.remove()
+
+        path, handler = _HANDLERS[kind]
+        with app.test_request_context(
+            path,
+            method="POST",
+            json=body,
+            headers={"User-Agent": user_agent or ""},
+            environ_base={"REMOTE_ADDR": remote_addr or ""},
+        ):
+            session.update(snapshot)
+            g.on_evaluation_field = on_field
+            try:
+                response = app.make_response(handler(allow_async=False))
+                result = response.get_json()
+                result_status = response.status_code
+            except Exception as e:
+                # The job still has to be finished, so it is logged with its
+                # traceback and recorded as a 500, as Flask would answer.
+                logger.exception("Evaluation job %s raised", job_id)
+                result, result_status = {"error": str(e)}, 500
+            updates = {
+                key: value
+                for key, value in session.items()
+                if snapshot.get(key) != value
+            }
+
+        with app.app_context():
+            job = db.session.get(EvaluationJob, job_id)
+            job.status = "done" if result_status < 500 else "failed"
+            job.response_json = result
+            job.response_status = result_status
+            job.session_updates = updates
+            job.finished_at = datetime.now(UTC)
+            db.session.commit()
+            _prune_finished_jobs()
+            db.session.remove()
+
+        logger.info("Evaluation job %s finished with %s", job_id, result_status)
+    except Exception:
+        logger.exception("Evaluation job %s could not be run", job_id)
+    finally:
+        _release_slot()
+
+
+def _prune_finished_jobs():
+    # Naive UTC, like created_at itself; see prune_visits in routes/pages.py.
+    cutoff = (datetime.now(UTC) - _RETENTION).replace(tzinfo=None)
+    db.session.query(EvaluationJob).filter(
+        EvaluationJob.created_at < cutoff,
+        EvaluationJob.status.in_(("done", "failed")),
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def expire_if_stale(job):
+    """Fail a job whose instance went away before finishing it."""
+    if job.status not in ("pending", "running") or not job.created_at:
+        return job
+
+    created_at = job.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=UTC)
+    age = datetime.now(UTC) - created_at
+    if age.total_seconds() < SETTINGS.ASYNC_EVALUATION_STALE_AFTER_SECONDS:
+        return job
+
+    logger.warning("Evaluation job %s went stale while %s", job.id, job.status)
+    job.status = "failed"
+    job.response_status = 503
+    job.response_json = {"error": "Evaluation was interrupted. Please resubmit."}
+    job.finished_at = datetime.now(UTC)
+    db.session.commit()
+    return job
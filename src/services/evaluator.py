@@ -3,11 +3,15 @@ import logging
 import random
 from typing import Dict
 
-from google.genai import types
-
 from config import get_settings
 from data.argument_structures import ARGUMENT_STRUCTURE_LONG
+from lazy import LazyModule
 from services.base_evaluator import BaseEvaluator
+from services.evaluation_cache import (
+    cache_key,
+    get_cached_evaluation,
+    store_evaluation,
+)
 from services.llm import (
     SYSTEM_INSTRUCTION_CHALLENGE_DE,
     SYSTEM_INSTRUCTION_CHALLENGE_EN,
@@ -15,6 +19,75 @@ from services.llm import (
 
 SETTINGS = get_settings()
 logger = logging.getLogger(__name__)
+# google.genai takes a noticeable share of a cold start to import; see lazy.py.
+types = LazyModule("google.genai.types")
+
+
+class IncrementalObjectParser:
+    """Yield the top-level members of a streamed JSON object as each completes.
+
+    The scored response is a flat object (RESPONSE_SCHEMA), so a member is
+    complete once its value decodes. Strings, objects and arrays carry their own
+    closing delimiter; a number or literal at the very end of the buffer may
+    still be growing ("1" of "10"), so those wait for the next `,` or `}`.
+
+    Raises ValueError if the text is not a JSON object, in which case the caller
+    simply stops forwarding fields and leaves the verdict to json.loads.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._decoder = json.JSONDecoder()
+
+    def _skip_whitespace(self, index):
+        while index < len(self._buffer) and self._buffer[index] in " \t\r\n":
+            index += 1
+        return index
+
+    def feed(self, text):
+        """Add a chunk and return the (name, value) pairs it completed."""
+        self._buffer += text
+        completed = []
+        while True:
+            index = self._skip_whitespace(self._pos)
+            if index >= len(self._buffer):
+                break
+            if not self._started:
+                if self._buffer[index] != "{":
+                    raise ValueError("Streamed response is not a JSON object")
+                self._started = True
+                self._pos = index + 1
+                continue
+
+            if self._buffer[index] == ",":
+                index = self._skip_whitespace(index + 1)
+            if index >= len(self._buffer) or self._buffer[index] == "}":
+                break
+
+            try:
+                name, index = self._decoder.raw_decode(self._buffer, index)
+            except json.JSONDecodeError:
+                break
+            index = self._skip_whitespace(index)
+            if index >= len(self._buffer):
+                break
+            if self._buffer[index] != ":":
+                raise ValueError("Streamed response is not a JSON object")
+            index = self._skip_whitespace(index + 1)
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, index)
+            except json.JSONDecodeError:
+                break
+            if not isinstance(value, (str, dict, list)) and self._skip_whitespace(
+                end
+            ) >= len(self._buffer):
+                break
+
+            completed.append((name, value))
+            self._pos = end
+        return completed
 
 
 class DummyEvaluator(BaseEvaluator):
@@ -26,7 +99,10 @@ class DummyEvaluator(BaseEvaluator):
         counterargument: str,
         input_mode: str = None,
         voice_answer: str = None,
+        on_field=None,
     ) -> Dict:
+        # There is no generation to stream here; on_field is accepted so the
+        # streamed submission path works unchanged in development.
         scores = {
             "Relevance": random.randint(1, 10),
             "Logical Structure": random.randint(1, 10),
@@ -174,7 +250,16 @@ class LLMEvaluator(BaseEvaluator):
         counterargument: str,
         input_mode: str = None,
         voice_answer: str = None,
+        on_field=None,
     ) -> Dict:
+        """Score an answer.
+
+        With `on_field`, the response is streamed and on_field(name, value) is
+        called for each RESPONSE_SCHEMA field as soon as it is complete. The
+        returned evaluation is parsed from the full text either way, so it is
+        the same dict the non-streamed call produces. A cache hit returns at
+        once without calling on_field.
+        """
         from flask import session
 
         language = session.get("language", SETTINGS.DEFAULT_LANGUAGE)
@@ -192,6 +277,22 @@ class LLMEvaluator(BaseEvaluator):
             claim = full_answer
             argument = full_answer
 
+        # A repeat of an input already evaluated under the same model and prompt
+        # skips the Vertex call entirely. See services/evaluation_cache.py.
+        key = cache_key(
+            question_text,
+            claim,
+            argument,
+            counterargument,
+            language,
+            input_mode,
+            system_instruction,
+            self.response_schema,
+        )
+        cached = get_cached_evaluation(key)
+        if cached is not None:
+            return cached
+
         prompt = self.build_argument_prompt(
             question_text, claim, argument, counterargument, input_mode
         )
@@ -203,14 +304,14 @@ class LLMEvaluator(BaseEvaluator):
         logger.debug(prompt)
 
         try:
-            response = self.client.models.generate_content(
-                model=SETTINGS.MODEL,
-                contents=[
+            generation = {
+                "model": SETTINGS.MODEL,
+                "contents": [
                     types.Content(
                         role="user", parts=[types.Part.from_text(text=prompt)]
                     )
                 ],
-                config=types.GenerateContentConfig(
+                "config": types.GenerateContentConfig(
                     temperature=0,
                     top_p=0,
                     top_k=1,
@@ -234,14 +335,18 @@ class LLMEvaluator(BaseEvaluator):
                     response_schema=self.response_schema,
                     system_instruction=[types.Part.from_text(text=system_instruction)],
                 ),
-            )
+            }
+            if on_field is None:
+                text = self.client.models.generate_content(**generation).text
+            else:
+                text = self._stream_fields(generation, on_field)
 
             try:
-                return self._parse_response(json.loads(response.text))
+                evaluation = self._parse_response(json.loads(text))
             except (json.JSONDecodeError, KeyError) as e:
                 logger.error(f"Failed to parse LLM response: {e}")
                 logger.debug(f"Prompt used: {prompt}")
-                logger.debug(f"Raw response: {response.text}")
+                logger.debug(f"Raw response: {text}")
                 raise
 
         except Exception as e:
@@ -250,6 +355,32 @@ class LLMEvaluator(BaseEvaluator):
             logger.debug(f"System instruction used: {system_instruction}")
             raise
 
+        # Only a parsed, complete evaluation is stored; a failure above never is.
+        store_evaluation(key, evaluation)
+        return evaluation
+
+    def _stream_fields(self, generation, on_field) -> str:
+        """Stream the generation, reporting fields as they complete.
+
+        Returns the full response text for the normal parse.
+        """
+        parser = IncrementalObjectParser()
+        chunks = []
+        for chunk in self.client.models.generate_content_stream(**generation):
+            if not chunk.text:
+                continue
+            chunks.append(chunk.text)
+            if parser is None:
+                continue
+            try:
+                for name, value in parser.feed(chunk.text):
+                    on_field(name, value)
+            except ValueError as e:
+                # Forwarding is best effort; the full parse decides the outcome.
+                logger.warning(f"Stopped forwarding streamed fields: {e}")
+                parser = None
+        return "".join(chunks)
+
     def build_challenge_prompt(self, answer, challenge_response: str) -> str:
         from flask import session
 
@@ -0,0 +1,184 @@
+"""A user's answer history, one keyset page at a time.
+
+The profile used to page with LIMIT/OFFSET behind a COUNT(*): page 40 of a Pro
+user's history read and threw away 390 rows to show 10, and every page counted
+all of them again. Pages here are keyset pages on (created_at DESC, id DESC),
+served by ix_answer_user_created_id, so any page costs what the first one does.
+
+A page is addressed by a cursor: the (created_at, id) of the row it continues
+from, the direction, and how many rows are newer than that point. The position
+is what lets a capped tier (TIER_HISTORY_LIMITS) stop at its window without a
+count. Cursors are HMACed under SECRET_KEY, like share tokens
+(services/share_service.py). Without the signature, editing the position would
+get a free tier past its cap. They also name the user they were minted for, so
+one account's cursor, and its position, is not accepted for another.
+"""
+
+import base64
+import hmac
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from hashlib import sha256
+
+from sqlalchemy import select, tuple_
+
+from config import get_settings
+from extensions import db
+from models import ANSWER_PROFILES, Answer
+from services.achievement_service import get_question_category
+
+SETTINGS = get_settings()
+
+PAGE_SIZE = 10
+# The most an API caller may ask for in one page.
+MAX_PAGE_SIZE = 50
+
+_SIG_LENGTH = 16
+
+
+class InvalidCursor(ValueError):
+    """A cursor that was not minted here, or has been tampered with."""
+
+
+def _signature(payload: str) -> str:
+    return hmac.new(
+        SETTINGS.SECRET_KEY.encode(), f"history:{payload}".encode(), sha256
+    ).hexdigest()[:_SIG_LENGTH]
+
+
+def encode_cursor(direction, answer, position):
+    raw = json.dumps(
+        [
+            answer.user_uuid,
+            direction,
+            answer.created_at.isoformat(),
+            answer.id,
+            position,
+        ],
+        separators=(",", ":"),
+    )
+    payload = base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+    return f"{payload}.{_signature(payload)}"
+
+
+def decode_cursor(token, user_uuid):
+    """(direction, created_at, answer_id, position); raises InvalidCursor.
+
+    Also raised for a cursor minted for anyone but `user_uuid`.
+    """
+    payload, _, signature = (token or "").rpartition(".")
+    if not payload or not hmac.compare_digest(signature, _signature(payload)):
+        raise InvalidCursor(token)
+    try:
+        raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        owner, direction, created_at, answer_id, position = json.loads(raw)
+        created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(token) from e
+    if owner != user_uuid:
+        raise InvalidCursor(token)
+    return direction, created_at, answer_id, position
+
+
+def history_cap(tier):
+    """How many of its most recent answers `tier` may browse; None for all."""
+    return SETTINGS.TIER_HISTORY_LIMITS.get(tier, SETTINGS.TIER_HISTORY_LIMITS["free"])
+
+
+@dataclass(frozen=True)
+class HistoryPage:
+    answers: list
+    # Rows newer than the first answer on this page.
+    position: int
+    older: str | None
+    newer: str | None
+
+
+def history_page(user_uuid, cursor=None, size=PAGE_SIZE, cap=None, profile="summary"):
+    """One page of `user_uuid`'s answers, newest first.
+
+    `cap` is the tier's history limit (None for unlimited). `profile` names
+    the ANSWER_PROFILES column set to load.
+    """
+    direction, position = "older", 0
+    key = (Answer.created_at, Answer.id)
+    query = (
+        select(Answer)
+        .options(*ANSWER_PROFILES[profile])
+        .where(Answer.user_uuid == user_uuid)
+    )
+    if cursor:
+        direction, created_at, answer_id, position = decode_cursor(cursor, user_uuid)
+        boundary = (created_at, answer_id)
+        if direction == "older":
+            query = query.where(tuple_(*key) < boundary)
+        else:
+            query = query.where(tuple_(*key) > boundary)
+
+    if direction == "older":
+        if cap is not None:
+            size = max(0, min(size, cap - position))
+            if size == 0:
+                return HistoryPage([], position, None, None)
+        # One row past the page says whether there is another after it.
+        query = query.order_by(*(column.desc() for column in key)).limit(size + 1)
+        answers = list(db.session.scalars(query))
+        more = len(answers) > size
+        answers = answers[:size]
+    else:
+        query = query.order_by(*key).limit(size)
+        answers = list(db.session.scalars(query))[::-1]
+        # The newer page ends where the one it came from began.
+        position = max(position - len(answers), 0)
+        more = True
+
+    if not answers:
+        return HistoryPage([], position, None, None)
+    end = position + len(answers)
+    if cap is not None and end >= cap:
+        more = False
+    return HistoryPage(
+        answers,
+        position,
+        older=encode_cursor("older", answers[-1], end) if more else None,
+        newer=encode_cursor("newer", answers[0], position) if position else None,
+    )
+
+
+def category_for(answer):
+    if answer.question_id and answer.question_id.startswith("custom_"):
+        return "Custom"
+    return get_question_category(answer.question_id)
+
+
+def summary_row(answer):
+    """The compact JSON for one history entry: no free text but the question."""
+    return {
+        "id": answer.id,
+        "question_id": answer.question_id,
+        "question_text": answer.question_text,
+        "category": category_for(answer),
+        "created_at": answer.created_at.isoformat(),
+        "input_mode": answer.input_mode,
+        "evaluation_scores": answer.evaluation_scores or {},
+        "challenge_evaluation_scores": answer.challenge_evaluation_scores or {},
+        "total_xp": answer.total_xp,
+    }
+
+
+def detail_row(answer):
+    """Everything an expanded history entry shows, feedback included."""
+    return {
+        "id": answer.id,
+        "question_text": answer.question_text,
+        "claim": answer.claim,
+        "argument": answer.argument,
+        "counterargument": answer.counterargument,
+        "evaluation_scores": answer.evaluation_scores or {},
+        "evaluation_feedback": answer.evaluation_feedback or {},
+        "challenge": answer.challenge,
+        "challenge_response": answer.challenge_response,
+        "challenge_evaluation_scores": answer.challenge_evaluation_scores or {},
+        "challenge_evaluation_feedback": answer.challenge_evaluation_feedback or {},
+    }
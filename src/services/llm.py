@@ -1,18 +1,9 @@
-from google import genai
-
 from config import get_settings
-from extensions import google_credentials as CREDENTIALS
 from utils import auto_dedent
 
 SETTINGS = get_settings()
 
-
-CLIENT = genai.Client(
-    vertexai=True,
-    credentials=CREDENTIALS,
-    project=SETTINGS.GCLOUD_PROJECT_NAME,
-    location=SETTINGS.GCLOUD_PROJECT_REGION,
-)
+# The Vertex AI client is extensions.vertex_client(), built on first use.
 
 # Shared by every system instruction. Without it each model picks its own register:
 # gemini-2.5-flash addressed German users with formal "Sie", gemini-3.5-flash-lite
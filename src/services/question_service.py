@@ -1,42 +1,79 @@
+"""The question catalog: one immutable index per language, built once.
+
+Every question lookup used to open and `json.load` the whole
+`static/translations/<lang>.json` (~68 KB) — on each submission to find the
+question text, on each random pick, and once per answer on the profile page and
+in the achievement checks via `get_question_category`. The result went into a
+single module-global cache that both languages overwrote in turn.
+
+Now each language gets a `QuestionCatalog`, built at startup
+(`preload_catalogs`) from the parsed file that services/translation_service.py
+shares, and rebuilt only when the file's mtime changes. Lookups by
+id or category are dict hits, and `/get_all_questions` sends bytes serialized
+once at build time. A catalog is never mutated after it is built, so a request
+holding one is unaffected by a rebuild that happens under it.
+"""
+
+import base64
 import json
-from pathlib import Path
-from random import choice
+import random
+import threading
+import zlib
+from dataclasses import dataclass
+from types import MappingProxyType
 
-from flask import current_app, session
+from flask import session
 from flask_login import current_user
+from sqlalchemy import select
 
 from config import get_settings
+from extensions import db
 from models import Answer
+from services.translation_service import get_translations, translations_path
 from src.constants.categories import DEFAULT_CATEGORIES
 
 SETTINGS = get_settings()
-_questions_cache = None
 
+_catalogs = {}
+_catalogs_lock = threading.Lock()
 
-def load_questions():
-    global _questions_cache
-    language = session.get("language", "en")
 
-    # Ensure we're using a supported language
-    if language not in SETTINGS.SUPPORTED_LANGUAGES:
-        session["language"] = SETTINGS.DEFAULT_LANGUAGE
+@dataclass(frozen=True)
+class QuestionCatalog:
+    """Every question of one language, indexed for O(1) lookups.
 
-    # Always reload questions when language changes
-    translations_path = (
-        Path(current_app.root_path) / "static" / "translations" / f"{language}.json"
-    )
+    The question dicts are shared by every request; treat them as read-only.
+    """
+
+    language: str
+    mtime: float
+    # category -> tuple of question dicts, in file order
+    by_category: MappingProxyType
+    by_id: MappingProxyType
+    category_by_id: MappingProxyType
+    ids_by_category: MappingProxyType
+    # Every id in file order; a question's position here is its bit in the
+    # seen-questions bitmap.
+    ids: tuple
+    index_by_id: MappingProxyType
+    indices_by_category: MappingProxyType
+    # A checksum of `ids`, stored with the bitmap so a bitmap written against
+    # a different ordering is recognised and dropped rather than misread.
+    order_key: str
+    # The /get_all_questions response body
+    all_questions_json: bytes
 
-    with open(translations_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    @classmethod
+    def build(cls, translations):
+        data = translations.data
         questions_data = data.get("questions", {})
         # Optional worked example per question, used by the "Try an example"
         # button to prefill the form. Most questions have none, and the button
         # is hidden in that case.
         examples = data.get("exampleAnswers", {})
 
-        # Transform the data into the format expected by the application
-        _questions_cache = {
-            category: [
+        by_category = {
+            category: tuple(
                 {
                     "id": question_id,
                     "description": question_text,
@@ -46,93 +83,202 @@ def load_questions():
                 for question_id, question_text in questions_data.get(
                     category, {}
                 ).items()
-            ]
+            )
             for category in DEFAULT_CATEGORIES
         }
+        all_questions = [q for questions in by_category.values() for q in questions]
+        ids = tuple(q["id"] for q in all_questions)
+        index_by_id = {question_id: index for index, question_id in enumerate(ids)}
+        return cls(
+            language=translations.language,
+            mtime=translations.mtime,
+            by_category=MappingProxyType(by_category),
+            by_id=MappingProxyType({q["id"]: q for q in all_questions}),
+            category_by_id=MappingProxyType(
+                {q["id"]: q["category"] for q in all_questions}
+            ),
+            ids_by_category=MappingProxyType(
+                {
+                    category: tuple(q["id"] for q in questions)
+                    for category, questions in by_category.items()
+                }
+            ),
+            ids=ids,
+            index_by_id=MappingProxyType(index_by_id),
+            indices_by_category=MappingProxyType(
+                {
+                    category: tuple(index_by_id[q["id"]] for q in questions)
+                    for category, questions in by_category.items()
+                }
+            ),
+            order_key=format(zlib.crc32("\n".join(ids).encode("utf-8")), "08x"),
+            all_questions_json=json.dumps(all_questions).encode("utf-8"),
+        )
+
 
-    return _questions_cache
+def get_catalog(language=None, root_path=None):
+    """The catalog for `language` (default: the default language), rebuilt if stale.
 
+    Costs one stat() of the translation file per call to notice an edit.
+    """
+    translations = get_translations(language, root_path)
 
-def get_questions():
-    if not current_app:
-        with current_app.app_context():
-            return load_questions()
-    return load_questions()
+    # Keyed by path rather than language, so an app with a different root
+    # (a test, a second instance) never gets another's catalog.
+    key = str(translations_path(translations.language, root_path))
+    catalog = _catalogs.get(key)
+    if catalog is not None and catalog.mtime == translations.mtime:
+        return catalog
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None or catalog.mtime != translations.mtime:
+            catalog = QuestionCatalog.build(translations)
+            _catalogs[key] = catalog
+    return catalog
+
+
+def preload_catalogs(app):
+    """Build every language's catalog, so no request pays for the first parse."""
+    for language in SETTINGS.SUPPORTED_LANGUAGES:
+        get_catalog(language, root_path=app.root_path)
 
 
 def get_fixed_question():
     """Get the experiences vs possessions question from Personal Growth category"""
-    questions = get_questions()
-    personal_growth_questions = questions.get("Personal Growth & Relationships", [])
-    for question in personal_growth_questions:
-        if question["id"] == SETTINGS.DEFAULT_QUESTION:
-            return question
+    question = get_catalog(session.get("language")).by_id.get(SETTINGS.DEFAULT_QUESTION)
+    if question and question["category"] == "Personal Growth & Relationships":
+        return question
     return None
 
 
-def get_random_question(categories=None):
-    filtered = []
-    all_questions = get_questions()
-    seen_question_ids = session.get("seen_question_ids", [])
-
-    # Get list of answered question IDs for the current user
-    answered_question_ids = []
-    if current_user and current_user.is_authenticated:
-        # Query the database for questions this user has already answered
-        answers = Answer.query.filter_by(user_uuid=current_user.uuid).all()
-        answered_question_ids = [
-            answer.question_id for answer in answers if answer.question_id
-        ]
-    elif "user_id" in session:
-        # For non-authenticated users with a session user_id
-        answers = Answer.query.filter_by(user_uuid=session["user_id"]).all()
-        answered_question_ids = [
-            answer.question_id for answer in answers if answer.question_id
-        ]
-
-    # First try: filter out both seen and answered questions
-    for category, questions in all_questions.items():
-        if not categories or category in categories:
-            filtered.extend(
-                [
-                    q
-                    for q in questions
-                    if q["id"] not in seen_question_ids
-                    and q["id"] not in answered_question_ids
-                ]
-            )
+# Draws tried at random before falling back to a pass over the candidates.
+_RANDOM_DRAWS = 16
 
-    # If no questions left, try showing seen but not answered questions
-    if not filtered:
-        for category, questions in all_questions.items():
-            if not categories or category in categories:
-                filtered.extend(
-                    [q for q in questions if q["id"] not in answered_question_ids]
-                )
-
-    # If still no questions, show all questions (including answered ones)
-    if not filtered:
-        for category, questions in all_questions.items():
-            if not categories or category in categories:
-                filtered.extend(questions)
-
-    # Add the chosen question to seen_question_ids
-    if filtered:
-        chosen = choice(filtered)
-        session.setdefault("seen_question_ids", []).append(chosen["id"])
-        return chosen
 
-    return None
+def _seen_bitmap(catalog):
+    """This session's seen questions as a bytearray, one bit per catalog index.
+
+    Stored in the cookie as "<order_key>:<base64>", a few dozen bytes however
+    many questions have been seen. The id list it replaces grew by one entry
+    (~60 bytes) per question shown and was resent with every request.
+    """
+    bitmap = bytearray((len(catalog.ids) + 7) // 8)
+    stored = session.get("seen_questions", "")
+    order_key, _, encoded = stored.partition(":")
+    if order_key == catalog.order_key and encoded:
+        decoded = base64.b64decode(encoded)
+        bitmap[: len(decoded)] = decoded[: len(bitmap)]
+
+    # Sessions from before the bitmap carry the id list; fold it in once.
+    legacy = session.pop("seen_question_ids", None)
+    if legacy is not None:
+        for question_id in legacy:
+            _set(bitmap, catalog.index_by_id.get(question_id))
+        _store_bitmap(catalog, bitmap)
+    return bitmap
+
+
+def _store_bitmap(catalog, bitmap):
+    session["seen_questions"] = (
+        f"{catalog.order_key}:{base64.b64encode(bytes(bitmap)).decode('ascii')}"
+    )
 
 
-def get_all_questions():
-    return [q for category in get_questions().values() for q in category]
+def _set(bitmap, index):
+    if index is not None:
+        bitmap[index >> 3] |= 1 << (index & 7)
+
+
+def _is_set(bitmap, index):
+    return bitmap[index >> 3] & (1 << (index & 7))
+
+
+def has_seen_questions():
+    """True once this session has been shown any catalog question."""
+    return any(_seen_bitmap(get_catalog(session.get("language"))))
+
+
+def mark_question_seen(question_id):
+    catalog = get_catalog(session.get("language"))
+    bitmap = _seen_bitmap(catalog)
+    _set(bitmap, catalog.index_by_id.get(question_id))
+    _store_bitmap(catalog, bitmap)
+
+
+def answered_question_ids(user_uuid):
+    """The ids of the catalog questions this user has answered, as a set.
+
+    Selects the one column, rather than loading every answer in full — both
+    JSON columns included — to read it.
+    """
+    if not user_uuid:
+        return set()
+    return set(
+        db.session.scalars(
+            select(Answer.question_id)
+            .where(Answer.user_uuid == user_uuid, Answer.question_id.is_not(None))
+            .distinct()
+        )
+    )
+
+
+def _pick(pools, accept):
+    """A random index from `pools` (tuples of catalog indices) that `accept`s.
+
+    A few draws at random first, which is all it takes while most questions
+    are still unseen; then one pass over every candidate, so the worst case is
+    still bounded by the size of the catalog and never loops.
+    """
+    total = sum(len(pool) for pool in pools)
+    if not total:
+        return None
+    for _ in range(_RANDOM_DRAWS):
+        offset = random.randrange(total)
+        for pool in pools:
+            if offset < len(pool):
+                index = pool[offset]
+                break
+            offset -= len(pool)
+        if accept(index):
+            return index
+    candidates = [index for pool in pools for index in pool if accept(index)]
+    return random.choice(candidates) if candidates else None
+
+
+def get_random_question(categories=None):
+    catalog = get_catalog(session.get("language"))
+    pools = [
+        indices
+        for category, indices in catalog.indices_by_category.items()
+        if not categories or category in categories
+    ]
+    seen = _seen_bitmap(catalog)
+
+    user_uuid = (
+        current_user.uuid
+        if current_user and current_user.is_authenticated
+        else session.get("user_id")
+    )
+    answered = {
+        catalog.index_by_id[question_id]
+        for question_id in answered_question_ids(user_uuid)
+        if question_id in catalog.index_by_id
+    }
+
+    # First try: neither seen nor answered. Then seen but not answered. Then
+    # anything, answered ones included.
+    index = _pick(pools, lambda i: i not in answered and not _is_set(seen, i))
+    if index is None:
+        index = _pick(pools, lambda i: i not in answered)
+    if index is None:
+        index = _pick(pools, lambda i: True)
+    if index is None:
+        return None
+
+    chosen = catalog.by_id[catalog.ids[index]]
+    mark_question_seen(chosen["id"])
+    return chosen
 
 
 def find_question_by_id(question_id):
-    questions = get_questions()
-    for questions in questions.values():
-        for q in questions:
-            if q["id"] == question_id:
-                return q
-    return None
+    return get_catalog(session.get("language")).by_id.get(question_id)
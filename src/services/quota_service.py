@@ -0,0 +1,150 @@
+"""Quota usage: read in one round trip, spent in one atomic statement.
+
+Usage lives in `quota_ledger`, one row per (user, resource, period), where the
+period is the calendar month ("2026-10") or, for daily voice, the day
+("2026-10-18"), in UTC. A new period is simply a new row, so nothing is ever
+reset: not on read, and not on write.
+
+Spending goes through `consume`, a single
+INSERT ... ON CONFLICT DO UPDATE SET count = count + 1 WHERE count < limit
+RETURNING count. The limit check and the increment are one statement, so two
+submissions landing together cannot both take the last unit, and no increment
+is lost to a read-modify-write. It used to be a read of the user row, a reset
+commit at month rollover, and a Python-side `+= 1` committed later.
+
+Reads go through QuotaSnapshot, which fetches every counter a page or a limit
+check needs — including today's evaluations, which are counted from answers
+rather than kept as a counter — in one SELECT and writes nothing.
+
+The old users.monthly_*_count / last_monthly_*_reset / daily_voice_count
+columns are no longer read or written; migration a9d4e7c2f610 copied the
+current period's values into the ledger.
+"""
+
+from dataclasses import dataclass
+from datetime import UTC, datetime, time
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from extensions import db
+from models import Answer, QuotaLedger
+
+# resource -> whether its allowance is per day rather than per month.
+RESOURCES = {
+    "eval": False,
+    "voice": False,
+    "voice_daily": True,
+    "deep_analysis": False,
+}
+
+
+def period_for(resource, now=None):
+    now = now or datetime.now(UTC)
+    return now.strftime("%Y-%m-%d" if RESOURCES[resource] else "%Y-%m")
+
+
+def _insert():
+    # Both dialects spell the upsert the same way; only the import differs.
+    if db.engine.dialect.name == "sqlite":
+        return sqlite_insert(QuotaLedger)
+    return postgresql_insert(QuotaLedger)
+
+
+def consume(user_uuid, resource, limit):
+    """Take one unit of `resource` if fewer than `limit` are used this period.
+
+    Returns the new count, or None when the allowance is exhausted, in which
+    case nothing was changed. Commits, so the row lock is not held across
+    whatever the caller does next — usually a model call.
+    """
+    if limit <= 0:
+        return None
+
+    statement = _insert().values(
+        user_uuid=user_uuid,
+        resource=resource,
+        period=period_for(resource),
+        count=1,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_uuid", "resource", "period"],
+        set_={"count": QuotaLedger.count + 1},
+        where=QuotaLedger.count < limit,
+    ).returning(QuotaLedger.count)
+    count = db.session.execute(statement).scalar()
+    db.session.commit()
+    return count
+
+
+def refund(user_uuid, resource):
+    """Give back one unit taken by `consume`, when the thing it paid for failed."""
+    db.session.execute(
+        update(QuotaLedger)
+        .where(
+            QuotaLedger.user_uuid == user_uuid,
+            QuotaLedger.resource == resource,
+            QuotaLedger.period == period_for(resource),
+            QuotaLedger.count > 0,
+        )
+        .values(count=QuotaLedger.count - 1)
+    )
+    db.session.commit()
+
+
+def _usage(user_uuid, resource, now):
+    return (
+        select(QuotaLedger.count)
+        .where(
+            QuotaLedger.user_uuid == user_uuid,
+            QuotaLedger.resource == resource,
+            QuotaLedger.period == period_for(resource, now),
+        )
+        .scalar_subquery()
+    )
+
+
+@dataclass(frozen=True)
+class QuotaSnapshot:
+    daily_evaluations: int = 0
+    daily_voice: int = 0
+    monthly_evaluations: int = 0
+    monthly_voice: int = 0
+    monthly_deep_analyses: int = 0
+
+    @classmethod
+    def load(cls, user_uuid):
+        """The snapshot for `user_uuid`; all zeros for a visitor with no usage."""
+        if not user_uuid:
+            return cls()
+
+        now = datetime.now(UTC)
+        # Naive, as created_at is stored; see prune_visits in routes/pages.py.
+        today_start = datetime.combine(now.date(), time.min)
+        # Each initial answer counts as one evaluation and its challenge
+        # response, if any, as another. count() skips NULLs, so the second
+        # count is exactly the answers that have one.
+        daily_evaluations = (
+            select(func.count(Answer.id) + func.count(Answer.challenge_response))
+            .where(Answer.user_uuid == user_uuid, Answer.created_at >= today_start)
+            .scalar_subquery()
+        )
+        row = db.session.execute(
+            select(
+                daily_evaluations,
+                _usage(user_uuid, "voice_daily", now),
+                _usage(user_uuid, "eval", now),
+                _usage(user_uuid, "voice", now),
+                _usage(user_uuid, "deep_analysis", now),
+            )
+        ).one()
+
+        daily_evals, daily_voice, monthly_evals, monthly_voice, monthly_deep = row
+        return cls(
+            daily_evaluations=daily_evals or 0,
+            daily_voice=daily_voice or 0,
+            monthly_evaluations=monthly_evals or 0,
+            monthly_voice=monthly_voice or 0,
+            monthly_deep_analyses=monthly_deep or 0,
+        )
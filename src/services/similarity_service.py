@@ -0,0 +1,201 @@
+"""Near-duplicate detection for submitted answers, before anything is paid for.
+
+A resubmission of an answer the user already has is rejected with
+`similarAnswer`. That used to be decided after the evaluation, by loading every
+prior answer of the user in full and running SequenceMatcher over each one: an
+O(history) scan that also threw the Vertex call away whenever it matched.
+
+Now each stored answer leaves a MinHash fingerprint of its argument in
+`answer_fingerprints`, split into LSH bands. A new submission computes its own
+bands and looks up only the prior answers that share at least one, through the
+(user_uuid, bucket) index — a handful of rows however long the history is. The
+exact rule is unchanged and runs on those candidates alone: claim, argument and
+(when both have one) counterargument each above SIMILARITY_THRESHOLD.
+
+Only the argument is fingerprinted. A duplicate needs a similar argument anyway,
+and it is the longest, most distinctive field, so it makes the tightest
+candidate set. With 16 bands of 2 rows, two arguments whose 4-gram shingles
+overlap by a Jaccard of 0.5 become candidates >99% of the time, and 0.3 still
+~80% — well below the overlap a 0.8 SequenceMatcher ratio implies. A spurious
+candidate costs one exact comparison.
+
+Answers stored before the table existed have no fingerprint; `flask
+backfill_fingerprints` fills them in.
+"""
+
+import hashlib
+import logging
+import random
+import re
+from difflib import SequenceMatcher
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import load_only
+
+from config import get_settings
+from extensions import db
+from models import Answer, AnswerFingerprint
+
+SETTINGS = get_settings()
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 4
+BANDS = 16
+ROWS_PER_BAND = 2
+NUM_PERMUTATIONS = BANDS * ROWS_PER_BAND
+
+# Universal hashing modulo a Mersenne prime. The coefficients are fixed by seed:
+# a stored fingerprint is only comparable with one computed the same way, so
+# changing any of these constants means re-running the backfill.
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20261018)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _shingles(text):
+    # Case and spacing are normalised for candidate generation only; the exact
+    # check below still compares the text as submitted.
+    normalised = _WHITESPACE.sub(" ", (text or "").lower()).strip()
+    if not normalised:
+        return set()
+    if len(normalised) <= SHINGLE_SIZE:
+        return {normalised}
+    return {
+        normalised[i : i + SHINGLE_SIZE]
+        for i in range(len(normalised) - SHINGLE_SIZE + 1)
+    }
+
+
+def _hash64(value):
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+def minhash_signature(text):
+    """NUM_PERMUTATIONS minimum hashes over the text's shingles; [] if empty."""
+    hashes = [_hash64(shingle) for shingle in _shingles(text)]
+    if not hashes:
+        return []
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_buckets(signature):
+    """One bucket id per band, as signed 64-bit ints for a BIGINT column."""
+    buckets = []
+    for band in range(len(signature) // ROWS_PER_BAND):
+        rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        key = f"{band}:" + ",".join(str(row) for row in rows)
+        buckets.append(_hash64(key) - (1 << 63))
+    return buckets
+
+
+def _is_similar(claim, argument, counterargument, existing):
+    threshold = SETTINGS.SIMILARITY_THRESHOLD
+    if SequenceMatcher(None, claim, existing.claim).ratio() <= threshold:
+        return False
+    if SequenceMatcher(None, argument, existing.argument).ratio() <= threshold:
+        return False
+
+    # Only consider the counterargument if both submissions have one. If one has
+    # a counterargument and the other doesn't, they are treated as different.
+    existing_counter = (existing.counterargument or "").strip()
+    if bool(counterargument) != bool(existing_counter):
+        return False
+    if not counterargument:
+        return True
+    return SequenceMatcher(None, counterargument, existing_counter).ratio() > threshold
+
+
+def find_similar_answer(user_uuid, claim, argument, counterargument):
+    """The id of an earlier answer by this user that this one duplicates, or None.
+
+    `counterargument` is expected trimmed, with "" or None for none.
+    """
+    buckets = band_buckets(minhash_signature(argument))
+    if not user_uuid or not buckets:
+        return None
+
+    candidate_ids = (
+        select(AnswerFingerprint.answer_id)
+        .where(
+            AnswerFingerprint.user_uuid == user_uuid,
+            AnswerFingerprint.bucket.in_(buckets),
+        )
+        .distinct()
+    )
+    candidates = (
+        Answer.query.options(
+            load_only(Answer.id, Answer.claim, Answer.argument, Answer.counterargument)
+        )
+        .filter(Answer.id.in_(candidate_ids), Answer.user_uuid == user_uuid)
+        .all()
+    )
+    logger.debug("Near-duplicate check: %s candidate(s)", len(candidates))
+
+    for existing in candidates:
+        if _is_similar(claim, argument, counterargument, existing):
+            return existing.id
+    return None
+
+
+def add_fingerprint(answer):
+    """Stage the fingerprint rows for a stored answer; the caller commits."""
+    for band, bucket in enumerate(band_buckets(minhash_signature(answer.argument))):
+        db.session.add(
+            AnswerFingerprint(
+                answer_id=answer.id,
+                band=band,
+                user_uuid=answer.user_uuid,
+                bucket=bucket,
+            )
+        )
+
+
+def sync_fingerprint_owner(user_uuid):
+    """Re-key fingerprints after answers were moved to `user_uuid`.
+
+    Login and signup reassign an anonymous visitor's answers; their fingerprints
+    carry the owner too, for the index, and have to follow.
+    """
+    owned = select(Answer.id).where(Answer.user_uuid == user_uuid)
+    db.session.execute(
+        update(AnswerFingerprint)
+        .where(
+            AnswerFingerprint.answer_id.in_(owned),
+            AnswerFingerprint.user_uuid != user_uuid,
+        )
+        .values(user_uuid=user_uuid)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def backfill_fingerprints(batch_size=500):
+    """Fingerprint every answer that has none. Returns how many were added."""
+    fingerprinted = select(AnswerFingerprint.answer_id).distinct()
+    added = 0
+    last_id = ""
+    while True:
+        # Keyset over the id, so an answer whose argument yields no bands (an
+        # empty one) is passed over rather than selected again forever.
+        batch = (
+            Answer.query.options(
+                load_only(Answer.id, Answer.user_uuid, Answer.argument)
+            )
+            .filter(Answer.id > last_id, Answer.id.not_in(fingerprinted))
+            .order_by(Answer.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return added
+        for answer in batch:
+            add_fingerprint(answer)
+        db.session.commit()
+        added += len(batch)
+        last_id = batch[-1].id
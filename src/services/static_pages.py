@@ -0,0 +1,92 @@
+"""Content pages rendered once per language, then served as bytes.
+
+How it works, how to improve, support, privacy, terms and contact contain
+nothing per-user: login state is filled in client-side by auth.js, as on every
+page. Rendering them per request still ran the SEO context processor, rebuilt
+the hreflang alternates and rendered up to 20 KB of Jinja, for traffic that is
+mostly crawlers and first visits.
+
+Each page registers a context builder with `@content_page`, and
+`prerender_pages(app)` renders every page in every supported language when the
+app is created. The rendered bytes, their gzip (and, if the optional `brotli`
+package is installed, brotli) variants and a strong ETag for each are kept on
+the app. A request then costs a dict lookup and a header check.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+
+from flask import current_app, render_template, request, session
+
+from assets import precompress, take_preload_links, variant_response
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+SETTINGS = get_settings()
+
+# endpoint -> (path, context builder)
+_BUILDERS = {}
+
+
+@dataclass(frozen=True)
+class RenderedPage:
+    # content-coding ("identity", "gzip", "br") -> (body, strong ETag)
+    variants: dict
+    # The `Link: rel=preload` values the template asked for.
+    links: tuple = ()
+
+
+def content_page(endpoint, path):
+    """Register `builder(lang) -> (template, context)` for `endpoint`.
+
+    `path` is the unprefixed URL the page is rendered under, which is what the
+    canonical and hreflang links are built from.
+    """
+
+    def register(builder):
+        _BUILDERS[endpoint] = (path, builder)
+        return builder
+
+    return register
+
+
+def _variants(html):
+    body = html.encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:20]
+    variants = {"identity": (body, digest)}
+    # precompress() is deterministic, so the ETags are the same on every
+    # instance.
+    for coding, data in precompress(body).items():
+        variants[coding] = (data, f"{digest}-{coding}")
+    return variants
+
+
+def prerender_pages(app):
+    """Render every registered page in every language onto `app`."""
+    pages = {}
+    for endpoint, (path, builder) in _BUILDERS.items():
+        for lang in SETTINGS.SUPPORTED_LANGUAGES:
+            with app.test_request_context(path, base_url="https://localhost"):
+                # The language comes from the session, as it does per request;
+                # inject_seo and the templates read it from there.
+                session["language"] = lang
+                template, context = builder(lang)
+                html = render_template(template, **context)
+                links = tuple(take_preload_links())
+            pages[endpoint, lang] = RenderedPage(_variants(html), links)
+    app.extensions["content_pages"] = pages
+    logger.info("Pre-rendered %d content pages", len(pages))
+
+
+def content_page_response(endpoint):
+    """This session's language's copy of `endpoint`, compressed if accepted."""
+    lang = session.get("language", SETTINGS.DEFAULT_LANGUAGE)
+    if lang not in SETTINGS.SUPPORTED_LANGUAGES:
+        lang = SETTINGS.DEFAULT_LANGUAGE
+    page = current_app.extensions["content_pages"][endpoint, lang]
+
+    response = variant_response(page.variants, "text/html")
+    if page.links:
+        response.headers["Link"] = ", ".join(page.links)
+    return response.make_conditional(request)
@@ -0,0 +1,144 @@
+"""Translation files, parsed once per language and served as namespaced bundles.
+
+`static/translations/<lang>.json` (~68 KB) holds the UI strings, but also every
+question, every worked example answer and the achievement texts. Every page
+downloaded all of it, however little it showed. On the server the same file
+was parsed separately by the SEO context processor, the question catalog, the
+content pages and the password reset emails.
+
+`get_translations(language)` now parses the file once, and again only when its
+mtime changes, like the question catalog it feeds. At the same time it splits
+the file into bundles: "questions", "examples" and "achievements" hold the
+parts listed in NAMESPACES, and "ui" holds everything else. Each bundle is
+serialized once, compressed, and served from /translations/<lang>/<ns>.json
+with a content-hash ETag (routes/translations.py). Pages name the bundles they
+need in `<html data-i18n-namespaces>`, and translationManager.js merges them
+back into the one object the scripts already read.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+
+from flask import current_app
+
+from assets import precompress
+from config import get_settings
+
+SETTINGS = get_settings()
+
+# namespace -> the dotted paths in the translation file that it holds. The
+# "ui" bundle is whatever no other namespace claims.
+NAMESPACES = {
+    "questions": ("questions",),
+    "examples": ("exampleAnswers",),
+    "achievements": ("profile.achievementData",),
+}
+UI = "ui"
+
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Bundle:
+    # content-coding ("identity", "gzip", "br") -> (body, strong ETag)
+    variants: MappingProxyType
+
+
+@dataclass(frozen=True)
+class Translations:
+    """One language's parsed translation file and its bundles.
+
+    `data` is shared by every request; treat it as read-only.
+    """
+
+    language: str
+    mtime: float
+    data: dict
+    bundles: MappingProxyType
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    @classmethod
+    def build(cls, language, path):
+        mtime = os.stat(path).st_mtime
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            language=language,
+            mtime=mtime,
+            data=data,
+            bundles=MappingProxyType(
+                {name: _bundle(part) for name, part in split(data).items()}
+            ),
+        )
+
+
+def split(data):
+    """{namespace: part of `data`}; merging the parts back gives `data`."""
+    ui = _copy_dicts(data)
+    parts = {}
+    for name, paths in NAMESPACES.items():
+        part = {}
+        for path in paths:
+            *parents, key = path.split(".")
+            source, target = ui, part
+            for parent in parents:
+                source = source.get(parent, {})
+                target = target.setdefault(parent, {})
+            if key in source:
+                target[key] = source.pop(key)
+        parts[name] = part
+    parts[UI] = ui
+    return parts
+
+
+def _copy_dicts(data):
+    # Only the dicts along a split path are mutated, but copying them all is
+    # simpler and happens once per file.
+    if isinstance(data, dict):
+        return {key: _copy_dicts(value) for key, value in data.items()}
+    return data
+
+
+def _bundle(part):
+    body = json.dumps(part, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:20]
+    variants = {"identity": (body, digest)}
+    for coding, data in precompress(body).items():
+        variants[coding] = (data, f"{digest}-{coding}")
+    return Bundle(MappingProxyType(variants))
+
+
+def translations_path(language, root_path=None):
+    root = Path(root_path or current_app.root_path)
+    return root / "static" / "translations" / f"{language}.json"
+
+
+def get_translations(language=None, root_path=None):
+    """`language`'s translations (default: the default language), reparsed if stale.
+
+    Costs one stat() of the translation file per call to notice an edit.
+    """
+    if language not in SETTINGS.SUPPORTED_LANGUAGES:
+        language = SETTINGS.DEFAULT_LANGUAGE
+    path = translations_path(language, root_path)
+    mtime = os.stat(path).st_mtime
+
+    # Keyed by path, as the question catalogs are.
+    key = str(path)
+    source = _sources.get(key)
+    if source is not None and source.mtime == mtime:
+        return source
+    with _sources_lock:
+        source = _sources.get(key)
+        if source is None or source.mtime != mtime:
+            source = Translations.build(language, path)
+            _sources[key] = source
+    return source
@@ -16,14 +16,23 @@ Read paths therefore cannot assume a row exists behind `session["user_id"]`:
   checking a quota. Returns an unsaved placeholder when there is no row.
 - `persist_session_user()` when you are about to write something that references
   `users.uuid`. Returns a committed row.
+
+All of them, and Flask-Login's `load_user`, go through `get_user()`, which keeps
+the loaded row for the rest of the request. A single `/submit_answer` used to
+select the same `users` row four or five times: Flask-Login, the session
+lookup, the re-query after commit, and the achievement checks lazily loading
+`user.achievements` on top. Against the remote Postgres every one of those is a
+round trip.
 """
 
 import logging
 import uuid
 
-from flask import current_app, request, session
+from flask import current_app, g, has_request_context, request, session
 from flask_login import current_user
+from sqlalchemy import inspect
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
 from config import get_settings
 from extensions import db
@@ -69,12 +78,55 @@ def session_is_new():
     return cookie_name not in request.cookies
 
 
-def load_session_user():
-    """Return the persisted User for this session, or None if there is no row."""
-    user_uuid = session.get("user_id")
+def _identity_map():
+    """The uuid -> User map for the current request.
+
+    Kept in `g` but tagged with the request it was built for: `g` belongs to the
+    app context, which Flask reuses across requests when one is already pushed
+    (see `session_is_new`), and a row cached by an earlier request must not
+    leak into the next one.
+    """
+    owner = request._get_current_object() if has_request_context() else None
+    cached = g.get("_users_by_uuid")
+    if cached is None or cached[0] is not owner:
+        cached = (owner, {})
+        g._users_by_uuid = cached
+    return cached[1]
+
+
+def get_user(user_uuid):
+    """Return the User row for `user_uuid`, or None; loaded at most once a request.
+
+    The first call selects the row with its achievements joined in, because
+    nearly every caller goes on to read them (the achievement checks, the
+    profile page). Later calls in the same request get the same instance back.
+    A commit expires its attributes as usual, so values written elsewhere in
+    the request are reloaded on access rather than served stale.
+
+    Misses are not cached: the row may be created later in the request, by
+    `persist_session_user` or a signup.
+    """
     if not user_uuid:
         return None
-    return User.query.filter_by(uuid=user_uuid).first()
+
+    users = _identity_map()
+    user = users.get(user_uuid)
+    if user is not None:
+        state = inspect(user)
+        if not (state.was_deleted or state.detached):
+            return user
+
+    user = db.session.get(User, user_uuid, options=[joinedload(User.achievements)])
+    if user is None:
+        users.pop(user_uuid, None)
+    else:
+        users[user_uuid] = user
+    return user
+
+
+def load_session_user():
+    """Return the persisted User for this session, or None if there is no row."""
+    return get_user(session.get("user_id"))
 
 
 def get_session_user():
@@ -105,7 +157,7 @@ def persist_session_user():
     user row with nothing attached; harmless, and rare.
     """
     user_uuid = session_user_uuid()
-    user = User.query.filter_by(uuid=user_uuid).first()
+    user = get_user(user_uuid)
     if user is not None:
         return user
 
@@ -116,11 +168,12 @@ def persist_session_user():
     except IntegrityError:
         # Two concurrent requests on the same session can both reach this point.
         db.session.rollback()
-        user = User.query.filter_by(uuid=user_uuid).first()
+        user = get_user(user_uuid)
         if user is None:
             raise
         return user
 
+    _identity_map()[user_uuid] = user
     logger.info("Persisted anonymous user %s on first action", user_uuid)
     return user
 
@@ -0,0 +1,132 @@
+"""XP accounting: kept as a running total, summed in SQL only to check it.
+
+`users.xp` used to be recomputed on every submission by `recalc_user_xp`, which
+loaded every answer the user had ever written — both JSON score and feedback
+columns included — to re-add the XP of the relevant ones in Python. Twice per
+challenge response, just to tell whether the level changed. The cost grew with
+the history, on the request path.
+
+Now a write adds its own XP as a delta, in one UPDATE ... SET xp = xp + n
+RETURNING xp, which stays a single statement however long the history is, and
+cannot lose an increment to a concurrent submission the way a Python-side
+read-then-write can.
+
+The full sum is still available, and still done right, for the one place that
+needs it: `flask reconcile_xp`, which checks the running totals in batches and
+repairs any that drifted. It runs in SQL over `relevance_rating` and
+`challenge_relevance_rating`, copies of the Relevance score that are written
+with the answer so the sum never has to open the JSON.
+"""
+
+import logging
+
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from config import get_settings
+from extensions import db
+from models import Answer, User
+
+SETTINGS = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def counted_xp():
+    """The XP an answer row contributes to its owner's total, as a SQL expression.
+
+    The same rule as Answer.to_dict: each part counts only if its Relevance met
+    the threshold, and the challenge part only once there is a response.
+    """
+    threshold = SETTINGS.RELEVANCE_THRESHOLD_FOR_XP
+    main = case(
+        (Answer.relevance_rating >= threshold, Answer.xp_earned),
+        else_=0,
+    )
+    challenge = case(
+        (
+            and_(
+                Answer.challenge_response.is_not(None),
+                Answer.challenge_relevance_rating >= threshold,
+            ),
+            Answer.challenge_xp_earned,
+        ),
+        else_=0,
+    )
+    return main + challenge
+
+
+def answers_xp(answer_ids):
+    """The XP the answers with these ids contribute, summed in SQL."""
+    if not answer_ids:
+        return 0
+    return int(
+        db.session.execute(
+            select(func.coalesce(func.sum(counted_xp()), 0)).where(
+                Answer.id.in_(answer_ids)
+            )
+        ).scalar_one()
+    )
+
+
+def add_xp(user, delta):
+    """Add `delta` to the user's stored total and return the new total.
+
+    The in-memory `user` is updated to match without marking it dirty, so
+    nothing reads the row again and a later flush does not write it back.
+    Does not commit; the caller's commit covers the answer and its XP together.
+    """
+    new_total = db.session.execute(
+        update(User)
+        .where(User.uuid == user.uuid)
+        .values(xp=func.coalesce(User.xp, 0) + delta)
+        .returning(User.xp)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+    set_committed_value(user, "xp", new_total)
+    return new_total
+
+
+def reconcile_xp(batch_size=500, repair=False):
+    """Compare every user's stored XP with the sum over their answers.
+
+    Walks users by uuid in keyset batches, one grouped SUM per batch. Returns
+    the list of (uuid, stored, actual) for the users that disagree; with
+    `repair`, their totals are set to the actual sum as it goes, a batch per
+    commit.
+    """
+    drifted = []
+    last_uuid = ""
+    while True:
+        batch = db.session.execute(
+            select(User.uuid, User.xp)
+            .where(User.uuid > last_uuid)
+            .order_by(User.uuid)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return drifted
+
+        uuids = [row.uuid for row in batch]
+        sums = dict(
+            db.session.execute(
+                select(Answer.user_uuid, func.sum(counted_xp()))
+                .where(Answer.user_uuid.in_(uuids))
+                .group_by(Answer.user_uuid)
+            ).all()
+        )
+        for row in batch:
+            actual = int(sums.get(row.uuid) or 0)
+            stored = row.xp or 0
+            if stored == actual:
+                continue
+            drifted.append((row.uuid, stored, actual))
+            logger.warning(
+                "XP drift for %s: stored %s, actual %s", row.uuid, stored, actual
+            )
+            if repair:
+                db.session.execute(
+                    update(User).where(User.uuid == row.uuid).values(xp=actual)
+                )
+        if repair:
+            db.session.commit()
+        last_uuid = uuids[-1]
@@ -0,0 +1,371 @@
+"""Optional server-side sessions: the cookie carries an opaque id, nothing else.
+
+With Flask's default session everything in `session` — the user id, language,
+XP, earned achievements, a whole custom question — is serialized into the
+signed cookie, resent with every request including static files, and re-signed
+with itsdangerous whenever it changes. It also fails outright once the data
+passes the browser's ~4 KB cookie limit.
+
+SESSION_BACKEND selects where the data lives instead:
+
+- "cookie" (the default): Flask's signed cookie, unchanged.
+- "sqlite": a SQLite file per instance (SESSION_SQLITE_PATH). Cheap, local, and
+  lost with the instance, which is fine on a single long-lived host.
+- "postgres": the `server_sessions` table, shared by every instance, for Cloud
+  Run where consecutive requests rarely land on the same container.
+
+Entries are Flask's tagged-JSON encoding (the same one the cookie uses, so
+datetimes and tuples round-trip identically), zlib-compressed once it pays off.
+A request that never touches `session` never reads the store, and a session is
+written back only when it changed, or when it is halfway to expiring and needs
+its lifetime extended.
+
+The id is 32 random bytes, so it is unguessable without a signature; nothing
+is HMACed per request. It is only ever one this server issued: an id the store
+has no entry for is replaced rather than adopted, and the id changes whenever
+the user behind the session does (login, logout, an account merge), so an id
+planted in a victim's browser beforehand is worthless afterwards. A signed
+cookie left over from before the switch is imported into a new server-side
+session on its next request, so nobody loses their identity — or their spent
+quota — to the change.
+"""
+
+import logging
+import secrets
+import sqlite3
+import threading
+import zlib
+from datetime import UTC, datetime, timedelta
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from itsdangerous import BadSignature
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+
+logger = logging.getLogger(__name__)
+
+# Below this many bytes zlib's header costs more than it saves.
+_COMPRESS_ABOVE = 256
+_PLAIN, _DEFLATED = b"j", b"z"
+
+_serializer = TaggedJSONSerializer()
+
+
+def encode(data):
+    raw = _serializer.dumps(dict(data)).encode("utf-8")
+    if len(raw) > _COMPRESS_ABOVE:
+        return _DEFLATED + zlib.compress(raw)
+    return _PLAIN + raw
+
+
+def decode(blob):
+    blob = bytes(blob)
+    tag, body = blob[:1], blob[1:]
+    if tag == _DEFLATED:
+        body = zlib.decompress(body)
+    return _serializer.loads(body.decode("utf-8"))
+
+
+class ServerSideSession(SessionMixin):
+    """A session whose data is fetched from the store on first access.
+
+    `modified` is set by item assignment and deletion, like Flask's own
+    session: mutating a stored list or dict in place is not noticed, so
+    reassign it.
+
+    Changing a key in IDENTITY_KEYS moves the data to a fresh sid; the entry
+    under the old one is `replaced_sid`, for save_session to delete.
+    """
+
+    # The anonymous or account uuid, and Flask-Login's user id.
+    IDENTITY_KEYS = ("user_id", "_user_id")
+
+    def __init__(self, sid, loader=None, initial=None):
+        self.sid = sid
+        self._loader = loader
+        self._data = dict(initial) if initial is not None else None
+        self.modified = initial is not None
+        self.accessed = False
+        self.stored_expiry = None
+        self.replaced_sid = None
+
+    @property
+    def new(self):
+        return self._loader is None
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def _load(self):
+        self.accessed = True
+        if self._data is None:
+            data, self.stored_expiry = (
+                self._loader(self.sid) if self._loader else (None, None)
+            )
+            if data is None and self._loader is not None:
+                # Expired, pruned, or never issued here: whatever the cookie
+                # named, the session starts over under an id of our own.
+                self.sid = secrets.token_urlsafe(32)
+                self._loader = None
+            self._data = data or {}
+        return self._data
+
+    def _rotate(self):
+        if self.new:
+            return  # the id was issued in this request; nobody else has it
+        if self.replaced_sid is None:
+            self.replaced_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        data = self._load()
+        if key in self.IDENTITY_KEYS and data.get(key) != value:
+            self._rotate()
+        data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        data = self._load()
+        del data[key]
+        if key in self.IDENTITY_KEYS:
+            self._rotate()
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __repr__(self):
+        return f"<ServerSideSession {self.sid[:8]}… {self._data!r}>"
+
+
+class SQLiteSessionStore:
+    """Sessions in a local SQLite file, one connection per thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            # Concurrent gunicorn workers read while one writes.
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def load(self, sid):
+        row = (
+            self._connection()
+            .execute("SELECT data, expires_at FROM sessions WHERE sid = ?", (sid,))
+            .fetchone()
+        )
+        if row is None:
+            return None, None
+        expires_at = datetime.fromtimestamp(row[1], UTC)
+        if expires_at <= datetime.now(UTC):
+            return None, None
+        return decode(row[0]), expires_at
+
+    def save(self, sid, blob, expires_at):
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (sid) DO UPDATE SET "
+                "data = excluded.data, expires_at = excluded.expires_at",
+                (sid, blob, expires_at.timestamp()),
+            )
+
+    def delete(self, sid):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def prune(self):
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "DELETE FROM sessions WHERE expires_at <= ?",
+                (datetime.now(UTC).timestamp(),),
+            )
+        return cursor.rowcount
+
+
+class PostgresSessionStore:
+    """Sessions in the `server_sessions` table, shared across instances.
+
+    Runs on its own pooled connection rather than `db.session`, so a session
+    write neither commits nor rolls back whatever the request left pending.
+    """
+
+    def __init__(self, engine_getter):
+        self._engine = engine_getter
+
+    def load(self, sid):
+        from models import StoredSession
+
+        with self._engine().connect() as connection:
+            row = connection.execute(
+                select(StoredSession.data, StoredSession.expires_at).where(
+                    StoredSession.sid == sid,
+                    StoredSession.expires_at > datetime.now(UTC),
+                )
+            ).first()
+        if row is None:
+            return None, None
+        return decode(row.data), row.expires_at.replace(tzinfo=UTC)
+
+    def save(self, sid, blob, expires_at):
+        from models import StoredSession
+
+        naive = expires_at.astimezone(UTC).replace(tzinfo=None)
+        statement = postgresql_insert(StoredSession).values(
+            sid=sid, data=blob, expires_at=naive
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["sid"],
+            set_={"data": statement.excluded.data, "expires_at": naive},
+        )
+        with self._engine().begin() as connection:
+            connection.execute(statement)
+
+    def delete(self, sid):
+        from models import StoredSession
+
+        with self._engine().begin() as connection:
+            connection.execute(delete(StoredSession).where(StoredSession.sid == sid))
+
+    def prune(self):
+        from models import StoredSession
+
+        with self._engine().begin() as connection:
+            result = connection.execute(
+                delete(StoredSession).where(
+                    StoredSession.expires_at <= datetime.now(UTC).replace(tzinfo=None)
+                )
+            )
+        return result.rowcount
+
+
+class ServerSessionInterface(SessionInterface):
+    def __init__(self, store):
+        self.store = store
+        # Only used to read cookies written before the switch.
+        self._legacy = SecureCookieSessionInterface()
+
+    def _lifetime(self, app, session):
+        if session.permanent:
+            return app.permanent_session_lifetime
+        # A browser-session cookie still needs the stored entry to expire.
+        return timedelta(days=1)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return ServerSideSession(secrets.token_urlsafe(32))
+
+        # A signed cookie session is "<payload>.<timestamp>.<signature>"; an id
+        # from token_urlsafe never contains a dot.
+        if "." in sid:
+            serializer = self._legacy.get_signing_serializer(app)
+            data = {}
+            if serializer is not None:
+                try:
+                    data = serializer.loads(
+                        sid,
+                        max_age=int(app.permanent_session_lifetime.total_seconds()),
+                    )
+                except BadSignature:
+                    # Forged, expired, or signed with an old key: start afresh,
+                    # as Flask's own cookie sessions do.
+                    pass
+            return ServerSideSession(secrets.token_urlsafe(32), initial=data)
+
+        return ServerSideSession(sid, loader=self.store.load)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if session.replaced_sid is not None:
+            # The user changed; the old id must not lead anywhere any more.
+            self.store.delete(session.replaced_sid)
+
+        if session.loaded and not session and session.modified:
+            # Emptied, e.g. by logout: drop the entry and the cookie.
+            if not session.new and session.replaced_sid is None:
+                self.store.delete(session.sid)
+            response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = datetime.now(UTC)
+        expires_at = now + self._lifetime(app, session)
+        stale = (
+            session.stored_expiry is not None
+            and session.stored_expiry - now < self._lifetime(app, session) / 2
+        )
+        if not (session.loaded and session and (session.modified or stale)):
+            # Nothing changed and the entry has life left. The cookie is not
+            # re-sent either: its expiry moves together with the stored one,
+            # so SESSION_REFRESH_EACH_REQUEST is honoured at half-life rather
+            # than on every response.
+            return
+
+        self.store.save(session.sid, encode(session), expires_at)
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+            partitioned=self.get_cookie_partitioned(app),
+        )
+
+
+def init_session_store(app, settings):
+    """Install the configured session backend on `app`; "cookie" leaves Flask's."""
+    backend = settings.SESSION_BACKEND
+    if backend == "cookie":
+        return None
+    if backend == "sqlite":
+        store = SQLiteSessionStore(
+            settings.SESSION_SQLITE_PATH or f"{app.instance_path}/sessions.sqlite3"
+        )
+    elif backend == "postgres":
+        from extensions import db
+
+        store = PostgresSessionStore(lambda: db.engine)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND {backend!r}")
+
+    if backend == "sqlite":
+        from lifecycle import after_fork
+
+        # The master's connection, opened above to create the table, must not
+        # be used from a worker; each opens its own.
+        @after_fork
+        def _reopen():
+            store._local = threading.local()
+
+    app.session_interface = ServerSessionInterface(store)
+    logger.info("Sessions stored server-side (%s)", backend)
+    return store
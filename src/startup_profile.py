@@ -0,0 +1,109 @@
+"""What a cold start pays for: per-module import cost and time to first response.
+
+`flask startup_profile` runs the app in a fresh interpreter under
+`python -X importtime`, the way a new Cloud Run instance starts. It reports how
+long `import app` took, how long the first request after it took, and the
+modules that cost the most. It also checks DEFERRED_MODULES: SDKs that
+should only be imported on first use (lazy.py). Each one that is imported at
+startup anyway is reported as a regression, and the command exits non-zero.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+# Imported on first use only; see lazy.py and extensions.py.
+DEFERRED_MODULES = (
+    "google.auth",
+    "google.cloud.storage",
+    "google.genai",
+    "openai",
+    "stripe",
+)
+
+# Run in the child interpreter. Its stdout is this JSON line; stderr carries
+# the -X importtime table.
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get(sys.argv[1])
+answered = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - start,
+    "first_response_seconds": answered - imported,
+    "status": response.status_code,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+@dataclass(frozen=True)
+class ImportCost:
+    module: str
+    self_us: int
+    cumulative_us: int
+    # 0 for a module the app imported itself, 1 for one imported by that...
+    depth: int
+
+
+@dataclass(frozen=True)
+class StartupProfile:
+    import_seconds: float
+    first_response_seconds: float
+    status: int
+    imports: list
+    # DEFERRED_MODULES that were imported during startup anyway
+    eager: list
+
+
+def parse_importtime(output):
+    """The ImportCosts in `python -X importtime` stderr, in the order printed."""
+    costs = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header
+        name = fields[2].rstrip()
+        # importtime indents a nested import by two spaces per level, after
+        # one separating space.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        costs.append(
+            ImportCost(name.strip(), int(fields[0]), int(fields[1]), max(depth, 0))
+        )
+    return costs
+
+
+def profile_startup(path="/health"):
+    """Start the app in a fresh interpreter and time it; see the module docstring."""
+    src = Path(__file__).resolve().parent
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(src), str(src.parent), env.get("PYTHONPATH")])
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE, path],
+        cwd=src.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"The app failed to start:\n{completed.stderr[-4000:]}")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    loaded = set(result["modules"])
+    return StartupProfile(
+        import_seconds=result["import_seconds"],
+        first_response_seconds=result["first_response_seconds"],
+        status=result["status"],
+        imports=parse_importtime(completed.stderr),
+        eager=[module for module in DEFERRED_MODULES if module in loaded],
+    )
@@ -106,4 +106,6 @@ export const VOICE_LIMITS = {
 // Timing constants
 export const TIMING = {
   EVALUATION_DELAY: 2000, // 2 seconds minimum delay before showing evaluation results
+  JOB_POLL_INTERVAL: 1000, // how often a queued evaluation is polled
+  JOB_POLL_TIMEOUT: 180000, // give up on a queued evaluation after 3 minutes
 };
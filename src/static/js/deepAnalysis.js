@@ -17,6 +17,23 @@ const btn = document.getElementById("deepAnalysisBtn");
 const output = document.getElementById("deepAnalysisResult");
 const status = document.getElementById("deepAnalysisStatus");
 
+// The run takes ~45s on the server's background pool; the POST answers 202 at
+// once and the result is polled for. Local constants rather than TIMING from
+// constants.js, which a returning visitor may still have cached without them.
+const POLL_INTERVAL_MS = 2000;
+const POLL_TIMEOUT_MS = 5 * 60 * 1000;
+
+async function waitForResult(statusUrl) {
+  const deadline = Date.now() + POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    const res = await fetch(statusUrl);
+    const data = await res.json().catch(() => ({}));
+    if (!res.ok || data.status !== "pending") return { res, data };
+  }
+  return { res: { ok: false, status: 504 }, data: {} };
+}
+
 // Which answer the currently rendered analysis belongs to. main.js clears the
 // panel between submissions, but a stale cached main.js would not, so the id is
 // re-checked here on every click.
@@ -175,12 +192,15 @@ if (btn && output) {
     showStatus(s.runningHint || "");
 
     try {
-      const res = await fetch("/deep_analysis", {
+      let res = await fetch("/deep_analysis", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ answer_id: answerId }),
       });
-      const data = await res.json().catch(() => ({}));
+      let data = await res.json().catch(() => ({}));
+      if (res.status === 202 && data.status_url) {
+        ({ res, data } = await waitForResult(data.status_url));
+      }
 
       if (res.status === 402) {
         // Only reachable from a page rendered before the tier changed.
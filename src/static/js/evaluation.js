@@ -219,6 +219,91 @@ export function createOverallEvaluation(data, isChallenge = false) {
   `;
 }
 
+// Field-name prefixes of the streamed evaluation, by category label.
+const STREAMED_CATEGORY_FIELDS = {
+  relevance: "Relevance",
+  logical_structure: "Logical Structure",
+  clarity: "Clarity",
+  depth: "Depth",
+  objectivity: "Objectivity",
+  creativity: "Creativity",
+};
+
+// Renders a streamed evaluation into the results panel as the model writes it:
+// each dimension's score and feedback appear when their field completes, not
+// when the whole evaluation does. Returns the onField callback for
+// streamEvaluation, with `discard()` to hide a partial result that ended in an
+// error. The final payload is rendered over it as before, which replaces the
+// streamed markup wholesale, so nothing here has to be exact.
+export function createStreamedEvaluation(evalDiv) {
+  const overallDiv = evalDiv.querySelector("#overallEvaluation");
+  const scoresDiv = evalDiv.querySelector("#scores");
+  let started = false;
+
+  const start = () => {
+    started = true;
+    const empty = { evaluation: { scores: {}, feedback: {} } };
+    scoresDiv.innerHTML = createEvaluationScores(empty);
+    scoresDiv.querySelectorAll(".score-item").forEach((item, index) => {
+      item.dataset.category = EVALUATION_CATEGORIES[index];
+      item.querySelector(".score-value").textContent = "…";
+    });
+    overallDiv.innerHTML = `
+      <p class="text-l font-bold mb-2 text-left">
+        ${translations.evaluation.overall}: <span class="streamed-total">…</span>
+      </p>
+      <p class="text-md text-left streamed-overall"></p>
+    `;
+    showEvaluationSection(evalDiv, false);
+  };
+
+  const onField = (name, value) => {
+    const match = name.match(/^(.*)_(rating|explanation)$/);
+    if (!match) return;
+    const [, field, kind] = match;
+    if (field !== "overall" && !(field in STREAMED_CATEGORY_FIELDS)) return;
+    if (!started) start();
+
+    if (field === "overall") {
+      const target = overallDiv.querySelector(
+        kind === "rating" ? ".streamed-total" : ".streamed-overall"
+      );
+      if (kind === "rating") {
+        target.textContent = `${Number(value).toFixed(1)}/10`;
+        target.style.color = scoreToColor(value);
+      } else {
+        target.textContent = value;
+      }
+      return;
+    }
+
+    const item = scoresDiv.querySelector(
+      `.score-item[data-category="${STREAMED_CATEGORY_FIELDS[field]}"]`
+    );
+    if (!item) return; // Relevance has its own notice, not a bar
+    if (kind === "rating") {
+      const color = scoreToColor(value);
+      const scoreValue = item.querySelector(".score-value");
+      scoreValue.textContent = `${value}/10`;
+      scoreValue.style.color = color;
+      const bar = item.querySelector(".score-bar");
+      bar.style.backgroundColor = color;
+      bar.style.width = `${value * 10}%`;
+    } else {
+      item.querySelector("p").textContent = value;
+    }
+  };
+
+  onField.discard = () => {
+    if (!started) return;
+    scoresDiv.innerHTML = "";
+    overallDiv.innerHTML = "";
+    evalDiv.classList.add("hidden");
+    evalDiv.style.display = "none";
+  };
+  return onField;
+}
+
 // Animate score bars
 export function animateScoreBars(scoresContainer, delay = 100) {
   setTimeout(() => {
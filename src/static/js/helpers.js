@@ -1,5 +1,5 @@
 import { rgbToHex } from "./utils.js";
-import { CATEGORY_ICONS, CHAR_LIMITS, COLORS } from "./constants.js";
+import { CATEGORY_ICONS, CHAR_LIMITS, COLORS, TIMING } from "./constants.js";
 import { translations } from "./translations.js";
 
 // Helper function for typewriter effect
@@ -123,3 +123,103 @@ export function setupCharCounter(inputId, countId, fieldName) {
     });
   }
 }
+
+// Submits an answer or challenge response in async mode: the server validates
+// and queues it, and answers 202 with a job to poll instead of holding a
+// request open for the whole evaluation. Resolves to a Response carrying the
+// evaluation's own status and body, so callers handle it exactly like the
+// synchronous one -- and a server that answers inline (queue full, or an older
+// deploy) just returns that response unchanged.
+export async function submitForEvaluation(url, payload) {
+  const response = await fetch(url, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Prefer: "respond-async" },
+    body: JSON.stringify(payload),
+  });
+  if (response.status !== 202) {
+    return response;
+  }
+
+  const { status_url: statusUrl } = await response.json();
+  return collectEvaluationJob(statusUrl);
+}
+
+function jsonResponse(body, status) {
+  return new Response(JSON.stringify(body), {
+    status,
+    headers: { "Content-Type": "application/json" },
+  });
+}
+
+// Polls a job until it has finished. Collecting the result through the status
+// URL is also what applies the job's session updates (XP, achievements) to the
+// cookie, so the streamed path below ends here as well.
+async function collectEvaluationJob(statusUrl) {
+  const deadline = Date.now() + TIMING.JOB_POLL_TIMEOUT;
+  while (Date.now() < deadline) {
+    const poll = await fetch(statusUrl);
+    const job = await poll.json();
+    if (!poll.ok) {
+      return jsonResponse(job, poll.status);
+    }
+    if (job.status === "done" || job.status === "failed") {
+      return jsonResponse(job.result || {}, job.result_status || 500);
+    }
+    await new Promise((resolve) =>
+      setTimeout(resolve, TIMING.JOB_POLL_INTERVAL)
+    );
+  }
+  return jsonResponse({ error: "Evaluation timed out." }, 504);
+}
+
+// Like submitForEvaluation, but asks for the evaluation as an event stream and
+// calls onField(name, value) for each rating or explanation as soon as the model
+// has finished writing it. Resolves to the same kind of Response. A server that
+// answers with anything other than a stream (a validation error, quota, a full
+// queue) has its response returned unchanged.
+export async function streamEvaluation(url, payload, onField) {
+  const response = await fetch(url, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    body: JSON.stringify(payload),
+  });
+  const contentType = response.headers.get("Content-Type") || "";
+  if (!contentType.startsWith("text/event-stream") || !response.body) {
+    return response;
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  let statusUrl = null;
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (!data) continue;
+      const message = JSON.parse(data);
+      if (event === "job") {
+        statusUrl = message.status_url;
+      } else if (event === "field" && onField) {
+        onField(message.name, message.value);
+      }
+    }
+  }
+
+  if (!statusUrl) {
+    return jsonResponse({ error: "Evaluation stream ended early." }, 502);
+  }
+  return collectEvaluationJob(statusUrl);
+}
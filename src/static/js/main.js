@@ -16,6 +16,8 @@ import {
   updateQuestionDisplay,
   scoreToColor,
   setupCharCounter,
+  streamEvaluation,
+  submitForEvaluation,
   syncExampleButton,
 } from "./helpers.js";
 import { translations } from "./translations.js";
@@ -28,6 +30,7 @@ import {
   refreshAchievementDisplay,
   updateAchievementsDisplay,
   resetShownAchievementNotifications,
+  createStreamedEvaluation,
 } from "./evaluation.js";
 import { initMainVoiceInput, initChallengeVoiceInput } from "./voice.js";
 
@@ -1058,14 +1061,32 @@ document.getElementById("submitAnswer").addEventListener("click", async () => {
   submitBtn.disabled = true;
 
   try {
-    const response = await fetch("/submit_answer", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    });
+    // Streamed: each dimension's score and feedback is shown in the results
+    // panel as soon as the model has written it, and the button counts them
+    // in. The final payload below then replaces the streamed panel.
+    let ratedDimensions = 0;
+    const renderField = createStreamedEvaluation(
+      document.getElementById("evaluationResults")
+    );
+    const response = await streamEvaluation(
+      "/submit_answer",
+      payload,
+      (name, value) => {
+        renderField(name, value);
+        if (name.endsWith("_rating") && name !== "overall_rating") {
+          ratedDimensions += 1;
+          submitBtn.innerHTML = `${translations.challenge.analyzing} (${ratedDimensions}/6) <span class="spinner"></span>`;
+        }
+      }
+    );
 
-    // Calculate remaining time only for successful responses
-    if (response.ok) {
+    if (!response.ok) {
+      renderField.discard();
+    }
+
+    // Calculate remaining time only for successful responses; with feedback
+    // already on screen there is no spinner left to hold up.
+    if (response.ok && ratedDimensions === 0) {
       const elapsed = Date.now() - startTime;
       if (elapsed < TIMING.EVALUATION_DELAY) {
         await new Promise((resolve) =>
@@ -2072,13 +2093,10 @@ window.addEventListener("DOMContentLoaded", async () => {
         payload.voice_answer = voice_answer;
       }
 
-      const response = await fetch("/submit_challenge_response", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify(payload),
-      });
+      const response = await submitForEvaluation(
+        "/submit_challenge_response",
+        payload
+      );
 
       if (response.ok) {
         const elapsed = Date.now() - startTime;
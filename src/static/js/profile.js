@@ -1,3 +1,5 @@
+import { fetchTranslations } from "./translationManager.js";
+
 // Import translations
 let translations = {};
 
@@ -5,10 +7,7 @@ let translations = {};
 async function loadTranslations() {
   const currentLanguage = localStorage.getItem("language") || "en";
   try {
-    const response = await fetch(
-      `/static/translations/${currentLanguage}.json`
-    );
-    translations = await response.json();
+    translations = await fetchTranslations(currentLanguage);
     // Make translations globally available
     window.translations = translations;
   } catch (error) {
@@ -195,6 +194,93 @@ async function updateAnswersSection(url, isBottomPagination = false) {
   }
 }
 
+// The score badge colours, as the score_color macro in profile.html.
+function scoreColor(score) {
+  const value = Math.round(parseFloat(score) * 10) / 10;
+  if (value >= 9.95) return "text-emerald-600 bg-emerald-50";
+  if (value >= 8) return "text-green-600 bg-green-50";
+  if (value >= 7) return "text-lime-600 bg-lime-50";
+  if (value >= 6) return "text-yellow-600 bg-yellow-50";
+  if (value >= 4) return "text-amber-600 bg-amber-50";
+  return "text-red-600 bg-red-50";
+}
+
+const DETAIL_DIMENSIONS = [
+  ["Logical Structure", "logic"],
+  ["Clarity", "clarity"],
+  ["Depth", "depth"],
+  ["Objectivity", "objectivity"],
+  ["Creativity", "creativity"],
+  ["Relevance", "relevance"],
+];
+
+function renderDimensions(container, scores, feedback) {
+  DETAIL_DIMENSIONS.forEach(([name, key]) => {
+    const row = document.createElement("p");
+    row.className = "flex flex-col";
+    const heading = document.createElement("span");
+    heading.className = "flex items-center";
+    const label = document.createElement("span");
+    label.className = "font-medium text-black";
+    label.setAttribute("data-i18n", `evaluation.scores.${key}`);
+    label.textContent = name;
+    heading.appendChild(label);
+    if (scores[name] !== undefined) {
+      const badge = document.createElement("span");
+      badge.className = `ml-1 px-2 py-1 rounded-full text-xs ${scoreColor(scores[name])}`;
+      badge.textContent = `${scores[name]}/10`;
+      heading.appendChild(badge);
+    }
+    const text = document.createElement("span");
+    text.textContent = feedback[name] || "";
+    row.append(heading, text);
+    container.appendChild(row);
+  });
+}
+
+// Expand an answer's feedback details, fetching them on the first open: the
+// page itself carries only what the collapsed entry shows.
+async function toggleHistoryDetails(header) {
+  const container = header.nextElementSibling;
+  container.classList.toggle("hidden");
+  if (container.dataset.loaded || container.classList.contains("hidden")) {
+    return;
+  }
+  container.dataset.loaded = "true";
+  try {
+    const response = await fetch(
+      `/api/history/${encodeURIComponent(container.dataset.historyDetails)}`
+    );
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    const answer = await response.json();
+    renderDimensions(
+      container,
+      answer.evaluation_scores,
+      answer.evaluation_feedback
+    );
+    const challengeFeedback = answer.challenge_evaluation_feedback || {};
+    if (challengeFeedback.Overall) {
+      const divider = document.createElement("div");
+      divider.className = "mt-4 border-t border-gray-200 pt-2";
+      divider.innerHTML =
+        '<span class="text-sm font-medium text-black">Challenge Details</span>';
+      container.appendChild(divider);
+      renderDimensions(
+        container,
+        answer.challenge_evaluation_scores || {},
+        challengeFeedback
+      );
+    }
+    window.translationManager?.applyTranslations();
+  } catch (error) {
+    console.error("Error loading answer details:", error);
+    delete container.dataset.loaded;
+  }
+}
+window.toggleHistoryDetails = toggleHistoryDetails;
+
 // Function to store active metrics
 function storeActiveMetrics() {
   const activeMetrics = [];
@@ -1,5 +1,60 @@
 // Translation Manager - Handles centralized translation loading and caching
-const TRANSLATION_VERSION = "1.0"; // Increment this when translations structure changes
+
+// The translation bundles this page needs, from <html data-i18n-namespaces>.
+// "ui" holds every string that is not a question, an example answer or an
+// achievement text; see src/services/translation_service.py.
+export function pageNamespaces() {
+  const declared = document.documentElement.dataset.i18nNamespaces;
+  return declared ? declared.split(/\s+/).filter(Boolean) : ["ui"];
+}
+
+function isPlainObject(value) {
+  return value !== null && typeof value === "object" && !Array.isArray(value);
+}
+
+function mergeInto(target, source) {
+  for (const [key, value] of Object.entries(source)) {
+    const existing = target[key];
+    if (isPlainObject(existing) && isPlainObject(value)) {
+      mergeInto(existing, value);
+    } else {
+      target[key] = value;
+    }
+  }
+  return target;
+}
+
+// One request per bundle per page, however many scripts ask for it. Caching
+// across page loads is left to HTTP: the bundles carry ETags.
+const bundleRequests = new Map();
+
+function fetchBundle(language, namespace) {
+  const url = `/translations/${language}/${namespace}.json`;
+  if (!bundleRequests.has(url)) {
+    const request = fetch(url).then((response) => {
+      if (!response.ok) throw new Error(`Failed to load ${url}`);
+      return response.json();
+    });
+    request.catch(() => bundleRequests.delete(url));
+    bundleRequests.set(url, request);
+  }
+  return bundleRequests.get(url);
+}
+
+// The page's bundles for `language`, merged into one fresh object shaped like
+// the full translation file.
+export async function fetchTranslations(
+  language,
+  namespaces = pageNamespaces()
+) {
+  const bundles = await Promise.all(
+    namespaces.map((namespace) => fetchBundle(language, namespace))
+  );
+  return bundles.reduce(
+    (merged, bundle) => mergeInto(merged, structuredClone(bundle)),
+    {}
+  );
+}
 
 class TranslationManager {
   constructor() {
@@ -9,31 +64,18 @@ class TranslationManager {
 
   async initialize() {
     this.currentLanguage = localStorage.getItem("language") || "en";
+    // Whole translation files cached by earlier versions; never invalidated.
+    for (const language of ["en", "de"]) {
+      localStorage.removeItem(`translations_${language}`);
+    }
     await this.loadTranslations();
     this.attachLanguageChangeListener();
   }
 
   async loadTranslations() {
     try {
-      // Check if we have cached translations
-      const cached = this.getCachedTranslations();
-      if (cached) {
-        this.translations = cached.translations;
-        window.translations = this.translations;
-        return;
-      }
-
-      // If no cache or version mismatch, fetch from server
-      const response = await fetch(
-        `/static/translations/${this.currentLanguage}.json`
-      );
-      if (!response.ok) throw new Error("Failed to load translations");
-
-      this.translations = await response.json();
+      this.translations = await fetchTranslations(this.currentLanguage);
       window.translations = this.translations;
-
-      // Cache the new translations
-      this.cacheTranslations();
     } catch (error) {
       console.error("Error loading translations:", error);
       // Fallback to empty translations object
@@ -42,35 +84,6 @@ class TranslationManager {
     }
   }
 
-  getCachedTranslations() {
-    try {
-      const cached = JSON.parse(
-        localStorage.getItem(`translations_${this.currentLanguage}`)
-      );
-      if (cached && cached.version === TRANSLATION_VERSION) {
-        return cached;
-      }
-      return null;
-    } catch {
-      return null;
-    }
-  }
-
-  cacheTranslations() {
-    try {
-      localStorage.setItem(
-        `translations_${this.currentLanguage}`,
-        JSON.stringify({
-          version: TRANSLATION_VERSION,
-          translations: this.translations,
-          timestamp: Date.now(),
-        })
-      );
-    } catch (error) {
-      console.error("Error caching translations:", error);
-    }
-  }
-
   attachLanguageChangeListener() {
     window.addEventListener("languageChanged", async (event) => {
       this.currentLanguage = event.detail.language;
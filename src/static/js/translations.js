@@ -1,6 +1,9 @@
 import { updateQuestionDisplay } from "./helpers.js";
 import { SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE } from "./constants.js";
-import { translationManager } from "./translationManager.js";
+import {
+  fetchTranslations,
+  translationManager,
+} from "./translationManager.js";
 
 let currentLanguage = localStorage.getItem("language") || DEFAULT_LANGUAGE;
 localStorage.setItem("language", currentLanguage);
@@ -14,14 +17,7 @@ async function loadTranslations() {
       localStorage.setItem("language", DEFAULT_LANGUAGE);
     }
 
-    const response = await fetch(
-      `/static/translations/${currentLanguage}.json`
-    );
-    if (!response.ok) {
-      throw new Error(`Failed to load translations for ${currentLanguage}`);
-    }
-
-    translations = await response.json();
+    translations = await fetchTranslations(currentLanguage);
     applyTranslations();
     updateLanguageIndicator();
     updateEvaluationTranslations();
@@ -1,10 +1,10 @@
 """Test fixtures.
 
-Importing the app is not free: `extensions.py` resolves Google credentials and
-`services/llm.py` builds a Vertex AI client, both at module import time. Neither
-works without a service account, so they are stubbed before `app` is imported at
-all — and the environment has to be set before that too, because `get_settings()`
-is `lru_cache`d and runs on the first import of `config`.
+Google credentials and the Vertex AI client are built on first use
+(`extensions.py`), and neither works without a service account, so both are
+stubbed in case a test reaches them. The environment has to be set before `app`
+is imported at all, because `get_settings()` is `lru_cache`d and runs on the
+first import of `config`.
 """
 
 import os
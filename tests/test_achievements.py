@@ -0,0 +1,192 @@
+"""Achievement rules over the per-user stats row."""
+
+from extensions import db
+from models import Answer, User, UserAchievement, UserStats
+from services.achievement_service import (
+    check_and_award_achievements,
+    reset_user_stats,
+)
+
+QUESTION_ID = "experiences"
+
+
+def _user():
+    user = User(uuid="u-1", username="someone", tier="free", xp=0, is_active=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _answer_data(score=6, **extra):
+    return {
+        "question_id": QUESTION_ID,
+        "input_mode": "text",
+        "total_score": score,
+        "evaluation_scores": {"Relevance": score, "Clarity": score},
+        "claim": "A claim.",
+        "argument": "An argument of middling length. " * 20,
+        "counterargument": "",
+        **extra,
+    }
+
+
+def _store_answer(score=6, **columns):
+    db.session.add(
+        Answer(
+            user_uuid="u-1",
+            question_id=QUESTION_ID,
+            claim="A claim.",
+            argument="An argument.",
+            evaluation_scores={"Relevance": score, "Clarity": score},
+            evaluation_feedback={},
+            xp_earned=0,
+            **columns,
+        )
+    )
+    db.session.flush()
+
+
+def _awarded(user_uuid="u-1"):
+    return {
+        a.achievement_id for a in UserAchievement.query.filter_by(user_uuid=user_uuid)
+    }
+
+
+def test_the_first_answer_builds_the_stats_row(app):
+    user = _user()
+    with app.test_request_context():
+        _store_answer()
+        awarded = check_and_award_achievements(user, _answer_data())
+        db.session.commit()
+
+    assert [a.id for a in awarded] == ["first_argument"]
+    stats = db.session.get(UserStats, "u-1")
+    assert stats.categories["Personal Growth & Relationships"]["answered"] == 1
+
+
+def test_later_answers_update_the_row_without_the_history(app):
+    user = _user()
+    with app.test_request_context():
+        _store_answer()
+        check_and_award_achievements(user, _answer_data())
+        db.session.commit()
+
+        # An answer the stats never saw: if the row were rebuilt, it would count.
+        _store_answer()
+        _store_answer()
+        db.session.commit()
+        check_and_award_achievements(user, _answer_data())
+        db.session.commit()
+
+    stats = db.session.get(UserStats, "u-1")
+    assert stats.categories["Personal Growth & Relationships"]["answered"] == 2
+
+
+def test_the_tenth_voice_answer_is_a_voice_master(app):
+    user = _user()
+    db.session.add(UserStats(user_uuid="u-1", voice_answer_count=9, categories={}))
+    db.session.commit()
+
+    with app.test_request_context():
+        awarded = check_and_award_achievements(
+            user, _answer_data(input_mode="voice", voice_answer="Spoken.")
+        )
+        db.session.commit()
+
+    assert "voice_master" in {a.id for a in awarded}
+    assert "voice_master" in _awarded()
+    assert db.session.get(UserStats, "u-1").voice_answer_count == 10
+
+
+def test_an_earned_achievement_is_not_awarded_again(app):
+    user = _user()
+    with app.test_request_context():
+        _store_answer()
+        check_and_award_achievements(user, _answer_data())
+        db.session.commit()
+        db.session.expire_all()
+        awarded = check_and_award_achievements(user, _answer_data())
+        db.session.commit()
+
+    assert "first_argument" not in {a.id for a in awarded}
+    assert UserAchievement.query.filter_by(achievement_id="first_argument").count() == 1
+
+
+def test_awards_match_the_checks_they_replaced(app):
+    user = _user()
+    with app.test_request_context():
+        for _ in range(120):
+            _store_answer(
+                score=8,
+                challenge_response="Yes.",
+                challenge_evaluation_scores={"Relevance": 8},
+            )
+        awarded = check_and_award_achievements(user, _answer_data(score=8))
+        awarded += check_and_award_achievements(
+            user, _answer_data(score=8, is_challenge=True)
+        )
+        db.session.commit()
+
+    # The milestones and the streak never fired before the rules existed, and
+    # they still do not; the first award is still the first one checked.
+    ids = [a.id for a in awarded]
+    assert ids[0] == "first_argument"
+    assert "first_challenge" in ids
+    assert not {
+        "ten_answers",
+        "hundred_answers",
+        "ten_challenges",
+        "hundred_challenges",
+        "daily_streak",
+    } & set(ids)
+
+
+def test_a_reset_row_is_rebuilt_from_the_history(app):
+    user = _user()
+    with app.test_request_context():
+        for _ in range(3):
+            _store_answer(
+                score=8,
+                challenge_response="Yes.",
+                challenge_evaluation_scores={"Relevance": 8},
+            )
+        reset_user_stats("u-1")
+        check_and_award_achievements(user, _answer_data(score=8))
+        db.session.commit()
+
+    stats = db.session.get(UserStats, "u-1")
+    assert stats.categories["Personal Growth & Relationships"]["passed"] == 6
+    assert stats.categories["Personal Growth & Relationships"]["strong"] == 6
+    assert "domain_expert" in _awarded()
+
+
+def test_a_rebuilt_challenge_is_scored_like_a_submitted_one(app):
+    user = _user()
+    dimensions = dict.fromkeys(
+        (
+            "Relevance",
+            "Logical Structure",
+            "Clarity",
+            "Depth",
+            "Objectivity",
+            "Creativity",
+        ),
+        6.8,
+    )
+    with app.test_request_context():
+        _store_answer(
+            score=4,
+            challenge_response="Yes.",
+            # "Overall" is the model's own rating, not the mean of the others.
+            challenge_evaluation_scores={**dimensions, "Overall": 10},
+        )
+        reset_user_stats("u-1")
+        check_and_award_achievements(user, _answer_data(score=4))
+        db.session.commit()
+
+    tally = db.session.get(UserStats, "u-1").categories[
+        "Personal Growth & Relationships"
+    ]
+    # 6.8 passes but is not strong, as it was when the response was submitted.
+    assert tally["passed"] == 1
+    assert tally["strong"] == 0
@@ -0,0 +1,88 @@
+"""Allocation profiler: opt-in, key-protected, per-endpoint and per-line growth."""
+
+import tracemalloc
+
+import pytest
+
+import alloc_profiler
+from app import create_app
+from config import get_settings
+from extensions import db
+
+_LEAK = []
+
+
+@pytest.fixture
+def profiled_app(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "ALLOC_PROFILER_ENABLED", True)
+    monkeypatch.setattr(settings, "ALLOC_PROFILER_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(alloc_profiler, "_profiler", None)
+    application = create_app()
+    application.config["TESTING"] = True
+
+    @application.route("/leaky")
+    def leaky():
+        _LEAK.append(bytearray(256 * 1024))
+        return "ok"
+
+    with application.app_context():
+        db.create_all()
+        try:
+            yield application
+        finally:
+            db.session.remove()
+            db.drop_all()
+            tracemalloc.stop()
+            _LEAK.clear()
+
+
+def test_the_report_is_off_by_default(app, client):
+    key = app.config["SECRET_KEY"]
+
+    assert client.get("/profiling/allocations").status_code == 401
+    assert client.get(f"/profiling/allocations?api_key={key}").status_code == 404
+    assert not tracemalloc.is_tracing()
+
+
+def test_a_leaking_endpoint_tops_the_report(profiled_app):
+    client = profiled_app.test_client()
+    key = profiled_app.config["SECRET_KEY"]
+    for _ in range(3):
+        client.get("/leaky")
+        client.get("/health")
+
+    assert client.get("/profiling/allocations?api_key=wrong").status_code == 401
+    # A GET never resets.
+    client.get(f"/profiling/allocations?api_key={key}&reset=1")
+    report = client.post(f"/profiling/allocations?api_key={key}&reset=1").get_json()
+
+    assert report["sampled_requests"] == 6
+    top = report["endpoints"][0]
+    assert top["endpoint"] == "leaky" and top["requests"] == 3
+    assert top["net_kb"] >= 3 * 256
+    assert report["lines"][0]["line"].endswith(f"test_alloc_profiler.py:{leaky_line()}")
+    assert report["since_baseline"]["top"][0]["net_kb"] >= 3 * 256
+
+    after_reset = client.get(f"/profiling/allocations?api_key={key}").get_json()
+    assert after_reset["sampled_requests"] == 0
+
+
+def leaky_line():
+    with open(__file__, encoding="utf-8") as source:
+        for number, line in enumerate(source, start=1):
+            if "_LEAK.append(" in line:
+                return number
+
+
+def test_rebaselining_before_any_request_starts_tracing(profiled_app):
+    client = profiled_app.test_client()
+    key = profiled_app.config["SECRET_KEY"]
+    assert not tracemalloc.is_tracing()
+
+    response = client.post(f"/profiling/allocations?api_key={key}&rebaseline=1")
+
+    assert response.status_code == 200
+    assert tracemalloc.is_tracing()
+    report = client.get(f"/profiling/allocations?api_key={key}").get_json()
+    assert report["since_baseline"] is not None
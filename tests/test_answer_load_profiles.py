@@ -0,0 +1,138 @@
+"""Answer columns each endpoint pulls from the database, in bytes.
+
+The feedback and deep analysis JSON are most of an answer row, and are
+deferred (models.ANSWER_PROFILES). Bytes are counted as the size of every
+column value the ORM actually loads into an Answer, which is what crossed the
+wire from the database and what Python then allocated. Run with -s to see the
+report; the assertions pin what each endpoint must leave behind.
+"""
+
+import json
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import InvalidRequestError
+
+from extensions import db
+from models import ANSWER_PROFILES, Answer, User
+from services.share_service import make_share_token
+
+HEAVY_ANSWERS = 25
+FEEDBACK = {
+    name: "A paragraph of feedback on this dimension. " * 12
+    for name in ("Overall", "Relevance", "Logical Structure", "Clarity", "Depth")
+}
+DEEP_ANALYSIS = {"verdict": "Long. " * 400, "rebuild": ["Step. " * 80] * 5}
+
+
+def _size(value):
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(json.dumps(value, default=str))
+
+
+@contextmanager
+def _loaded_bytes():
+    """Counts the bytes of every Answer column loaded inside the block."""
+    totals = {"bytes": 0, "rows": 0}
+
+    def on_load(target, _context):
+        state = inspect(target)
+        totals["rows"] += 1
+        totals["bytes"] += sum(
+            _size(state.dict[column.key])
+            for column in state.mapper.column_attrs
+            if column.key in state.dict
+        )
+
+    event.listen(Answer, "load", on_load)
+    try:
+        yield totals
+    finally:
+        event.remove(Answer, "load", on_load)
+
+
+def _heavy_user(client):
+    """A Plus user with HEAVY_ANSWERS fully evaluated and deep-analysed answers."""
+    client.get("/")
+    with client.session_transaction() as flask_session:
+        user_uuid = flask_session["user_id"]
+    db.session.add(User(uuid=user_uuid, username="heavy", tier="plus"))
+    for i in range(HEAVY_ANSWERS):
+        db.session.add(
+            Answer(
+                user_uuid=user_uuid,
+                question_id=f"q{i}",
+                question_text="Do experiences make you happier than possessions?",
+                claim="Experiences beat possessions.",
+                argument="Possessions lose their novelty; memories do not. " * 4,
+                evaluation_scores={"Overall": 7, "Relevance": 8},
+                evaluation_feedback=FEEDBACK,
+                xp_earned=10,
+                relevance_rating=8,
+                challenge_evaluation_scores={},
+                challenge_evaluation_feedback=FEEDBACK,
+                deep_analysis=DEEP_ANALYSIS,
+            )
+        )
+    db.session.commit()
+    db.session.expunge_all()
+    return user_uuid
+
+
+def _full_load_bytes(user_uuid):
+    """What loading the same answers with every column used to cost."""
+    with _loaded_bytes() as totals:
+        Answer.query.options(*ANSWER_PROFILES["full"]).filter_by(
+            user_uuid=user_uuid
+        ).all()
+    db.session.expunge_all()
+    return totals["bytes"]
+
+
+def test_bytes_loaded_per_endpoint(app, client):
+    user_uuid = _heavy_user(client)
+    baseline = _full_load_bytes(user_uuid)
+    answer_id = db.session.scalars(
+        db.select(Answer.id).filter_by(user_uuid=user_uuid).limit(1)
+    ).one()
+    endpoints = {
+        "/profile": "/profile",
+        "/export": "/export",
+        "/share/<token>": f"/share/{make_share_token(answer_id)}",
+    }
+
+    report = {}
+    for name, url in endpoints.items():
+        db.session.expunge_all()
+        with _loaded_bytes() as totals:
+            assert client.get(url).status_code == 200
+        report[name] = totals
+
+    print(f"\nAll columns of {HEAVY_ANSWERS} answers: {baseline} bytes")
+    for name, totals in report.items():
+        print(f"{name:16} {totals['rows']:3} rows {totals['bytes']:8} bytes")
+
+    # The history page and the export show feedback but never the analysis,
+    # which is the bulk of these rows.
+    without_analysis = baseline - HEAVY_ANSWERS * _size(DEEP_ANALYSIS)
+    assert report["/profile"]["bytes"] <= without_analysis
+    assert report["/export"]["bytes"] <= without_analysis
+    assert report["/share/<token>"]["rows"] == 1
+
+
+def test_the_summary_profile_refuses_columns_it_left_out(app, client):
+    user_uuid = _heavy_user(client)
+
+    answer = (
+        Answer.query.options(*ANSWER_PROFILES["summary"])
+        .filter_by(user_uuid=user_uuid)
+        .first()
+    )
+
+    assert answer.evaluation_scores == {"Overall": 7, "Relevance": 8}
+    with pytest.raises(InvalidRequestError, match="raiseload"):
+        _ = answer.evaluation_feedback
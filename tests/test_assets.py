@@ -0,0 +1,135 @@
+"""The static asset build: hashed names, import rewriting and serving."""
+
+import gzip
+import json
+
+import pytest
+
+import assets
+
+
+def _write(root, name, text):
+    path = root / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def static_folder(tmp_path):
+    _write(tmp_path, "js/main.js", 'import { a } from "./a.js";\nimport("./b.js");\n')
+    # a and b import each other, as helpers.js and translations.js do.
+    _write(tmp_path, "js/a.js", 'import { b } from "./b.js";\nexport const a = 1;\n')
+    _write(tmp_path, "js/b.js", 'import { a } from "./a.js";\nexport const b = 2;\n')
+    _write(tmp_path, "js/alone.js", "console.log('alone');\n" * 40)
+    _write(
+        tmp_path,
+        "css/style.css",
+        '/* comment */\n.a  .b {\n  content: "x  /* y */";\n  color: red;\n}\n' * 20,
+    )
+    _write(tmp_path, "translations/en.json", json.dumps({"hello": "Hi"}, indent=4))
+    _write(tmp_path, "robots.txt", "User-agent: *\n")
+    return tmp_path
+
+
+def _built(static_folder, manifest, name):
+    return (static_folder / manifest["assets"][name]).read_text(encoding="utf-8")
+
+
+def test_assets_get_content_hashed_names_and_compressed_copies(static_folder):
+    manifest = assets.build_assets(str(static_folder))
+
+    built = manifest["assets"]["js/alone.js"]
+    assert built.startswith("dist/js/alone.") and built.endswith(".js")
+    assert "robots.txt" not in manifest["assets"]
+    assert "gzip" in manifest["encodings"][built]
+    compressed = (static_folder / f"{built}.gz").read_bytes()
+    assert gzip.decompress(compressed) == (static_folder / built).read_bytes()
+
+    stored = json.loads((static_folder / "dist" / "manifest.json").read_text())
+    assert stored == manifest
+
+
+def test_json_and_css_are_minified_without_touching_strings(static_folder):
+    manifest = assets.build_assets(str(static_folder))
+
+    assert _built(static_folder, manifest, "translations/en.json") == '{"hello":"Hi"}'
+    css = _built(static_folder, manifest, "css/style.css")
+    assert "/* comment */" not in css
+    assert '.a .b{content: "x  /* y */";color: red}' in css
+
+
+def test_module_imports_point_at_the_hashed_names(static_folder):
+    manifest = assets.build_assets(str(static_folder))
+
+    main = _built(static_folder, manifest, "js/main.js")
+    a_name = manifest["assets"]["js/a.js"].rsplit("/", 1)[1]
+    b_name = manifest["assets"]["js/b.js"].rsplit("/", 1)[1]
+    assert f'from "./{a_name}"' in main
+    assert f'import("./{b_name}")' in main
+    assert f'from "./{a_name}"' in _built(static_folder, manifest, "js/b.js")
+
+
+def test_changing_a_dependency_renames_its_importers(static_folder):
+    before = assets.build_assets(str(static_folder))["assets"]
+
+    _write(
+        static_folder, "js/b.js", 'import { a } from "./a.js";\nexport const b = 3;\n'
+    )
+    after = assets.build_assets(str(static_folder))["assets"]
+
+    assert after["js/b.js"] != before["js/b.js"]
+    # a and main import b, directly or not, so their text changed too.
+    assert after["js/a.js"] != before["js/a.js"]
+    assert after["js/main.js"] != before["js/main.js"]
+    assert after["js/alone.js"] == before["js/alone.js"]
+    assert not (static_folder / before["js/b.js"]).exists()
+
+
+@pytest.fixture
+def built_app(app, static_folder, monkeypatch):
+    assets.build_assets(str(static_folder))
+    monkeypatch.setattr(app, "static_folder", str(static_folder))
+    monkeypatch.setitem(app.extensions, "assets", assets.load_manifest(app))
+    return app
+
+
+def test_static_url_uses_the_manifest_and_collects_preloads(built_app):
+    with built_app.test_request_context("/"):
+        url = assets.static_url("js/main.js", preload="module")
+        style = assets.static_url("css/style.css", preload="style")
+        missing = assets.static_url("img/none.png")
+
+        assert url.startswith("/static/dist/js/main.")
+        assert missing == "/static/img/none.png"
+        assert assets.take_preload_links() == [
+            f"<{url}>; rel=modulepreload",
+            f"<{style}>; rel=preload; as=style",
+        ]
+
+
+def test_built_files_are_served_precompressed_and_immutable(built_app, client):
+    with built_app.test_request_context("/"):
+        url = assets.static_url("js/alone.js")
+
+    plain = client.get(url)
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.mimetype == "text/javascript"
+    assert gzip.decompress(compressed.data) == plain.data
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert "immutable" in compressed.headers["Cache-Control"]
+
+
+def test_plain_static_names_are_not_cached_as_immutable(client):
+    response = client.get("/static/css/style.css")
+
+    assert response.status_code == 200
+    assert "immutable" not in response.headers["Cache-Control"]
+
+
+def test_pre_rendered_pages_announce_their_preloads(client):
+    response = client.get("/contact")
+
+    assert "rel=preload; as=style" in response.headers["Link"]
@@ -1,18 +1,25 @@
-"""The deep analysis gate and its monthly counter.
+"""The deep analysis gate and its monthly allowance.
 
 Deep analysis is the only endpoint that spends real money per call — ~16x a
 normal evaluation, see DEEP_ANALYSIS_MODEL in config.py — so the gate and the
-counter are the cost ceiling, not a nicety. The Vertex call itself is stubbed
+allowance are the cost ceiling, not a nicety. The Vertex call itself is stubbed
 here; the model's output is checked by deploying, because that is the only place
 it can be.
+
+The call runs on a background thread, so `_request` polls the status endpoint
+the way deepAnalysis.js does, with the stub still in place.
 """
 
+import threading
+import time
 from datetime import UTC, datetime, timedelta
 from unittest import mock
 
 from config import get_settings
 from extensions import db
-from models import Answer, User
+from models import Answer, QuotaLedger, User
+from routes import deep_analysis
+from services.quota_service import period_for
 
 SETTINGS = get_settings()
 
@@ -60,11 +67,44 @@ def _answer_for(client, tier=None):
     return answer_id
 
 
-def _request(client, answer_id):
-    with mock.patch(
-        "routes.deep_analysis.run_deep_analysis", return_value=ANALYSIS
-    ) as run:
+def _used(period=None):
+    """The deep analyses charged to the only user in `period` (default: now)."""
+    row = db.session.get(
+        QuotaLedger,
+        (User.query.one().uuid, "deep_analysis", period or period_for("deep_analysis")),
+    )
+    return row.count if row else 0
+
+
+def _spend(count, period=None):
+    db.session.add(
+        QuotaLedger(
+            user_uuid=User.query.one().uuid,
+            resource="deep_analysis",
+            period=period or period_for("deep_analysis"),
+            count=count,
+        )
+    )
+    db.session.commit()
+
+
+def _wait(client, status_url, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get(status_url)
+        if response.get_json().get("status") != "pending":
+            return response
+        time.sleep(0.05)
+    raise AssertionError("deep analysis did not finish")
+
+
+def _request(client, answer_id, **stub):
+    """Press the button and return the final response, as the browser sees it."""
+    stub = stub or {"return_value": ANALYSIS}
+    with mock.patch("routes.deep_analysis.run_deep_analysis", **stub) as run:
         response = client.post("/deep_analysis", json={"answer_id": answer_id})
+        if response.status_code == 202:
+            response = _wait(client, response.get_json()["status_url"])
     return response, run
 
 
@@ -115,9 +155,7 @@ def test_the_counter_increments(client):
 
     _request(client, answer_id)
 
-    user = User.query.one()
-    assert user.monthly_deep_analysis_count == 1
-    assert user.last_monthly_deep_analysis_reset is not None
+    assert _used() == 1
 
 
 def test_a_second_request_for_the_same_answer_is_free(client):
@@ -130,22 +168,22 @@ def test_a_second_request_for_the_same_answer_is_free(client):
     assert response.get_json()["cached"] is True
     # Neither a second model call nor a second charge against the allowance.
     run.assert_not_called()
-    assert User.query.one().monthly_deep_analysis_count == 1
+    assert _used() == 1
 
 
 def test_it_blocks_at_the_limit(client):
     answer_id = _answer_for(client, tier="plus")
-    user = User.query.one()
     limit = SETTINGS.TIER_MONTHLY_DEEP_ANALYSIS_LIMITS["plus"]
-    user.monthly_deep_analysis_count = limit
-    user.last_monthly_deep_analysis_reset = datetime.now(UTC)
-    db.session.commit()
+    _spend(limit)
 
     response, run = _request(client, answer_id)
 
     assert response.status_code == 429
     assert response.get_json()["status"] == "limit_reached"
     run.assert_not_called()
+    assert _used() == limit
+    # The claim is released, so the answer is not left looking pending.
+    assert Answer.query.one().deep_analysis_status is None
 
 
 def test_the_limit_message_names_the_limit(client):
@@ -154,10 +192,7 @@ def test_the_limit_message_names_the_limit(client):
     # has to say what the limit was rather than just failing.
     answer_id = _answer_for(client, tier="plus")
     limit = SETTINGS.TIER_MONTHLY_DEEP_ANALYSIS_LIMITS["plus"]
-    user = User.query.one()
-    user.monthly_deep_analysis_count = limit
-    user.last_monthly_deep_analysis_reset = datetime.now(UTC)
-    db.session.commit()
+    _spend(limit)
 
     response, _ = _request(client, answer_id)
 
@@ -166,12 +201,7 @@ def test_the_limit_message_names_the_limit(client):
 
 def test_the_limit_message_is_localised(client):
     answer_id = _answer_for(client, tier="plus")
-    user = User.query.one()
-    user.monthly_deep_analysis_count = SETTINGS.TIER_MONTHLY_DEEP_ANALYSIS_LIMITS[
-        "plus"
-    ]
-    user.last_monthly_deep_analysis_reset = datetime.now(UTC)
-    db.session.commit()
+    _spend(SETTINGS.TIER_MONTHLY_DEEP_ANALYSIS_LIMITS["plus"])
     with client.session_transaction() as flask_session:
         flask_session["language"] = "de"
 
@@ -180,41 +210,156 @@ def test_the_limit_message_is_localised(client):
     assert "Tiefenanalysen" in response.get_json()["error"]
 
 
-def test_the_counter_resets_in_a_new_month(client):
+def test_a_new_month_starts_a_new_allowance(client):
     answer_id = _answer_for(client, tier="plus")
-    user = User.query.one()
-    user.monthly_deep_analysis_count = SETTINGS.TIER_MONTHLY_DEEP_ANALYSIS_LIMITS[
-        "plus"
-    ]
-    # Any reset stamp before the 1st of this month is a spent *previous* month.
     now = datetime.now(UTC)
-    user.last_monthly_deep_analysis_reset = datetime(
-        now.year, now.month, 1, tzinfo=UTC
-    ) - timedelta(days=1)
-    db.session.commit()
+    last_month = period_for(
+        "deep_analysis", datetime(now.year, now.month, 1) - timedelta(days=1)
+    )
+    _spend(SETTINGS.TIER_MONTHLY_DEEP_ANALYSIS_LIMITS["plus"], period=last_month)
 
     response, run = _request(client, answer_id)
 
     assert response.status_code == 200
     run.assert_called_once()
-    # Reset to zero, then charged for this call.
-    assert User.query.one().monthly_deep_analysis_count == 1
+    assert _used() == 1
+    # Last month's row is history, not something that was reset.
+    assert _used(last_month) == SETTINGS.TIER_MONTHLY_DEEP_ANALYSIS_LIMITS["plus"]
 
 
 def test_a_failed_call_costs_no_allowance(client):
     answer_id = _answer_for(client, tier="plus")
 
-    with mock.patch(
-        "routes.deep_analysis.run_deep_analysis", side_effect=RuntimeError("vertex 503")
-    ):
+    response, _ = _request(client, answer_id, side_effect=RuntimeError("vertex 503"))
+
+    assert response.get_json()["status"] == "failed"
+    assert _used() == 0
+    assert Answer.query.one().deep_analysis is None
+
+
+def test_a_failed_run_can_be_retried(client):
+    answer_id = _answer_for(client, tier="plus")
+    _request(client, answer_id, side_effect=RuntimeError("vertex 503"))
+
+    response, run = _request(client, answer_id)
+
+    assert response.get_json()["analysis"] == ANALYSIS
+    run.assert_called_once()
+    assert _used() == 1
+
+
+def test_the_request_thread_is_not_held(client):
+    answer_id = _answer_for(client, tier="plus")
+    release = threading.Event()
+
+    def slow(answer, language):
+        release.wait(10)
+        return ANALYSIS
+
+    with mock.patch("routes.deep_analysis.run_deep_analysis", side_effect=slow):
         response = client.post("/deep_analysis", json={"answer_id": answer_id})
+        status_url = response.get_json()["status_url"]
 
-    assert response.status_code == 502
-    user = User.query.one()
-    assert not user.monthly_deep_analysis_count
+        assert response.status_code == 202
+        assert response.headers["Location"] == status_url
+        assert client.get(status_url).get_json()["status"] == "pending"
+        # Reserved while in flight; a failure would hand it back.
+        assert _used() == 1
+
+        release.set()
+        assert _wait(client, status_url).get_json()["status"] == "done"
+
+
+def test_a_second_press_while_pending_does_not_start_another_run(client):
+    answer_id = _answer_for(client, tier="plus")
+    release = threading.Event()
+
+    def slow(answer, language):
+        release.wait(10)
+        return ANALYSIS
+
+    with mock.patch("routes.deep_analysis.run_deep_analysis", side_effect=slow) as run:
+        first = client.post("/deep_analysis", json={"answer_id": answer_id})
+        second = client.post("/deep_analysis", json={"answer_id": answer_id})
+        release.set()
+        _wait(client, first.get_json()["status_url"])
+
+    assert second.status_code == 202
+    run.assert_called_once()
+    assert _used() == 1
+
+
+def test_a_stale_pending_run_is_reported_as_failed(client):
+    answer_id = _answer_for(client, tier="plus")
+    answer = Answer.query.one()
+    answer.deep_analysis_status = "pending"
+    answer.deep_analysis_requested_at = datetime.now(UTC) - timedelta(
+        seconds=SETTINGS.DEEP_ANALYSIS_STALE_AFTER_SECONDS + 1
+    )
+    db.session.commit()
+
+    response = client.get(f"/deep_analysis/{answer_id}")
+
+    assert response.get_json()["status"] == "failed"
+
+
+def test_a_run_that_goes_stale_is_refunded_once(client):
+    answer_id = _answer_for(client, tier="plus")
+    release = threading.Event()
+
+    def slow(answer, language):
+        release.wait(10)
+        return {"verdict": "Too late."}
+
+    with mock.patch("routes.deep_analysis.run_deep_analysis", side_effect=slow):
+        status_url = client.post(
+            "/deep_analysis", json={"answer_id": answer_id}
+        ).get_json()["status_url"]
+        assert _used() == 1
+        # The instance running it went away, as far as anyone can tell.
+        Answer.query.filter_by(id=answer_id).update(
+            {
+                Answer.deep_analysis_requested_at: datetime.now(UTC)
+                - timedelta(seconds=SETTINGS.DEEP_ANALYSIS_STALE_AFTER_SECONDS + 1)
+            }
+        )
+        db.session.commit()
+
+        assert client.get(status_url).get_json()["status"] == "failed"
+        assert client.get(status_url).get_json()["status"] == "failed"
+        assert _used() == 0
+
+        # Pressed again, and then the first run finishes after all.
+        retry, run = _request(client, answer_id)
+        release.set()
+        _drain_runs()
+
+    assert retry.get_json()["analysis"] == ANALYSIS
+    run.assert_called_once()
+    # Only the run that stored its result is paid for, and it is not
+    # overwritten by the stale one.
+    assert _used() == 1
+    db.session.expire_all()
+    assert Answer.query.one().deep_analysis == ANALYSIS
+
+
+def test_a_result_that_cannot_be_stored_is_refunded(client):
+    answer_id = _answer_for(client, tier="plus")
+
+    # Not JSON, so the UPDATE that stores it fails.
+    response, _ = _request(client, answer_id, return_value={"verdict": object()})
+
+    assert response.get_json()["status"] == "failed"
+    assert _used() == 0
     assert Answer.query.one().deep_analysis is None
 
 
+def _drain_runs():
+    """Wait for every queued run to finish."""
+    deep_analysis._get_executor().shutdown(wait=True)
+    deep_analysis._executor = None
+
+
 def test_another_visitors_answer_is_not_analysable(app, client):
     answer_id = _answer_for(client, tier="plus")
     owner_uuid = User.query.one().uuid
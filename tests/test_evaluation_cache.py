@@ -0,0 +1,153 @@
+"""The evaluation cache in front of the scored pass.
+
+The point of the cache is that a repeat never reaches Vertex, so these count
+calls on a stubbed client rather than checking timings.
+"""
+
+import json
+from unittest import mock
+
+from config import get_settings
+from extensions import db
+from models import EvaluationCache
+from services import evaluation_cache
+from services.evaluator import LLMEvaluator
+from services.llm import RESPONSE_SCHEMA
+
+SETTINGS = get_settings()
+
+RAW = {
+    "overall_explanation": "Solid.",
+    "overall_rating": 7,
+    "relevance_explanation": "On topic.",
+    "relevance_rating": 8,
+    "logical_structure_explanation": "Follows.",
+    "logical_structure_rating": 7,
+    "clarity_explanation": "Clear.",
+    "clarity_rating": 7,
+    "depth_explanation": "Could go further.",
+    "depth_rating": 6,
+    "objectivity_explanation": "Balanced.",
+    "objectivity_rating": 7,
+    "creativity_explanation": "Familiar.",
+    "creativity_rating": 5,
+    "challenge": "What about durable goods?",
+    "argument_structure": {"nodes": [], "edges": []},
+}
+
+ARGS = (
+    "Do experiences make you happier than possessions?",
+    "Experiences beat possessions.",
+    "We adapt to possessions, while memories keep paying out.",
+    "Some possessions enable experiences.",
+)
+
+
+def _evaluator():
+    client = mock.MagicMock()
+    client.models.generate_content.return_value = mock.Mock(text=json.dumps(RAW))
+    instructions = {"en": "Evaluate in English.", "de": "Bewerte auf Deutsch."}
+    return LLMEvaluator(client, instructions, RESPONSE_SCHEMA), client
+
+
+def test_a_repeat_skips_the_model_call(app):
+    evaluator, client = _evaluator()
+
+    with app.test_request_context():
+        first = evaluator.evaluate(*ARGS)
+        second = evaluator.evaluate(*ARGS)
+
+    assert client.models.generate_content.call_count == 1
+    assert first == second
+    assert EvaluationCache.query.one().hits == 1
+
+
+def test_whitespace_differences_still_hit(app):
+    evaluator, client = _evaluator()
+    question, claim, argument, counter = ARGS
+
+    with app.test_request_context():
+        evaluator.evaluate(question, claim, argument, counter)
+        evaluator.evaluate(
+            question, f"  {claim}\n", argument.replace(" ", "  "), counter
+        )
+
+    assert client.models.generate_content.call_count == 1
+
+
+def test_language_is_part_of_the_key(app):
+    evaluator, client = _evaluator()
+
+    with app.test_request_context():
+        evaluator.evaluate(*ARGS)
+    with app.test_request_context():
+        from flask import session
+
+        session["language"] = "de"
+        evaluator.evaluate(*ARGS)
+
+    assert client.models.generate_content.call_count == 2
+
+
+def test_a_changed_instruction_misses(app):
+    evaluator, client = _evaluator()
+
+    with app.test_request_context():
+        evaluator.evaluate(*ARGS)
+        evaluator.system_instructions["en"] = "Evaluate harder."
+        evaluator.evaluate(*ARGS)
+
+    assert client.models.generate_content.call_count == 2
+
+
+def test_a_failed_call_is_not_cached(app):
+    evaluator, client = _evaluator()
+    client.models.generate_content.side_effect = RuntimeError("vertex 503")
+
+    with app.test_request_context():
+        try:
+            evaluator.evaluate(*ARGS)
+        except RuntimeError:
+            pass
+
+    assert EvaluationCache.query.count() == 0
+
+
+def test_the_least_recently_used_entry_is_evicted(app):
+    evaluator, client = _evaluator()
+    question, _, argument, counter = ARGS
+
+    with (
+        app.test_request_context(),
+        mock.patch.object(SETTINGS, "EVALUATION_CACHE_MAX_ENTRIES", 2),
+    ):
+        evaluator.evaluate(question, "First.", argument, counter)
+        evaluator.evaluate(question, "Second.", argument, counter)
+        evaluator.evaluate(question, "First.", argument, counter)  # hit, now newest
+        evaluator.evaluate(question, "Third.", argument, counter)
+        db.session.expire_all()
+
+        assert EvaluationCache.query.count() == 2
+        evaluator.evaluate(question, "First.", argument, counter)
+
+    # First, Second and Third were misses; Second was evicted, First still hits.
+    assert client.models.generate_content.call_count == 3
+
+
+def test_hits_and_misses_are_counted(app):
+    evaluator, _ = _evaluator()
+    before = evaluation_cache.cache_stats()
+
+    with app.test_request_context():
+        evaluator.evaluate(*ARGS)
+        evaluator.evaluate(*ARGS)
+
+    after = evaluation_cache.cache_stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+
+def test_health_reports_the_hit_rate(client):
+    assert client.get("/health").get_json()["evaluation_cache"] == (
+        evaluation_cache.cache_stats()
+    )
@@ -0,0 +1,127 @@
+"""Async submission mode: queue, poll, and the same stored answer at the end.
+
+The worker runs on a real thread here, so each test polls the status endpoint
+the way the browser does rather than reaching into the executor.
+"""
+
+import time
+
+from models import Answer, EvaluationJob, User
+
+ANSWER = {
+    "question_id": "experiences",
+    "question_text": "Do experiences make you happier than possessions?",
+    "claim": "Experiences beat possessions.",
+    "argument": (
+        "Possessions lose their novelty because we adapt to them, while "
+        "experiences keep paying out as memories that we revisit and retell."
+    ),
+    "counterargument": "Some possessions do enable repeated experiences.",
+}
+
+ASYNC = {"Prefer": "respond-async"}
+
+
+def _wait(client, status_url, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = client.get(status_url).get_json()
+        if body.get("status") in ("done", "failed"):
+            return body
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_async_submission_returns_a_job_and_stores_the_answer(client):
+    client.get("/")
+
+    response = client.post("/submit_answer", json=ANSWER, headers=ASYNC)
+
+    assert response.status_code == 202
+    job = response.get_json()
+    assert response.headers["Location"] == job["status_url"]
+
+    finished = _wait(client, job["status_url"])
+    assert finished["status"] == "done"
+    assert finished["result_status"] == 200
+    assert finished["result"]["answer_id"] == Answer.query.one().id
+    assert User.query.count() == 1
+
+
+def test_the_session_is_updated_when_the_result_is_collected(client):
+    client.get("/")
+    job = client.post("/submit_answer", json=ANSWER, headers=ASYNC).get_json()
+
+    finished = _wait(client, job["status_url"])
+
+    with client.session_transaction() as flask_session:
+        assert flask_session["xp"] == finished["result"]["total_xp"]
+
+
+def test_validation_still_happens_before_queueing(client):
+    client.get("/")
+
+    response = client.post(
+        "/submit_answer", json={**ANSWER, "argument": ""}, headers=ASYNC
+    )
+
+    assert response.status_code == 400
+    assert EvaluationJob.query.count() == 0
+
+
+def test_a_duplicate_is_rejected_before_queueing(client):
+    client.get("/")
+    client.post("/submit_answer", json=ANSWER)
+
+    response = client.post("/submit_answer", json=ANSWER, headers=ASYNC)
+
+    assert response.status_code == 409
+    assert response.get_json()["error"] == "similarAnswer"
+    assert EvaluationJob.query.count() == 0
+    assert Answer.query.count() == 1
+
+
+def test_async_challenge_response(client):
+    client.get("/")
+    answer_id = client.post("/submit_answer", json=ANSWER).get_json()["answer_id"]
+
+    job = client.post(
+        "/submit_challenge_response",
+        json={"answer_id": answer_id, "challenge_response": "A fair point."},
+        headers=ASYNC,
+    ).get_json()
+    finished = _wait(client, job["status_url"])
+
+    assert finished["result_status"] == 200
+    assert Answer.query.one().challenge_response == "A fair point."
+
+
+def test_another_visitor_cannot_read_a_job(app, client):
+    client.get("/")
+    job = client.post("/submit_answer", json=ANSWER, headers=ASYNC).get_json()
+    _wait(client, job["status_url"])
+
+    other = app.test_client()
+    other.get("/")
+
+    assert other.get(job["status_url"]).status_code == 404
+
+
+def test_without_the_header_the_response_is_inline(client):
+    client.get("/")
+
+    response = client.post("/submit_answer", json=ANSWER)
+
+    assert response.status_code == 200
+    assert EvaluationJob.query.count() == 0
+
+
+def test_the_event_stream_ends_with_done(client):
+    client.get("/")
+    job = client.post("/submit_answer", json=ANSWER, headers=ASYNC).get_json()
+    _wait(client, job["status_url"])
+
+    response = client.get(f"{job['status_url']}/events")
+
+    assert response.mimetype == "text/event-stream"
+    assert b"event: done" in response.data
@@ -0,0 +1,78 @@
+"""The export: streamed, as an HTML document or as NDJSON."""
+
+import json
+from datetime import datetime, timedelta
+
+from extensions import db
+from models import Answer, User
+
+
+def _subscriber_with_answers(client, count, tier="plus"):
+    client.get("/")
+    with client.session_transaction() as flask_session:
+        user_uuid = flask_session["user_id"]
+    db.session.add(User(uuid=user_uuid, username="exporter", tier=tier))
+    for i in range(count):
+        db.session.add(
+            Answer(
+                user_uuid=user_uuid,
+                question_id=f"q{i}",
+                question_text=f"Question {i}?",
+                claim=f"Claim {i}.",
+                argument="An argument.",
+                evaluation_scores={"Overall": 7, "Clarity": 6},
+                evaluation_feedback={"Overall": "Solid.", "Clarity": "Mostly."},
+                xp_earned=10,
+                created_at=datetime(2026, 9, 1) + timedelta(hours=i),
+            )
+        )
+    db.session.commit()
+
+
+def test_the_html_export_is_streamed(client):
+    _subscriber_with_answers(client, 120)
+
+    response = client.get("/export")
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.headers["Cache-Control"] == "no-store, private"
+    html = response.get_data(as_text=True)
+    assert "120 arguments" in html
+    assert html.count("<article>") == 120
+    # Newest first.
+    assert html.index("Question 119?") < html.index("Question 0?")
+
+
+def test_the_ndjson_export_has_one_answer_per_line(client):
+    _subscriber_with_answers(client, 3)
+
+    response = client.get("/export?format=ndjson")
+
+    assert response.mimetype == "application/x-ndjson"
+    assert 'filename="argumentor-' in response.headers["Content-Disposition"]
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["claim"] for line in lines] == ["Claim 2.", "Claim 1.", "Claim 0."]
+    assert lines[0]["evaluation_feedback"]["Clarity"] == "Mostly."
+
+
+def test_an_empty_export(client):
+    _subscriber_with_answers(client, 0)
+
+    html = client.get("/export").get_data(as_text=True)
+
+    assert "0 arguments" in html
+    assert "No arguments yet." in html
+
+
+def test_the_export_stays_paid(client):
+    _subscriber_with_answers(client, 1, tier="free")
+
+    assert client.get("/export").status_code == 402
+    assert client.get("/export?format=ndjson").status_code == 402
+
+
+def test_an_unknown_format_is_refused(client):
+    _subscriber_with_answers(client, 1)
+
+    assert client.get("/export?format=pdf").status_code == 400
@@ -0,0 +1,53 @@
+"""GC policy: tuned thresholds, pauses recorded, no collections on request paths."""
+
+import gc
+from pathlib import Path
+from unittest import mock
+
+import gc_policy
+from config import get_settings
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def test_the_app_applies_the_configured_thresholds(app):
+    settings = get_settings()
+    assert gc.get_threshold() == (
+        settings.GC_GEN0_THRESHOLD,
+        settings.GC_GEN1_THRESHOLD,
+        settings.GC_GEN2_THRESHOLD,
+    )
+    assert gc_policy._on_collection in gc.callbacks
+    assert gc.callbacks.count(gc_policy._on_collection) == 1
+
+
+def test_pauses_are_recorded_per_generation():
+    before = gc_policy.stats()["generations"][2]["collections"]
+
+    gc.collect()
+
+    stats = gc_policy.stats()
+    assert stats["generations"][2]["collections"] == before + 1
+    assert stats["generations"][2]["pause_max_ms"] > 0
+    assert stats["recent_pause_p99_ms"] > 0
+
+
+def test_health_reports_gc_without_collecting(client):
+    with mock.patch("gc.collect", side_effect=AssertionError("collected")):
+        response = client.get("/health")
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["gc"]["thresholds"] == list(gc.get_threshold())
+    assert len(body["gc"]["generations"]) == 3
+
+
+def test_no_request_path_forces_a_collection():
+    offenders = [
+        str(path.relative_to(SRC))
+        for path in SRC.rglob("*.py")
+        if path.name != "gc_policy.py"
+        and "gc.collect(" in path.read_text(encoding="utf-8")
+    ]
+
+    assert offenders == []
@@ -0,0 +1,176 @@
+"""The keyset-paginated history: /api/history and the profile's pages.
+
+Answers are inserted directly, several sharing a timestamp, so the id
+tie-break in the (created_at, id) order is exercised as well.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models import Answer, User
+from services.history_service import InvalidCursor, history_page
+
+START = datetime(2026, 9, 1, 12, 0)
+FEEDBACK = {"Overall": "Solid.", "Clarity": "Clear throughout."}
+
+
+@contextmanager
+def _statements():
+    seen = []
+
+    def record(conn, cursor, statement, parameters, *args):
+        seen.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _user_with_answers(client, count, tier="plus"):
+    """A user with `count` answers; returns their ids, newest first."""
+    client.get("/")
+    with client.session_transaction() as flask_session:
+        user_uuid = flask_session["user_id"]
+    db.session.add(User(uuid=user_uuid, username="historian", tier=tier))
+    for i in range(count):
+        db.session.add(
+            Answer(
+                id=f"answer-{i:03d}",
+                user_uuid=user_uuid,
+                question_id=f"q{i}",
+                question_text=f"Question {i}?",
+                claim="A claim.",
+                argument="An argument.",
+                evaluation_scores={"Overall": 7, "Relevance": 8},
+                evaluation_feedback=FEEDBACK,
+                xp_earned=10,
+                # Pairs of answers share a timestamp.
+                created_at=START + timedelta(minutes=i // 2),
+            )
+        )
+    db.session.commit()
+    return [f"answer-{i:03d}" for i in reversed(range(count))]
+
+
+def _walk(client, limit=None):
+    url = "/api/history" + (f"?limit={limit}" if limit else "")
+    seen = []
+    while url:
+        body = client.get(url).get_json()
+        seen.extend(answer["id"] for answer in body["answers"])
+        cursor = body["next_cursor"]
+        url = f"/api/history?cursor={cursor}" + (f"&limit={limit}" if limit else "")
+        url = url if cursor else None
+    return seen
+
+
+def test_pages_cover_the_history_newest_first(client):
+    expected = _user_with_answers(client, 23)
+
+    assert _walk(client) == expected
+    assert _walk(client, limit=4) == expected
+
+
+def test_summary_rows_leave_out_the_feedback(client):
+    _user_with_answers(client, 1)
+
+    answer = client.get("/api/history").get_json()["answers"][0]
+
+    assert answer["question_text"] == "Question 0?"
+    assert answer["total_xp"] == 10
+    assert "evaluation_feedback" not in answer
+    assert "argument" not in answer
+
+
+def test_previous_returns_to_the_page_before(client):
+    _user_with_answers(client, 25)
+    first = client.get("/api/history").get_json()
+    second = client.get(f"/api/history?cursor={first['next_cursor']}").get_json()
+
+    back = client.get(f"/api/history?cursor={second['prev_cursor']}").get_json()
+
+    assert second["position"] == 10
+    assert back["answers"] == first["answers"]
+    assert back["position"] == 0
+    assert back["prev_cursor"] is None
+
+
+def test_a_deep_page_neither_counts_nor_offsets(client):
+    _user_with_answers(client, 45)
+    cursor = None
+    for _ in range(4):
+        url = "/api/history" + (f"?cursor={cursor}" if cursor else "")
+        cursor = client.get(url).get_json()["next_cursor"]
+
+    with _statements() as statements:
+        body = client.get(f"/api/history?cursor={cursor}").get_json()
+
+    assert [answer["id"] for answer in body["answers"]] == [
+        "answer-004",
+        "answer-003",
+        "answer-002",
+        "answer-001",
+        "answer-000",
+    ]
+    answer_queries = [(s, p) for s, p in statements if "FROM answer" in s]
+    assert len(answer_queries) == 1
+    statement, parameters = answer_queries[0]
+    # SQLite spells a bare LIMIT as "LIMIT ? OFFSET ?" with an offset of 0.
+    assert "OFFSET" not in statement or parameters[-1] == 0
+    assert "count(" not in statement.lower()
+
+
+def test_a_free_tier_stops_at_its_window(client):
+    _user_with_answers(client, 15, tier="free")
+
+    assert len(_walk(client, limit=4)) == 10
+
+
+def test_a_tampered_cursor_is_refused(client):
+    _user_with_answers(client, 15, tier="free")
+    cursor = client.get("/api/history?limit=4").get_json()["next_cursor"]
+    payload, _, signature = cursor.rpartition(".")
+
+    response = client.get(f"/api/history?cursor={payload}x.{signature}")
+
+    assert response.status_code == 400
+
+
+def test_another_users_cursor_is_refused(app, client):
+    _user_with_answers(client, 15, tier="free")
+    cursor = client.get("/api/history?limit=4").get_json()["next_cursor"]
+
+    with pytest.raises(InvalidCursor):
+        history_page("someone-else", cursor, cap=10)
+
+
+def test_details_carry_the_feedback_for_the_owner_only(app, client):
+    newest = _user_with_answers(client, 3)[0]
+
+    body = client.get(f"/api/history/{newest}").get_json()
+    other = app.test_client()
+    other.get("/")
+
+    assert body["evaluation_feedback"] == FEEDBACK
+    assert body["argument"] == "An argument."
+    assert other.get(f"/api/history/{newest}").status_code == 404
+
+
+def test_the_profile_pages_by_cursor(client):
+    _user_with_answers(client, 15)
+    first = client.get("/profile")
+    cursor = client.get("/api/history").get_json()["next_cursor"]
+
+    second = client.get(f"/profile?cursor={cursor}")
+
+    assert b"Question 14?" in first.data
+    assert b"Clear throughout." not in first.data
+    assert b"Question 4?" in second.data
+    assert b"Question 14?" not in second.data
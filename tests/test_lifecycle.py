@@ -0,0 +1,93 @@
+"""Forked gunicorn workers: own database pool, own clients, own threads."""
+
+import os
+import runpy
+import threading
+from pathlib import Path
+from unittest import mock
+
+from sqlalchemy import text
+
+import extensions
+import lifecycle
+from extensions import db
+from routes import deep_analysis
+from services import evaluation_jobs
+
+CONFIG = Path(__file__).resolve().parent.parent / "gunicorn.conf.py"
+
+
+def _load_config(monkeypatch):
+    # Recorded, so the variable the config sets is undone after the test; and
+    # the config's gc.disable() is meant for the gunicorn master, not pytest.
+    monkeypatch.setenv(lifecycle.HOOKS_ENV, "0")
+    with mock.patch("gc.disable") as disable:
+        config = runpy.run_path(str(CONFIG))
+    disable.assert_called_once_with()
+    return config
+
+
+def test_the_config_preloads_and_installs_the_hooks(monkeypatch):
+    monkeypatch.setenv("PORT", "9123")
+
+    config = _load_config(monkeypatch)
+
+    assert config["bind"] == "0.0.0.0:9123"
+    assert config["preload_app"] is True
+    for hook in ("pre_fork", "post_fork", "post_worker_init"):
+        assert callable(config[hook])
+    assert lifecycle.hooks_installed()
+
+
+def test_reinitializing_replaces_the_pool_and_the_clients(app, monkeypatch):
+    monkeypatch.setattr("google.genai.Client", lambda **kwargs: mock.MagicMock())
+    engine = db.engines[None]
+    pool = engine.pool
+    vertex = extensions.vertex_client()
+    evaluation_jobs._get_executor()
+    deep_analysis._get_executor()
+
+    lifecycle.reinitialize_after_fork(app)
+
+    assert engine.pool is not pool
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+    assert extensions.vertex_client() is not vertex
+    assert evaluation_jobs._executor is None
+    assert deep_analysis._executor is None
+
+
+def test_the_fork_hooks_freeze_then_reinitialize(app, monkeypatch):
+    config = _load_config(monkeypatch)
+    server = mock.Mock()
+    server.cfg.preload_app = True
+    worker = mock.Mock()
+    worker.app.wsgi.return_value = app
+
+    with (
+        mock.patch.object(lifecycle, "reinitialize_after_fork") as reinitialize,
+        mock.patch("gc.freeze") as freeze,
+        mock.patch("gc.enable") as enable,
+    ):
+        config["pre_fork"](server, worker)
+        config["post_fork"](server, worker)
+
+    reinitialize.assert_called_once_with(app)
+    freeze.assert_called_once_with()
+    enable.assert_called_once_with()
+
+
+def test_background_threads_start_once_per_process(monkeypatch):
+    started = threading.Event()
+    monkeypatch.setattr(lifecycle, "_threads", {"probe": started.set})
+    monkeypatch.setattr(lifecycle, "_threads_started_in", None)
+
+    with mock.patch("threading.Thread") as thread:
+        lifecycle.start_background_threads()
+        lifecycle.start_background_threads()
+    assert thread.call_count == 1
+
+    # A forked worker has a new pid, so it starts its own.
+    monkeypatch.setattr(lifecycle, "_threads_started_in", os.getpid() + 1)
+    lifecycle.start_background_threads()
+    assert started.wait(1)
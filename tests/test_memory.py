@@ -0,0 +1,58 @@
+"""Live memory accounting: current RSS/PSS, and restarts only on sustained usage."""
+
+import sys
+from unittest import mock
+
+import pytest
+
+import memory
+from memory import MemoryWatch
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_current_rss_falls_when_memory_is_released():
+    before = memory.rss_mb()
+    block = bytearray(64 * 1024 * 1024)
+    block[::4096] = b"x" * len(block[::4096])
+    grown = memory.rss_mb()
+    del block
+    released = memory.rss_mb()
+
+    assert grown - before > 50
+    assert released < grown - 50
+    # The kernel's high-water mark lags statm by a few pages.
+    assert memory.peak_rss_mb() > grown - 1
+    assert 0 < memory.pss_mb() <= grown
+
+
+def test_without_proc_the_peak_is_reported():
+    with mock.patch("builtins.open", side_effect=FileNotFoundError):
+        assert memory.rss_mb() == memory.peak_rss_mb()
+        assert memory.pss_mb() is None
+        assert memory.usage().live_mb == memory.usage().rss_mb
+
+
+def test_a_single_spike_does_not_restart():
+    watch = MemoryWatch(warn_mb=220, restart_mb=250, samples=3)
+
+    assert not watch.observe(300)
+    assert not watch.observe(200)
+    assert not watch.observe(300)
+    assert not watch.observe(300)
+
+
+def test_sustained_usage_restarts_despite_brief_dips():
+    watch = MemoryWatch(warn_mb=220, restart_mb=250, samples=3)
+
+    assert not watch.observe(260)
+    # Between the thresholds: not over, but not recovered either.
+    assert not watch.observe(240)
+    assert not watch.observe(260)
+    assert watch.observe(270)
+
+
+def test_health_reports_current_and_peak(client):
+    body = client.get("/health").get_json()
+
+    assert body["memory"]["peak_mb"] >= body["memory"]["rss_mb"] > 0
+    assert 0 < body["memory_mb"] <= body["memory"]["rss_mb"]
@@ -0,0 +1,74 @@
+"""The question catalog: parsed once per language, rebuilt when the file changes."""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from unittest import mock
+
+from services.achievement_service import get_question_category
+from services.question_service import find_question_by_id, get_catalog
+
+
+def test_requests_do_not_parse_the_translation_file(client):
+    client.get("/")
+
+    with mock.patch("json.load", side_effect=AssertionError("parsed")):
+        all_questions = client.get("/get_all_questions")
+        selected = client.post("/select_question", json={"question_id": "experiences"})
+
+    assert all_questions.status_code == 200
+    assert selected.get_json()["id"] == "experiences"
+
+
+def test_all_questions_lists_every_question_once(app, client):
+    client.get("/")
+
+    body = client.get("/get_all_questions").get_json()
+
+    with app.test_request_context():
+        catalog = get_catalog("en")
+    assert [q["id"] for q in body] == list(catalog.by_id)
+    assert len(body) == sum(len(ids) for ids in catalog.ids_by_category.values())
+
+
+def test_each_language_keeps_its_own_catalog(app):
+    with app.test_request_context():
+        english = get_catalog("en")
+        german = get_catalog("de")
+
+        assert english.language == "en" and german.language == "de"
+        assert get_catalog("en") is english
+        assert set(english.by_id) == set(german.by_id)
+
+
+def test_lookups_by_id(app):
+    with app.test_request_context():
+        question = find_question_by_id("experiences")
+
+        assert question["category"] == "Personal Growth & Relationships"
+        assert get_question_category("experiences") == question["category"]
+        assert find_question_by_id("no-such-question") is None
+
+
+def test_an_edited_file_is_picked_up(app, tmp_path):
+    translations = tmp_path / "static" / "translations"
+    translations.mkdir(parents=True)
+    source = Path(app.root_path) / "static" / "translations" / "en.json"
+    target = translations / "en.json"
+    shutil.copy(source, target)
+
+    with app.test_request_context():
+        before = get_catalog("en", root_path=tmp_path)
+        assert get_catalog("en", root_path=tmp_path) is before
+
+        data = json.loads(target.read_text(encoding="utf-8"))
+        data["questions"]["Philosophy"]["a-new-question"] = "Is this new?"
+        target.write_text(json.dumps(data), encoding="utf-8")
+        os.utime(target, (before.mtime + 10, before.mtime + 10))
+
+        after = get_catalog("en", root_path=tmp_path)
+
+    assert after is not before
+    assert after.category_by_id["a-new-question"] == "Philosophy"
+    assert "a-new-question" not in before.by_id
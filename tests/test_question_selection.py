@@ -0,0 +1,88 @@
+"""Random question selection over the seen bitmap and the answered-id set."""
+
+from extensions import db
+from models import Answer, User
+from services.question_service import get_catalog
+
+
+def _catalog(app):
+    with app.test_request_context():
+        return get_catalog("en")
+
+
+def _draw(client, **params):
+    return client.get("/get_question", query_string=params).get_json()
+
+
+def test_the_first_question_is_the_fixed_one(app, client):
+    client.get("/")
+
+    assert _draw(client)["id"] == "experiences"
+
+
+def test_no_question_repeats_until_all_have_been_seen(app, client):
+    catalog = _catalog(app)
+    client.get("/")
+
+    drawn = [_draw(client)["id"] for _ in catalog.ids]
+
+    assert sorted(drawn) == sorted(catalog.ids)
+
+
+def test_the_cookie_does_not_grow_with_seen_questions(app, client):
+    catalog = _catalog(app)
+    client.get("/")
+    _draw(client)
+    with client.session_transaction() as flask_session:
+        size_after_one = len(flask_session["seen_questions"])
+
+    for _ in catalog.ids:
+        _draw(client)
+
+    with client.session_transaction() as flask_session:
+        assert len(flask_session["seen_questions"]) == size_after_one
+        assert "seen_question_ids" not in flask_session
+
+
+def test_a_legacy_seen_list_is_folded_into_the_bitmap(app, client):
+    catalog = _catalog(app)
+    category = "Philosophy"
+    ids = catalog.ids_by_category[category]
+    client.get("/")
+    with client.session_transaction() as flask_session:
+        flask_session["seen_question_ids"] = list(ids[:-1])
+
+    question = _draw(client, categories=category)
+
+    assert question["id"] == ids[-1]
+    with client.session_transaction() as flask_session:
+        assert "seen_question_ids" not in flask_session
+
+
+def test_answered_questions_are_skipped(app, client):
+    catalog = _catalog(app)
+    category = "Ethics"
+    ids = catalog.ids_by_category[category]
+    client.get("/")
+    _draw(client)
+    with client.session_transaction() as flask_session:
+        user_uuid = flask_session["user_id"]
+    db.session.add(User(uuid=user_uuid, username="someone", tier="free", xp=0))
+    for question_id in ids[:-1]:
+        db.session.add(
+            Answer(
+                user_uuid=user_uuid,
+                question_id=question_id,
+                claim="A claim.",
+                argument="An argument.",
+                evaluation_scores={},
+                evaluation_feedback={},
+                xp_earned=0,
+            )
+        )
+    db.session.commit()
+
+    assert _draw(client, categories=category)["id"] == ids[-1]
+    # Everything in the category answered or seen: seen-but-unanswered is
+    # not available either, so an answered one comes back rather than nothing.
+    assert _draw(client, categories=category)["id"] in ids
@@ -0,0 +1,163 @@
+"""Quota usage: every counter in one read, and each spend in one statement."""
+
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import event
+
+from extensions import db
+from models import Answer, QuotaLedger, User
+from services.quota_service import QuotaSnapshot, consume, period_for, refund
+
+ANSWER = {
+    "question_id": "experiences",
+    "question_text": "Do experiences make you happier than possessions?",
+    "claim": "Experiences beat possessions.",
+    "argument": (
+        "Possessions lose their novelty because we adapt to them, while "
+        "experiences keep paying out as memories that we revisit and retell."
+    ),
+    "counterargument": "Some possessions do enable repeated experiences.",
+}
+
+
+@contextmanager
+def _statements():
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _last_month():
+    now = datetime.now(UTC)
+    return datetime(now.year, now.month, 1, tzinfo=UTC) - timedelta(days=1)
+
+
+def test_it_counts_answers_and_challenge_responses_today(client):
+    client.get("/")
+    answer_id = client.post("/submit_answer", json=ANSWER).get_json()["answer_id"]
+    client.post(
+        "/submit_challenge_response",
+        json={"answer_id": answer_id, "challenge_response": "A fair point."},
+    )
+    user = User.query.one()
+
+    quota = QuotaSnapshot.load(user.uuid)
+
+    assert quota.daily_evaluations == 2
+    assert quota.monthly_evaluations == 2
+
+
+def test_it_is_a_single_statement(client):
+    client.get("/")
+    client.post("/submit_answer", json=ANSWER)
+    user_uuid = User.query.one().uuid
+    db.session.expire_all()
+
+    with _statements() as seen:
+        QuotaSnapshot.load(user_uuid)
+
+    assert len(seen) == 1
+
+
+def test_a_previous_month_reads_as_zero_without_a_write(client):
+    client.get("/")
+    client.post("/submit_answer", json=ANSWER)
+    user_uuid = User.query.one().uuid
+    last_month = period_for("eval", _last_month())
+    db.session.add(
+        QuotaLedger(user_uuid=user_uuid, resource="eval", period=last_month, count=30)
+    )
+    db.session.commit()
+
+    assert QuotaSnapshot.load(user_uuid).monthly_evaluations == 1
+    assert client.get("/profile").status_code == 200
+
+    db.session.expire_all()
+    assert db.session.get(QuotaLedger, (user_uuid, "eval", last_month)).count == 30
+
+
+def test_consume_stops_at_the_limit(app):
+    with app.app_context():
+        assert consume("someone", "voice", 2) == 1
+        assert consume("someone", "voice", 2) == 2
+        assert consume("someone", "voice", 2) is None
+        assert QuotaSnapshot.load("someone").monthly_voice == 2
+
+
+def test_a_zero_limit_never_creates_a_row(app):
+    with app.app_context():
+        assert consume("someone", "deep_analysis", 0) is None
+        assert QuotaLedger.query.count() == 0
+
+
+def test_refund_gives_a_unit_back_and_never_goes_negative(app):
+    with app.app_context():
+        consume("someone", "eval", 5)
+        refund("someone", "eval")
+        refund("someone", "eval")
+
+        assert QuotaSnapshot.load("someone").monthly_evaluations == 0
+
+
+def test_daily_voice_is_counted_per_day(app):
+    with app.app_context():
+        consume("someone", "voice_daily", 3)
+        yesterday = period_for("voice_daily", datetime.now(UTC) - timedelta(days=1))
+        db.session.add(
+            QuotaLedger(
+                user_uuid="someone",
+                resource="voice_daily",
+                period=yesterday,
+                count=3,
+            )
+        )
+        db.session.commit()
+
+        assert QuotaSnapshot.load("someone").daily_voice == 1
+
+
+def test_an_evaluation_that_fails_is_refunded(client):
+    client.get("/")
+    with mock.patch(
+        "services.evaluator.DummyEvaluator.evaluate",
+        side_effect=RuntimeError("vertex 503"),
+    ):
+        response = client.post("/submit_answer", json=ANSWER)
+
+    assert response.status_code >= 500
+    assert QuotaLedger.query.one().count == 0
+
+
+def test_an_evaluation_that_is_not_stored_is_refunded(client):
+    client.get("/")
+    with mock.patch(
+        "routes.answers.add_fingerprint", side_effect=RuntimeError("insert failed")
+    ):
+        response = client.post("/submit_answer", json=ANSWER)
+
+    assert response.status_code >= 500
+    assert Answer.query.count() == 0
+    assert QuotaLedger.query.one().count == 0
+
+
+def test_a_stored_evaluation_is_paid_for(client):
+    client.get("/")
+
+    assert client.post("/submit_answer", json=ANSWER).status_code == 200
+    assert QuotaLedger.query.one().count == 1
+
+
+def test_an_unknown_visitor_has_an_empty_snapshot(app):
+    with app.app_context():
+        assert QuotaSnapshot.load("no-such-user") == QuotaSnapshot()
+        assert Answer.query.count() == 0
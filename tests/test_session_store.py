@@ -0,0 +1,169 @@
+"""Server-side sessions: only an id in the cookie, data read lazily, written if dirty.
+
+The suite otherwise runs on Flask's cookie sessions, so each test here installs
+a SQLite store on the app itself; the routes cannot tell the difference.
+"""
+
+import pytest
+from flask.sessions import SecureCookieSessionInterface
+
+from session_store import (
+    ServerSessionInterface,
+    SQLiteSessionStore,
+    decode,
+    encode,
+)
+
+
+@pytest.fixture
+def store(app, tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"))
+    app.session_interface = ServerSessionInterface(store)
+    return store
+
+
+def _cookie(client, app):
+    return client.get_cookie(app.config["SESSION_COOKIE_NAME"])
+
+
+def _count(store, name, monkeypatch):
+    calls = []
+    original = getattr(store, name)
+
+    def counting(*args):
+        calls.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(store, name, counting)
+    return calls
+
+
+def test_the_cookie_holds_only_an_id(app, client, store):
+    client.get("/")
+
+    cookie = _cookie(client, app)
+    assert cookie is not None
+    assert "." not in cookie.value
+    data, _expiry = store.load(cookie.value)
+    assert data["user_id"]
+
+
+def test_session_data_survives_across_requests(app, client, store):
+    client.get("/")
+    with client.session_transaction() as flask_session:
+        user_id = flask_session["user_id"]
+        flask_session["language"] = "de"
+
+    client.get("/")
+
+    with client.session_transaction() as flask_session:
+        assert flask_session["user_id"] == user_id
+        assert flask_session["language"] == "de"
+
+
+def test_an_untouched_session_is_not_written_back(app, client, store, monkeypatch):
+    client.get("/")
+    # The second request records today's visit in the session; after that a
+    # page view reads the session but has nothing to write.
+    client.get("/")
+    saves = _count(store, "save", monkeypatch)
+    loads = _count(store, "load", monkeypatch)
+
+    response = client.get("/robots.txt")
+
+    assert response.status_code == 200
+    assert len(loads) == 1
+    assert saves == []
+    assert "Set-Cookie" not in response.headers
+
+
+def test_a_signed_cookie_session_is_imported(app, client, store):
+    legacy = SecureCookieSessionInterface().get_signing_serializer(app)
+    client.set_cookie(
+        app.config["SESSION_COOKIE_NAME"],
+        legacy.dumps({"user_id": "legacy-user", "language": "fr"}),
+        domain="localhost",
+    )
+
+    client.get("/robots.txt")
+    with client.session_transaction() as flask_session:
+        flask_session["touched"] = True
+
+    cookie = _cookie(client, app)
+    assert "." not in cookie.value
+    data, _expiry = store.load(cookie.value)
+    assert data["user_id"] == "legacy-user"
+    assert data["language"] == "fr"
+
+
+def test_a_forged_signed_cookie_is_not_imported(app, client, store):
+    forged = (
+        SecureCookieSessionInterface()
+        .get_signing_serializer(app)
+        .dumps({"user_id": "legacy-user"})
+    )
+    client.set_cookie(app.config["SESSION_COOKIE_NAME"], forged + "x")
+
+    client.get("/")
+
+    data, _expiry = store.load(_cookie(client, app).value)
+    assert data["user_id"] != "legacy-user"
+
+
+def test_clearing_the_session_deletes_it(app, client, store):
+    client.get("/")
+    sid = _cookie(client, app).value
+
+    with client.session_transaction() as flask_session:
+        flask_session.clear()
+
+    assert store.load(sid) == (None, None)
+    assert _cookie(client, app) is None
+
+
+def test_an_unknown_session_id_is_not_adopted(app, client, store):
+    client.set_cookie(app.config["SESSION_COOKIE_NAME"], "chosen-by-an-attacker")
+
+    client.get("/")
+
+    sid = _cookie(client, app).value
+    assert sid != "chosen-by-an-attacker"
+    assert store.load("chosen-by-an-attacker") == (None, None)
+    assert store.load(sid)[0]["user_id"]
+
+
+def test_the_session_id_changes_with_the_user(app, client, store):
+    client.get("/")
+    anonymous_sid = _cookie(client, app).value
+
+    response = client.post(
+        "/signup",
+        json={
+            "email": "fixed@example.com",
+            "password": "correct horse battery staple",
+            "username": "fixed",
+        },
+    )
+
+    assert response.status_code == 200
+    signed_up_sid = _cookie(client, app).value
+    assert signed_up_sid != anonymous_sid
+    assert store.load(anonymous_sid) == (None, None)
+    assert store.load(signed_up_sid)[0]["_user_id"]
+
+    client.post("/logout")
+
+    assert store.load(signed_up_sid) == (None, None)
+    client.get("/")
+    assert _cookie(client, app).value not in (anonymous_sid, signed_up_sid)
+
+
+def test_encoding_round_trips_and_compresses_large_sessions():
+    small = {"user_id": "abc", "seen": (1, 2)}
+    large = {"question": "x" * 2000}
+
+    assert encode(small)[:1] == b"j"
+    assert decode(encode(small)) == small
+    assert encode(large)[:1] == b"z"
+    assert len(encode(large)) < 200
+    assert decode(encode(large)) == large
@@ -0,0 +1,195 @@
+"""Share pages: conditional GETs, the rendered-page cache, and edge caching."""
+
+import pytest
+
+from extensions import db
+from models import Answer, User
+from routes import share
+from services.share_service import make_share_token
+
+
+@pytest.fixture(autouse=True)
+def _empty_page_cache():
+    share._pages.clear()
+    yield
+    share._pages.clear()
+
+
+def _shared_answer(answer_id="shared-1"):
+    db.session.add(User(uuid="author", username="author", tier="free"))
+    db.session.add(
+        Answer(
+            id=answer_id,
+            user_uuid="author",
+            question_id="experiences",
+            question_text="Do experiences make you happier than possessions?",
+            claim="Experiences beat possessions.",
+            argument="Memories keep paying out.",
+            evaluation_scores={"Overall": 7},
+            evaluation_feedback={"Overall": "Solid."},
+            challenge="What about heirlooms?",
+            xp_earned=10,
+        )
+    )
+    db.session.commit()
+    return f"/share/{make_share_token(answer_id)}"
+
+
+def _count_renders(monkeypatch):
+    renders = []
+    original = share._render
+
+    def counting(answer_id):
+        renders.append(answer_id)
+        return original(answer_id)
+
+    monkeypatch.setattr(share, "_render", counting)
+    return renders
+
+
+def test_a_share_page_is_publicly_cacheable_but_unlisted(app):
+    url = _shared_answer()
+
+    response = app.test_client().get(url)
+
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+    assert response.headers["Cache-Control"].startswith("public")
+    assert "s-maxage" in response.headers["Cache-Control"]
+    assert response.headers["X-Robots-Tag"] == "noindex, nofollow"
+    assert b'content="noindex, nofollow"' in response.data
+    # A cookie on the response would keep the edge from caching it.
+    assert "Set-Cookie" not in response.headers
+
+
+def test_a_matching_etag_gets_304_without_a_render(app, monkeypatch):
+    url = _shared_answer()
+    client = app.test_client()
+    etag = client.get(url).headers["ETag"]
+    renders = _count_renders(monkeypatch)
+
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.data == b""
+    assert renders == []
+
+
+def test_repeat_views_reuse_the_rendered_page(app, monkeypatch):
+    url = _shared_answer()
+    renders = _count_renders(monkeypatch)
+
+    for _ in range(3):
+        assert app.test_client().get(url).status_code == 200
+
+    assert renders == ["shared-1"]
+
+
+def test_a_challenge_response_changes_the_page(app):
+    url = _shared_answer()
+    client = app.test_client()
+    before = client.get(url)
+
+    answer = db.session.get(Answer, "shared-1")
+    answer.challenge_response = "Heirlooms are stored memories."
+    db.session.commit()
+    after = client.get(url, headers={"If-None-Match": before.headers["ETag"]})
+
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert b"Heirlooms are stored memories." in after.data
+
+
+def test_the_page_cache_is_bounded(app, monkeypatch):
+    monkeypatch.setattr(share.SETTINGS, "SHARE_PAGE_CACHE_SIZE", 2)
+    urls = [_shared_answer("shared-1")]
+    for answer_id in ("shared-2", "shared-3"):
+        answer = db.session.get(Answer, "shared-1")
+        db.session.add(
+            Answer(
+                id=answer_id,
+                user_uuid="author",
+                question_text=answer.question_text,
+                claim=answer.claim,
+                argument=answer.argument,
+                evaluation_scores={},
+                evaluation_feedback={},
+                xp_earned=0,
+            )
+        )
+        db.session.commit()
+        urls.append(f"/share/{make_share_token(answer_id)}")
+
+    for url in urls:
+        app.test_client().get(url)
+
+    assert len(share._pages) == 2
+
+
+def test_a_forged_or_stale_link_is_404(app):
+    url = _shared_answer()
+    client = app.test_client()
+
+    assert client.get(url + "0").status_code == 404
+    assert client.get(f"/share/{make_share_token('missing')}").status_code == 404
+
+
+def test_the_page_language_comes_from_the_link_not_the_session(app, client):
+    url = _shared_answer()
+    anonymous = app.test_client().get(url)
+    with client.session_transaction() as flask_session:
+        flask_session["language"] = "de"
+
+    viewer = client.get(url)
+    german = app.test_client().get(f"{url}?lang=de")
+
+    # The edge caches by URL: a German session must not change what it stores.
+    assert b'<html lang="en">' in viewer.data
+    assert viewer.headers["ETag"] == anonymous.headers["ETag"]
+    assert b'<html lang="de">' in german.data
+    assert german.headers["ETag"] != anonymous.headers["ETag"]
+
+
+def test_a_share_link_carries_the_authors_language(client):
+    client.get("/")
+    with client.session_transaction() as flask_session:
+        user_id = flask_session["user_id"]
+        flask_session["language"] = "de"
+    db.session.add(User(uuid=user_id, username="sharer", tier="free"))
+    db.session.add(
+        Answer(
+            id="shared-de",
+            user_uuid=user_id,
+            question_id="experiences",
+            question_text="Machen Erlebnisse glücklicher als Besitz?",
+            claim="Ja.",
+            argument="Erinnerungen bleiben.",
+            xp_earned=10,
+        )
+    )
+    db.session.commit()
+
+    url = client.post("/create_share_link", json={"answer_id": "shared-de"}).get_json()[
+        "url"
+    ]
+
+    assert url.endswith("?lang=de")
+
+
+def test_a_public_share_response_never_sets_a_cookie(app, client):
+    url = _shared_answer()
+    anonymous = app.test_client().get(f"{url}?lang=de")
+    with client.session_transaction() as flask_session:
+        flask_session["user_id"] = "viewer"
+        flask_session.permanent = True
+
+    viewer = client.get(f"{url}?lang=de")
+
+    # ?lang= is the page's own parameter, not a language switch to remember.
+    assert anonymous.headers["Cache-Control"].startswith("public")
+    assert "Set-Cookie" not in anonymous.headers
+    for response in (anonymous, viewer):
+        if "public" in response.headers["Cache-Control"]:
+            assert "Set-Cookie" not in response.headers
+    assert viewer.headers["Cache-Control"] == "private, no-store"
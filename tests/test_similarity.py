@@ -0,0 +1,117 @@
+"""The near-duplicate check in front of the scored pass.
+
+What matters is that a duplicate is caught before the evaluator runs, and that
+the fingerprint lookup finds the same duplicates the old full-history scan did.
+"""
+
+from unittest import mock
+
+from extensions import db
+from models import Answer, AnswerFingerprint
+from services.similarity_service import (
+    BANDS,
+    backfill_fingerprints,
+    find_similar_answer,
+)
+
+ANSWER = {
+    "question_id": "experiences",
+    "question_text": "Do experiences make you happier than possessions?",
+    "claim": "Experiences beat possessions.",
+    "argument": (
+        "Possessions lose their novelty because we adapt to them, while "
+        "experiences keep paying out as memories that we revisit and retell."
+    ),
+    "counterargument": "Some possessions do enable repeated experiences.",
+}
+
+OTHER = {
+    **ANSWER,
+    "claim": "Possessions last longer than experiences.",
+    "argument": (
+        "A good chair or a bicycle is used every day for years, and each use is "
+        "a small experience of its own that a single holiday cannot match."
+    ),
+    "counterargument": "",
+}
+
+
+def test_each_stored_answer_gets_a_fingerprint(client):
+    client.get("/")
+
+    client.post("/submit_answer", json=ANSWER)
+
+    answer = Answer.query.one()
+    rows = AnswerFingerprint.query.filter_by(answer_id=answer.id).all()
+    assert len(rows) == BANDS
+    assert {row.user_uuid for row in rows} == {answer.user_uuid}
+
+
+def test_a_duplicate_is_rejected_before_the_evaluator_runs(client):
+    client.get("/")
+    client.post("/submit_answer", json=ANSWER)
+
+    with mock.patch("routes.answers.create_evaluator") as create:
+        response = client.post(
+            "/submit_answer",
+            json={**ANSWER, "argument": ANSWER["argument"].replace("while", "whereas")},
+        )
+
+    assert response.status_code == 409
+    assert response.get_json()["error"] == "similarAnswer"
+    create.assert_not_called()
+    assert Answer.query.count() == 1
+
+
+def test_a_different_answer_goes_through(client):
+    client.get("/")
+    client.post("/submit_answer", json=ANSWER)
+
+    response = client.post("/submit_answer", json=OTHER)
+
+    assert response.status_code == 200
+    assert Answer.query.count() == 2
+
+
+def test_a_counterargument_on_only_one_side_is_not_a_duplicate(client):
+    client.get("/")
+    client.post("/submit_answer", json=ANSWER)
+
+    response = client.post("/submit_answer", json={**ANSWER, "counterargument": ""})
+
+    assert response.status_code == 200
+
+
+def test_another_users_answer_is_not_a_duplicate(app, client):
+    client.get("/")
+    client.post("/submit_answer", json=ANSWER)
+
+    other = app.test_client()
+    other.get("/")
+
+    assert other.post("/submit_answer", json=ANSWER).status_code == 200
+
+
+def test_backfill_fingerprints_older_answers(client):
+    client.get("/")
+    client.post("/submit_answer", json=ANSWER)
+    answer = Answer.query.one()
+    AnswerFingerprint.query.delete()
+    db.session.commit()
+    assert (
+        find_similar_answer(
+            answer.user_uuid, answer.claim, answer.argument, answer.counterargument
+        )
+        is None
+    )
+
+    assert backfill_fingerprints() == 1
+
+    assert (
+        find_similar_answer(
+            answer.user_uuid, answer.claim, answer.argument, answer.counterargument
+        )
+        == answer.id
+    )
+    # Idempotent: a second run finds nothing left to do.
+    assert backfill_fingerprints() == 0
@@ -0,0 +1,72 @@
+"""Cold start: SDK clients and modules are deferred until first use."""
+
+import sys
+import threading
+import time
+
+from lazy import LazyModule, once
+from startup_profile import parse_importtime, profile_startup
+
+
+def test_once_builds_a_single_instance_across_threads():
+    calls = []
+
+    @once
+    def client():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(client())) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+    client.reset()
+    assert client() is not results[0]
+    assert len(calls) == 2
+
+
+def test_a_lazy_module_imports_on_first_attribute_access():
+    sys.modules.pop("colorsys", None)
+    colorsys = LazyModule("colorsys")
+
+    assert "colorsys" not in sys.modules
+    assert colorsys.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+    assert "colorsys" in sys.modules
+
+    colorsys.ONE_THIRD_COPY = 1 / 3
+    assert sys.modules["colorsys"].ONE_THIRD_COPY == 1 / 3
+    del sys.modules["colorsys"].ONE_THIRD_COPY
+
+
+def test_parse_importtime_reads_costs_and_nesting():
+    stderr = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _weakref
+import time:       800 |        920 |   weakref
+import time:      1500 |       2420 | app
+some other log line"""
+
+    costs = parse_importtime(stderr)
+
+    assert [(c.module, c.self_us, c.cumulative_us, c.depth) for c in costs] == [
+        ("_weakref", 120, 120, 2),
+        ("weakref", 800, 920, 1),
+        ("app", 1500, 2420, 0),
+    ]
+
+
+def test_the_app_starts_without_importing_sdks():
+    profile = profile_startup()
+
+    assert profile.status == 200
+    assert profile.eager == []
+    assert any(cost.module == "app" and cost.depth == 0 for cost in profile.imports)
@@ -0,0 +1,56 @@
+"""Content pages: rendered once per language, served with ETags and gzip."""
+
+import gzip
+
+from services import static_pages
+
+
+def test_content_pages_are_served_without_rendering(app, client, monkeypatch):
+    def no_render(*args, **kwargs):
+        raise AssertionError("content pages are pre-rendered")
+
+    monkeypatch.setattr(static_pages, "render_template", no_render)
+
+    for path in ("/how_it_works", "/how_to_improve", "/support", "/privacy"):
+        response = client.get(path)
+        assert response.status_code == 200, path
+        assert response.headers["ETag"]
+
+
+def test_a_gzip_client_gets_the_gzip_variant(client):
+    plain = client.get("/how_it_works")
+    compressed = client.get("/how_it_works", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert gzip.decompress(compressed.data) == plain.data
+    # Different bytes, so a different ETag for each.
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+
+
+def test_a_matching_etag_gets_not_modified(client):
+    etag = client.get("/terms").headers["ETag"]
+
+    response = client.get("/terms", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_a_language_prefix_switches_the_served_copy(client):
+    english = client.get("/how_it_works")
+
+    german = client.get("/de/how_it_works")
+    after = client.get("/contact")
+
+    assert german.headers["ETag"] != english.headers["ETag"]
+    assert b'lang="de"' in german.data
+    assert b'lang="de"' in after.data
+
+
+def test_an_unknown_language_prefix_redirects(client):
+    response = client.get("/xx/support")
+
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith("/support")
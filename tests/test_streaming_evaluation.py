@@ -0,0 +1,180 @@
+"""Streamed submissions: fields arrive early, the stored answer does not change.
+
+The model stream is faked by slicing a real-shaped response into small chunks,
+deliberately cutting through keys, strings and numbers.
+"""
+
+import json
+import threading
+import time
+from unittest import mock
+
+from models import Answer
+from services.evaluator import IncrementalObjectParser, LLMEvaluator
+from services.llm import RESPONSE_SCHEMA
+
+RAW = {
+    "overall_explanation": "Solid.",
+    "overall_rating": 7,
+    "relevance_explanation": "On topic.",
+    "relevance_rating": 10,
+    "logical_structure_explanation": "Follows.",
+    "logical_structure_rating": 7,
+    "clarity_explanation": 'Clear, with an escaped "quote".',
+    "clarity_rating": 7,
+    "depth_explanation": "Could go further.",
+    "depth_rating": 6,
+    "objectivity_explanation": "Balanced.",
+    "objectivity_rating": 7,
+    "creativity_explanation": "Familiar.",
+    "creativity_rating": 5,
+    "challenge": "What about durable goods?",
+    "argument_structure": {"nodes": [], "edges": []},
+}
+
+ANSWER = {
+    "question_id": "experiences",
+    "question_text": "Do experiences make you happier than possessions?",
+    "claim": "Experiences beat possessions.",
+    "argument": (
+        "Possessions lose their novelty because we adapt to them, while "
+        "experiences keep paying out as memories that we revisit and retell."
+    ),
+    "counterargument": "Some possessions do enable repeated experiences.",
+}
+
+STREAM = {"Accept": "text/event-stream"}
+
+
+def _chunks(text, size=7):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def _streaming_evaluator():
+    text = json.dumps(RAW, indent=1)
+    client = mock.MagicMock()
+    client.models.generate_content.return_value = mock.Mock(text=text)
+    client.models.generate_content_stream.side_effect = lambda **_: iter(
+        [mock.Mock(text=chunk) for chunk in _chunks(text)]
+    )
+    instructions = {"en": "Evaluate in English.", "de": "Bewerte auf Deutsch."}
+    return LLMEvaluator(client, instructions, RESPONSE_SCHEMA), client
+
+
+def _events(body):
+    events = []
+    for block in body.decode().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_parser_yields_every_field_once_in_order():
+    parser = IncrementalObjectParser()
+    seen = []
+    for chunk in _chunks(json.dumps(RAW), size=3):
+        seen.extend(parser.feed(chunk))
+
+    assert seen == list(RAW.items())
+
+
+def test_a_trailing_number_waits_for_its_delimiter():
+    parser = IncrementalObjectParser()
+
+    assert parser.feed('{"relevance_rating": 1') == []
+    assert parser.feed("0") == []
+    assert parser.feed(', "x": "y"') == [("relevance_rating", 10), ("x", "y")]
+
+
+def test_streamed_evaluation_matches_the_plain_call(app):
+    evaluator, client = _streaming_evaluator()
+    fields = []
+    question, claim, argument, counter = (
+        ANSWER["question_text"],
+        ANSWER["claim"],
+        ANSWER["argument"],
+        ANSWER["counterargument"],
+    )
+
+    with app.test_request_context():
+        streamed = evaluator.evaluate(
+            question,
+            claim,
+            argument,
+            counter,
+            on_field=lambda name, value: fields.append(name),
+        )
+    plain = evaluator._parse_response(RAW)
+
+    assert streamed == plain
+    assert fields == list(RAW)
+    client.models.generate_content.assert_not_called()
+
+
+def test_streamed_submission_forwards_fields_and_stores_the_same_answer(client):
+    evaluator, _ = _streaming_evaluator()
+    client.get("/")
+
+    with mock.patch("routes.answers.create_evaluator", return_value=evaluator):
+        response = client.post("/submit_answer", json=ANSWER, headers=STREAM)
+        events = _events(response.data)
+
+    assert response.mimetype == "text/event-stream"
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "job"
+    assert kinds[-1] == "result"
+    assert kinds.count("field") == len(RAW)
+
+    result = events[-1][1]
+    assert result["status"] == 200
+    answer = Answer.query.one()
+    assert result["result"]["answer_id"] == answer.id
+    assert answer.evaluation_scores["Relevance"] == 10
+    assert answer.challenge == RAW["challenge"]
+
+    collected = client.get(result["status_url"]).get_json()
+    assert collected["result"] == result["result"]
+    with client.session_transaction() as flask_session:
+        assert flask_session["xp"] == result["result"]["total_xp"]
+
+
+def test_a_slow_evaluation_releases_the_stream_early(client, monkeypatch):
+    evaluator, model = _streaming_evaluator()
+    release = threading.Event()
+    stream = model.models.generate_content_stream.side_effect
+
+    def slow(**kwargs):
+        release.wait(10)
+        return stream(**kwargs)
+
+    model.models.generate_content_stream.side_effect = slow
+    monkeypatch.setattr("services.evaluation_jobs.STREAM_SECONDS", 0.2)
+    client.get("/")
+
+    with mock.patch("routes.answers.create_evaluator", return_value=evaluator):
+        response = client.post("/submit_answer", json=ANSWER, headers=STREAM)
+        events = _events(response.data)
+        release.set()
+
+        # The thread is handed back; the job finishes and is collected by URL.
+        assert [kind for kind, _ in events] == ["job", "timeout"]
+        status_url = events[-1][1]["status_url"]
+        for _ in range(200):
+            job = client.get(status_url).get_json()
+            if job["status"] == "done":
+                break
+            time.sleep(0.05)
+
+    assert job["result"]["answer_id"] == Answer.query.one().id
+
+
+def test_a_rejected_submission_is_not_streamed(client):
+    client.get("/")
+
+    response = client.post(
+        "/submit_answer", json={**ANSWER, "argument": ""}, headers=STREAM
+    )
+
+    assert response.status_code == 400
+    assert response.mimetype == "application/json"
@@ -0,0 +1,78 @@
+"""Translation bundles: one parse per file, split by namespace, served with ETags."""
+
+import gzip
+import json
+from unittest import mock
+
+from services.question_service import get_catalog
+from services.translation_service import get_translations, split
+
+
+def _merge(target, source):
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+def test_the_bundles_merge_back_into_the_file(app):
+    with app.test_request_context():
+        data = get_translations("en").data
+
+    parts = split(data)
+
+    assert set(parts) == {"ui", "questions", "examples", "achievements"}
+    assert "questions" not in parts["ui"] and "exampleAnswers" not in parts["ui"]
+    assert "achievementData" not in parts["ui"]["profile"]
+    assert parts["achievements"]["profile"]["achievementData"]
+    merged = {}
+    for part in parts.values():
+        _merge(merged, part)
+    assert merged == data
+
+
+def test_the_file_is_parsed_once_for_every_reader(app, client):
+    with app.test_request_context():
+        translations = get_translations("en")
+        assert get_translations("en") is translations
+        assert get_catalog("en").mtime == translations.mtime
+
+    with mock.patch("json.load", side_effect=AssertionError("parsed")):
+        page = client.get("/")
+        bundle = client.get("/translations/en/ui.json")
+
+    assert page.status_code == 200
+    assert bundle.status_code == 200
+
+
+def test_a_bundle_is_served_with_an_etag(client):
+    response = client.get("/translations/de/questions.json")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    assert set(response.get_json()) == {"questions"}
+    assert response.headers["ETag"]
+    assert "Set-Cookie" not in response.headers
+
+    again = client.get(
+        "/translations/de/questions.json",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert again.status_code == 304
+
+
+def test_a_bundle_is_sent_compressed_when_accepted(client):
+    plain = client.get("/translations/en/ui.json")
+    compressed = client.get(
+        "/translations/en/ui.json", headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+
+
+def test_unknown_bundles_are_not_found(client):
+    assert client.get("/translations/en/everything.json").status_code == 404
+    assert client.get("/translations/xx/ui.json").status_code == 404
@@ -0,0 +1,113 @@
+"""The per-request User identity map: one load per request, none across them."""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from extensions import db
+from models import User, UserAchievement
+from services.user_service import get_user
+
+ANSWER = {
+    "question_id": "experiences",
+    "question_text": "Do experiences make you happier than possessions?",
+    "claim": "Experiences beat possessions.",
+    "argument": (
+        "Possessions lose their novelty because we adapt to them, while "
+        "experiences keep paying out as memories that we revisit and retell."
+    ),
+    "counterargument": "Some possessions do enable repeated experiences.",
+}
+
+
+@contextmanager
+def _statements():
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _user_selects(statements):
+    return [
+        s for s in statements if s.lstrip().startswith("SELECT") and "FROM users" in s
+    ]
+
+
+def _stored_user():
+    user = User(uuid="u-1", username="someone", tier="free", xp=0, is_active=True)
+    db.session.add(user)
+    db.session.add(UserAchievement(user_uuid="u-1", achievement_id="first_argument"))
+    db.session.commit()
+    db.session.expire_all()
+
+
+def test_the_row_and_its_achievements_are_loaded_once_per_request(app):
+    _stored_user()
+
+    with app.test_request_context(), _statements() as seen:
+        first = get_user("u-1")
+        second = get_user("u-1")
+        achievements = [a.achievement_id for a in second.achievements]
+
+    assert first is second
+    assert achievements == ["first_argument"]
+    assert len(seen) == 1
+
+
+def test_the_next_request_loads_it_again(app):
+    _stored_user()
+    with app.test_request_context():
+        get_user("u-1")
+
+    db.session.execute(db.update(User).values(tier="pro"))
+    db.session.commit()
+
+    with app.test_request_context():
+        second = get_user("u-1")
+        assert second.tier == "pro"
+
+
+def test_a_deleted_row_is_not_served_from_the_map(app):
+    db.session.add(User(uuid="u-1", username="someone", tier="free", xp=0))
+    db.session.commit()
+
+    with app.test_request_context():
+        user = get_user("u-1")
+        db.session.delete(user)
+        db.session.commit()
+
+        assert get_user("u-1") is None
+
+
+def test_a_submission_selects_the_user_row_at_most_twice(client):
+    client.get("/")
+    client.post("/submit_answer", json=ANSWER)
+
+    with _statements() as seen:
+        response = client.post(
+            "/submit_answer",
+            json={**ANSWER, "argument": "A different argument, about rent instead."},
+        )
+
+    assert response.status_code == 200
+    # Once up front, and once more because the quota reservation commits
+    # before the model call. It was five before the identity map.
+    assert len(_user_selects(seen)) <= 2
+
+
+def test_a_page_view_selects_the_user_row_once(client):
+    client.get("/")
+    client.post("/submit_answer", json=ANSWER)
+
+    with _statements() as seen:
+        client.get("/profile")
+
+    assert len(_user_selects(seen)) == 1
@@ -0,0 +1,163 @@
+"""XP as a running total, and the reconciliation that checks it."""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from models import Answer, User
+from services.xp_service import reconcile_xp
+
+ANSWER = {
+    "question_id": "experiences",
+    "question_text": "Do experiences make you happier than possessions?",
+    "claim": "Experiences beat possessions.",
+    "argument": (
+        "Possessions lose their novelty because we adapt to them, while "
+        "experiences keep paying out as memories that we revisit and retell."
+    ),
+    "counterargument": "Some possessions do enable repeated experiences.",
+}
+
+OTHER_ARGUMENTS = [
+    "Rent takes most of what people earn, so ownership is the real question.",
+    "A holiday ends in a week, but a good chair is sat on for a decade.",
+    "Memories are edited every time we recall them, so they flatter the past.",
+]
+
+
+@contextmanager
+def _statements():
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _submit(client, argument=ANSWER["argument"]):
+    return client.post("/submit_answer", json={**ANSWER, "argument": argument})
+
+
+def test_the_total_is_the_sum_of_counted_xp(client):
+    client.get("/")
+    for argument in OTHER_ARGUMENTS:
+        body = _submit(client, argument).get_json()
+
+    user = User.query.one()
+    expected = sum(a.to_dict()["total_xp"] for a in Answer.query.all())
+    assert user.xp == expected == body["total_xp"]
+    assert reconcile_xp() == []
+
+
+def test_the_relevance_rating_is_stored_with_the_answer(client):
+    client.get("/")
+    _submit(client)
+
+    answer = Answer.query.one()
+    assert answer.relevance_rating == answer.evaluation_scores["Relevance"]
+
+
+def test_a_submission_does_not_read_the_history(client):
+    client.get("/")
+    for argument in OTHER_ARGUMENTS:
+        _submit(client, argument)
+
+    with _statements() as seen:
+        _submit(client)
+
+    # The only other place feedback is selected is the full-row load that
+    # recalc_user_xp used to do for every answer the user had.
+    assert not [s for s in seen if "evaluation_feedback" in s and "SELECT" in s]
+
+
+def test_a_challenge_response_adds_its_xp(client):
+    client.get("/")
+    answer_id = _submit(client).get_json()["answer_id"]
+    before = User.query.one().xp
+
+    body = client.post(
+        "/submit_challenge_response",
+        json={"answer_id": answer_id, "challenge_response": "A fair point."},
+    ).get_json()
+
+    db.session.expire_all()
+    assert body["current_xp"] == User.query.one().xp
+    assert body["current_xp"] == before + body["challenge_xp_earned"]
+    assert reconcile_xp() == []
+
+
+def test_reconcile_finds_and_repairs_drift(app, client):
+    client.get("/")
+    _submit(client)
+    user = User.query.one()
+    actual = user.xp
+    user.xp = actual + 40
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["reconcile_xp"])
+    assert "Found 1 drifted" in result.output
+    db.session.expire_all()
+    assert User.query.one().xp == actual + 40
+
+    result = app.test_cli_runner().invoke(args=["reconcile_xp", "--repair"])
+    assert "Repaired 1 drifted" in result.output
+    db.session.expire_all()
+    assert User.query.one().xp == actual
+
+
+def test_login_adds_only_the_xp_of_the_answers_it_moves(client, monkeypatch):
+    # Relevant enough that every answer earns XP, so a skipped one would show.
+    monkeypatch.setattr("services.evaluator.random.randint", lambda low, high: 8)
+    # An account that has already answered ANSWER's question.
+    account = User(
+        uuid="account-uuid",
+        username="owner",
+        email="owner@example.com",
+        password_hash=generate_password_hash("correct horse battery staple"),
+        tier="free",
+        xp=25,
+    )
+    db.session.add(account)
+    db.session.add(
+        Answer(
+            id="account-answer",
+            user_uuid=account.uuid,
+            question_id=ANSWER["question_id"],
+            question_text=ANSWER["question_text"],
+            claim=ANSWER["claim"],
+            argument=ANSWER["argument"],
+            evaluation_scores={"Relevance": 8},
+            relevance_rating=8,
+            xp_earned=25,
+        )
+    )
+    db.session.commit()
+
+    # Anonymously, the same question again (not moved) and a new one (moved).
+    client.get("/")
+    skipped = _submit(client, OTHER_ARGUMENTS[0]).get_json()
+    moved = client.post(
+        "/submit_answer",
+        json={**ANSWER, "question_id": "q-new", "argument": OTHER_ARGUMENTS[1]},
+    ).get_json()
+    assert skipped["xp_gained"] and moved["xp_gained"]
+
+    response = client.post(
+        "/login",
+        json={"login": "owner", "password": "correct horse battery staple"},
+    )
+
+    assert response.status_code == 200
+    db.session.expire_all()
+    user = db.session.get(User, "account-uuid")
+    assert user.xp == 25 + moved["xp_gained"]
+    assert response.get_json()["user"]["xp"] == user.xp
+    assert reconcile_xp() == []